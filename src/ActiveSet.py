@@ -0,0 +1,92 @@
+from ActionSpace import ActionSpace
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+from typing import Dict, Iterator, List
+import heapq
+
+# Parts of the day, each with its own kinds of goal
+PHASES = ("morning", "midday", "evening")
+
+
+def phase_of(timestep: int, config: SimulationConfig = DEFAULT_CONFIG) -> str:
+    """
+    Gets the part of the day a timestep falls in.
+
+    Args:
+        timestep: The current timestep for the day
+        config: The config giving the length of the day and of morning and evening.
+
+    Returns:
+        One of PHASES.
+    """
+    if timestep < (config.steps_per_day * config.morning_percent):
+        return "morning"
+    elif timestep > (config.steps_per_day * (1 - config.evening_percent)):
+        return "evening"
+    return "midday"
+
+
+class ActiveSet:
+    """
+    The agents of a world that need to act on a step, which is every agent not asleep in a cave.
+    Agents are told about the set so they can leave it when they go to sleep and come back when they
+    wake, so sleeping agents cost nothing to step. The set is built from the world's list of agents
+    and iterates in that order, like stepping every agent in turn would.
+    """
+
+    def __init__(self, agents: List) -> None:
+        """
+        Initializes the set with every agent that is not asleep.
+
+        Args:
+            agents: The agents of the world, in the order they step in.
+        """
+        self.agents = list(agents)
+        self.index: Dict = {agent: i for i, agent in enumerate(self.agents)}
+        self.members = {i for i, agent in enumerate(self.agents) if agent.action_state != ActionSpace.Sleep}
+        # While iterating, the indices still to visit and the last one visited
+        self.pending: List[int] = None
+        self.cursor = -1
+        for agent in self.agents:
+            agent.active = self
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, agent) -> bool:
+        return self.index.get(agent) in self.members
+
+    def add(self, agent):
+        """
+        Adds an agent that woke up. An agent later in order than the one stepping still steps this step.
+
+        Args:
+            agent: The agent to add.
+        """
+        i = self.index[agent]
+        if i not in self.members:
+            self.members.add(i)
+            if self.pending is not None and i > self.cursor:
+                heapq.heappush(self.pending, i)
+
+    def discard(self, agent):
+        """
+        Removes an agent that went to sleep, if it is in the set.
+
+        Args:
+            agent: The agent to remove.
+        """
+        self.members.discard(self.index[agent])
+
+    def __iter__(self) -> Iterator:
+        # A sorted list is already a heap
+        self.pending = sorted(self.members)
+        self.cursor = -1
+        try:
+            while self.pending:
+                i = heapq.heappop(self.pending)
+                # Skips agents that went to sleep before their turn and agents added twice
+                if i > self.cursor and i in self.members:
+                    self.cursor = i
+                    yield self.agents[i]
+        finally:
+            self.pending = None
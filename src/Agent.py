@@ -1,33 +1,16 @@
-from ProjectParameters import (
-    AGGRESSIVE_BOUNDS,
-    FIGHT_CAL_COST,
-    HARVEST_BOUNDS,
-    HARVEST_CAL_COST,
-    MEMORY_BOUNDS,
-    STEPS_PER_DAY,
-    CAL_PER_MEM,
-    MAX_AGGR_CAL,
-    MAX_HARVEST_CAL,
-    CHANCE_TO_REMEMBER_BUSH,
-    CHANCE_TO_REMEMBER_CAVE,
-    CHANCE_TO_USE_MEMORY,
-    VISION_RADIUS,
-    INTERACTION_RADIUS,
-    MORNING_PERCENT,
-    EVENING_PERCENT,
-    CHANCE_TO_GET_BORED,
-    FAT_PRESERVATION_PERCENT,
-    WALK_CAL_COST,
-)
 from ActionSpace import ActionSpace
 from WorldEntity import WorldEntity
 from Position import Position
-from typing import Set
+from typing import Dict, Iterable, List, Set
 import numpy as np
-from collections import OrderedDict
+from Memory import Memory, STOLE
+from RandomStreams import RNG
 from BerryBush import BerryBush
 from Counter import Counter
 from Cave import Cave
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+from ActiveSet import phase_of
+from Profiler import PROFILER
 
 AgentCounter = Counter()
 
@@ -37,12 +20,10 @@ class Agent(WorldEntity):
     Represents an agent in the world with a set of genes, goals, location, and actions
     """
 
-    goal: WorldEntity = None
-    action_state = ActionSpace.Wander
-    seen_today: Set[WorldEntity] = set()
-    calories: float = 0
-    calories_burned_for_exercise: float = 0
-    wander_spot: Position = None
+    __slots__ = (
+        "_pos", "config", "aggressiveness", "harvest_percent", "max_memory", "memory", "id",
+        "goal", "action_state", "seen_today", "calories", "calories_burned_for_exercise", "wander_spot", "active",
+    )
 
     def __init__(
         self,
@@ -50,7 +31,8 @@ class Agent(WorldEntity):
         aggressiveness: float,
         harvest_percent: float,
         max_memory: int,
-        memory: OrderedDict = OrderedDict(),
+        memory: Memory = None,
+        config: SimulationConfig = DEFAULT_CONFIG,
     ) -> None:
         """
         Initializes a new agent
@@ -60,16 +42,35 @@ class Agent(WorldEntity):
             aggressiveness: The agent's aggressiveness
             harvest_percent: The percent of calories an agent can take from a bush.
             max_memory: The maximum number of memories the agent can have.
-            memory: The memory to start the agent with.
+            memory: The memory to start the agent with, either a Memory of its own or (entity, value) pairs.
+                    Defaults to an empty memory.
+            config: The config of the world the agent is in.
         """
         super().__init__(pos)
+        self.config = config
         if not self.is_well_bounded(aggressiveness, harvest_percent, max_memory):
             raise ValueError("Genetics are not within proper range.")
         self.aggressiveness = aggressiveness
         self.harvest_percent = harvest_percent
         self.max_memory = max_memory
-        self.memory: OrderedDict[WorldEntity, str] = memory
-        self.name = f"Agent {AgentCounter.get_next()}"
+        self.memory = memory if isinstance(memory, Memory) else Memory(memory or ())
+        self.memory.reserve(max_memory)
+        self.id = AgentCounter.get_next()
+        self.goal: WorldEntity = None
+        self.action_state = ActionSpace.Wander
+        # Active set the agent is in, if any
+        self.active = None
+        self.seen_today: Set[WorldEntity] = set()
+        self.calories: float = 0
+        self.calories_burned_for_exercise: float = 0
+        self.wander_spot: Position = None
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the agent, for display and JSON
+        """
+        return f"Agent {self.id}"
 
     def is_well_bounded(
         self, aggressiveness: float, harvest_percent: float, max_memory: int
@@ -87,98 +88,162 @@ class Agent(WorldEntity):
         """
         return (
             (
-                AGGRESSIVE_BOUNDS[0] <= aggressiveness
-                and aggressiveness <= AGGRESSIVE_BOUNDS[1]
+                self.config.aggressive_bounds[0] <= aggressiveness
+                and aggressiveness <= self.config.aggressive_bounds[1]
+            )
+            and (
+                self.config.harvest_bounds[0] <= harvest_percent
+                and harvest_percent <= self.config.harvest_bounds[1]
             )
             and (
-                HARVEST_BOUNDS[0] <= harvest_percent
-                and harvest_percent <= HARVEST_BOUNDS[1]
+                self.config.memory_bounds[0] <= max_memory
+                and max_memory <= self.config.memory_bounds[1]
             )
-            and (MEMORY_BOUNDS[0] <= max_memory and max_memory <= MEMORY_BOUNDS[1])
         )
 
+    @property
+    def pos(self) -> Position:
+        """
+        Position of the agent
+        """
+        return self._pos
+
+    @pos.setter
+    def pos(self, value: Position):
+        self._pos = value
+        if self.grid is not None:
+            with PROFILER.section("grid_move"):
+                self.grid.move(self)
+
     def walk_to(self, pos: Position):
         """
         moves the agent closer to a position
         also adds calor cost of locomotion
         """
         self.pos = self.pos.step_toward(pos)
-        self.calories_burned_for_exercise += WALK_CAL_COST
+        self.calories_burned_for_exercise += self.config.walk_cal_cost
 
-    def act(self, view: Set[WorldEntity], interact: Set[WorldEntity], timestep: int):
+    def act(self, view, interact: Set[WorldEntity], timestep: int):
         """
         Make the entity act at a certain timestep
 
         Args:
-            view: A set of all entities in the viewing radius of the entity
+            view: The entities in the viewing radius of the entity, either as a set or
+                  split by kind as returned by split_by_kind. Only the kinds from goal_kinds are needed.
             interact: A set of all entities in the interaction raidus of the entity
             timestep: The current timestep for the day
         """
-        # Figure out everything we know about (see and remember), filter out what we've already gone to.
-        possible_goals = view.copy()
-        # Some chance to include memory
-        if np.random.random() < CHANCE_TO_USE_MEMORY:
-            possible_goals.update(self.memory.keys())
-        possible_goals = filter(lambda e: e not in self.seen_today, possible_goals)
         # Do action based on current state
         if self.action_state == ActionSpace.GoTo:
             # If we are at our goal that we are going to
             if self.goal in interact:
-                # Interact with goal
-                if type(self.goal) == Cave:
-                    self.interact_cave(self.goal)
-                elif type(self.goal) == BerryBush:
-                    self.interact_bush(self.goal)
-                else:
-                    self.interact_agent(self.goal)
-                if self.action_state != ActionSpace.Sleep:
-                    # If didn't go to sleep in a cave
-                    self.action_state = ActionSpace.Wander
-                self.goal = None
+                self.interact_goal()
             else:
                 # Continue going toward goal
                 self.walk_to(self.goal.pos)
-                if np.random.random() < CHANCE_TO_GET_BORED:
+                if RNG.random() < self.config.chance_to_get_bored:
                     # Random chance to get bored and switch back to wander
                     self.goal = None
                     self.action_state = ActionSpace.Wander
         elif self.action_state == ActionSpace.Wander:
             if self.wander_spot is None:
-                self.wander_spot = self.pos.get_pos_within_radius(VISION_RADIUS)
+                self.wander_spot = self.pos.get_pos_within_radius(self.config.vision_radius)
             # Wander toward picked spot
             self.walk_to(self.wander_spot)
             # If near spot, reset
-            if self.pos.distance_to(self.wander_spot) < INTERACTION_RADIUS:
+            if self.pos.distance_to(self.wander_spot) < self.config.interaction_radius:
                 self.wander_spot = None
                 # Set up goal for next action
-                if timestep < (STEPS_PER_DAY * MORNING_PERCENT):
-                    # Morning, go to any berry bushes you see or know, otherwise keep wandering
-                    bushes = list(
-                        filter(lambda e: type(e) == BerryBush, possible_goals)
-                    )
-                    if len(bushes) > 0:
-                        self.action_state = ActionSpace.GoTo
-                        self.goal = np.random.choice(bushes)
-                elif timestep > (STEPS_PER_DAY * (1 - EVENING_PERCENT)):
-                    # Evening, go to any cave you see or know, otherwise keep ing
-                    caves = list(filter(lambda e: type(e) == Cave, possible_goals))
-                    if len(caves) > 0:
-                        self.action_state = ActionSpace.GoTo
-                        # an agent will go to the closest cave they can see or rememeber
-                        self.goal = np.random.choice(caves)
-                else:
-                    # Midday, go to any bushes or entities you see or know, otherwise keep wandering
-                    bushes_and_agents = list(
-                        filter(
-                            lambda e: type(e) == BerryBush or type(e) == Agent,
-                            possible_goals,
-                        )
-                    )
-                    if len(bushes_and_agents) > 0:
-                        self.action_state = ActionSpace.GoTo
-                        self.goal = np.random.choice(bushes_and_agents)
+                with PROFILER.section("choose_goal"):
+                    self.choose_goal(view, timestep)
         # If neither of these actions, we are sleeping which is no change.
 
+    def interact_goal(self):
+        """
+        Interacts with the current goal once it is within reach and clears it.
+        """
+        if type(self.goal) == Cave:
+            with PROFILER.section("interact_cave"):
+                self.interact_cave(self.goal)
+        elif type(self.goal) == BerryBush:
+            with PROFILER.section("interact_bush"):
+                self.interact_bush(self.goal)
+        else:
+            with PROFILER.section("interact_agent"):
+                self.interact_agent(self.goal)
+        if self.action_state != ActionSpace.Sleep:
+            # If didn't go to sleep in a cave
+            self.action_state = ActionSpace.Wander
+        self.goal = None
+
+    @staticmethod
+    def goal_kinds(timestep: int, config: SimulationConfig = DEFAULT_CONFIG) -> tuple:
+        """
+        Gets the kinds of entity an agent goes to at a time of day.
+
+        Args:
+            timestep: The current timestep for the day
+            config: The config giving the length of the day and of morning and evening.
+
+        Returns:
+            A tuple of the entity classes worth going to.
+        """
+        phase = phase_of(timestep, config)
+        if phase == "morning":
+            # Morning, go to any berry bushes you see or know
+            return (BerryBush,)
+        elif phase == "evening":
+            # Evening, go to any cave you see or know
+            return (Cave,)
+        # Midday, go to any bushes or entities you see or know
+        return (BerryBush, Agent)
+
+    @staticmethod
+    def split_by_kind(entities: Iterable[WorldEntity]) -> Dict[type, list]:
+        """
+        Splits entities into lists by their kind.
+
+        Args:
+            entities: The entities to split.
+
+        Returns:
+            A dictionary from entity class to the entities of that class.
+        """
+        kinds = {BerryBush: [], Cave: [], Agent: []}
+        for entity in entities:
+            kinds[type(entity)].append(entity)
+        return kinds
+
+    def choose_goal(self, view, timestep: int, known=None):
+        """
+        Picks the next goal from what the agent sees or (by chance) remembers, leaving out what it
+        already went to today. Only entities of the kinds wanted at this time of day are looked at.
+        Leaves the agent wandering if nothing fits.
+
+        Args:
+            view: The entities in the viewing radius of the entity, either as a set or split by kind.
+            timestep: The current timestep for the day
+            known: Optional check an entity has to pass to be chosen.
+        """
+        PROFILER.count("goal_selections")
+        if not isinstance(view, dict):
+            view = Agent.split_by_kind(view)
+        # Some chance to include memory
+        use_memory = RNG.random() < self.config.chance_to_use_memory
+        # Ordered so that a seeded run picks the same goals
+        possible_goals = {}
+        for kind in Agent.goal_kinds(timestep, self.config):
+            possible_goals.update(dict.fromkeys(view.get(kind, ())))
+            if use_memory:
+                possible_goals.update(dict.fromkeys(self.memory.of_kind(kind)))
+        possible_goals = [
+            e for e in possible_goals
+            if e not in self.seen_today and (known is None or known(e))
+        ]
+        if len(possible_goals) > 0:
+            self.action_state = ActionSpace.GoTo
+            self.goal = RNG.choice(possible_goals)
+
     def interact_bush(self, bush: BerryBush):
         """
         How the agent interacts with a bush.
@@ -187,9 +252,9 @@ class Agent(WorldEntity):
             bush: The bush to interact with.
         """
         self.calories += bush.harvest(self.harvest_percent)
-        self.calories_burned_for_exercise += HARVEST_CAL_COST
+        self.calories_burned_for_exercise += self.config.harvest_cal_cost
         self.seen_today.add(bush)
-        if np.random.random() < CHANCE_TO_REMEMBER_BUSH:
+        if RNG.random() < self.config.chance_to_remember_bush:
             self.add_memory(bush)
 
     def interact_cave(self, cave: Cave):
@@ -199,9 +264,10 @@ class Agent(WorldEntity):
         Args:
             cave: The cave to interact with to try and enter
         """
-        cave.append(self)
+        with PROFILER.section("Cave.append"):
+            cave.append(self)
         self.seen_today.add(cave)
-        if np.random.random() < CHANCE_TO_REMEMBER_CAVE:
+        if RNG.random() < self.config.chance_to_remember_cave:
             self.add_memory(cave)
 
     def interact_agent(self, other: "Agent"):
@@ -214,11 +280,13 @@ class Agent(WorldEntity):
         self_agg = self.is_aggressive(other)
         other_agg = other.is_aggressive(self)
         total_calories = self.calories + other.calories
+        PROFILER.count("encounters")
+        PROFILER.count("fights", self_agg or other_agg)
         # Fighting costs calories
         if self_agg:
-            self.calories_burned_for_exercise += FIGHT_CAL_COST
+            self.calories_burned_for_exercise += self.config.fight_cal_cost
         if other_agg:
-            other.calories_burned_for_exercise += FIGHT_CAL_COST
+            other.calories_burned_for_exercise += self.config.fight_cal_cost
         if self_agg == other_agg:
             # both share or both steal
             calorie_split = total_calories / 2
@@ -236,33 +304,54 @@ class Agent(WorldEntity):
 
     def add_memory(self, entity: WorldEntity, val: str = ""):
         """
-        Adds a memory to the memory dict. Automatically drops oldest memory
+        Adds a memory to the agent's memory. Automatically drops oldest memory
         if reached maximum size.
 
         Args:
             entity: The entity to add to the dict
             val: The value of the entity (such as "steal" or "share" for agents)
         """
-        self.memory[entity] = val
-        if len(self.memory) > self.max_memory:
+        if entity not in self.memory and len(self.memory) >= self.max_memory:
+            if self.max_memory == 0:
+                return
             # Remove oldest item in memory.
             self.memory.popitem(False)
+        self.memory[entity] = val
+
+    def sleep(self):
+        """
+        Puts this Agent to sleep, so it does nothing until it wakes.
+        """
+        self.action_state = ActionSpace.Sleep
+        if self.active is not None:
+            self.active.discard(self)
+
+    def wake(self):
+        """
+        Wakes this Agent up to wander again.
+        """
+        self.action_state = ActionSpace.Wander
+        if self.active is not None:
+            self.active.add(self)
 
     def reset(self):
         """
         Resets this Agent for the start of a new day.
         """
-        self.calories = FAT_PRESERVATION_PERCENT * (
+        self.calories = self.config.fat_preservation_percent * (
             self.calories - self.calorie_expenditure
         )
         self.calories_burned_for_exercise = 0
-        self.action_state = ActionSpace.Wander
+        self.wake()
         self.goal = None
         self.seen_today = set()
         self.wander_spot = None
 
     def __hash__(self) -> int:
-        return self.name.__hash__()
+        return self.id
+
+    def __eq__(self, other) -> bool:
+        return self is other or (type(other) is Agent and other.id == self.id)
 
     def to_json(self):
         """
@@ -282,23 +371,104 @@ class Agent(WorldEntity):
         }
 
     @staticmethod
-    def from_json(data: dict):
+    def from_json(data: dict, config: SimulationConfig = DEFAULT_CONFIG):
         """
         Makes an Agent from saved data. Useful for rerunning an evaluation from the same initial conditions.
 
         Args:
             data: The data to restore values from.
+            config: The config of the world the agent is in.
 
         Returns:
             The Agent based on the data.
         """
         return Agent(
-            Position(data["x"], data["y"]),
+            Position(data["x"], data["y"], config),
             data["aggressiveness"],
             data["harvest_percent"],
             data["max_memory"],
+            config=config,
         )
 
+    def to_snapshot(self) -> dict:
+        """
+        Returns the full state of this Agent, apart from the entities it refers to (its goal, memory
+        and what it saw today), which the World stores by name.
+
+        Returns:
+            A JSON serializable version of this Agent's state.
+        """
+        return {
+            **self.to_json(),
+            "id": self.id,
+            "calories": self.calories,
+            "calories_burned_for_exercise": self.calories_burned_for_exercise,
+            "action_state": self.action_state.value,
+            "wander_spot": None if self.wander_spot is None else [self.wander_spot.x, self.wander_spot.y],
+        }
+
+    @staticmethod
+    def from_snapshot(data: dict, config: SimulationConfig = DEFAULT_CONFIG):
+        """
+        Makes an Agent from a snapshot taken by to_snapshot, with an empty memory.
+
+        Args:
+            data: The snapshot to restore values from.
+            config: The config of the world the agent is in.
+
+        Returns:
+            The Agent based on the snapshot.
+        """
+        agent = Agent(
+            Position(data["x"], data["y"], config),
+            data["aggressiveness"],
+            data["harvest_percent"],
+            data["max_memory"],
+            config=config,
+        )
+        agent.id = data["id"]
+        agent.calories = data["calories"]
+        agent.calories_burned_for_exercise = data["calories_burned_for_exercise"]
+        agent.action_state = ActionSpace(data["action_state"])
+        if data["wander_spot"] is not None:
+            agent.wander_spot = Position(*data["wander_spot"], config)
+        return agent
+
+    def references(self, name_of=lambda entity: entity.name) -> dict:
+        """
+        Returns the entities this Agent refers to (its goal, what it saw today and its memory) by name,
+        the part of its state that to_snapshot leaves out.
+
+        Args:
+            name_of: Gets the name of an entity.
+
+        Returns:
+            A JSON serializable dictionary of names.
+        """
+        return {
+            "goal": None if self.goal is None else name_of(self.goal),
+            "seen_today": [name_of(entity) for entity in self.seen_today],
+            "memory": [[name_of(entity), value] for entity, value in self.memory.items()],
+        }
+
+    def restore_references(self, data: dict, entities: Dict[str, WorldEntity]):
+        """
+        Points this Agent at the entities named by references, replacing what it refers to now.
+
+        Args:
+            data: The names from references.
+            entities: Every entity that can be named, by name.
+        """
+        if len(self.memory) > 0:
+            bank = self.memory.bank
+            self.memory.release()
+            self.memory = Memory(bank=bank)
+            self.memory.reserve(self.max_memory)
+        for name, value in data["memory"]:
+            self.memory[entities[name]] = value
+        self.goal = None if data["goal"] is None else entities[data["goal"]]
+        self.seen_today = {entities[name] for name in data["seen_today"]}
+
     @staticmethod
     def from_parents(parent1: "Agent", parent2: "Agent"):
         """
@@ -311,34 +481,50 @@ class Agent(WorldEntity):
         Returns:
             A new agent.
         """
+        return Agent.breed([parent1], [parent2])[0]
+
+    @staticmethod
+    def breed(parents1: List["Agent"], parents2: List["Agent"]) -> List["Agent"]:
+        """
+        Creates new agents by crossover, one for each pair of parents, with the genes of every
+        child drawn at once.
+
+        Args:
+            parents1: A parent of each child, whose position the child starts at.
+            parents2: The other parent of each child.
+
+        Returns:
+            The new agents, in the order of the parents.
+        """
+        if len(parents1) == 0:
+            return []
+        # we are assuming the parents have identical calorie costs for basic activities
+        config = parents1[0].config
+        genes1 = np.array([[p.aggressiveness, p.harvest_percent, p.max_memory] for p in parents1])
+        genes2 = np.array([[p.aggressiveness, p.harvest_percent, p.max_memory] for p in parents2])
         # New genes are average
-        new_aggressiveness = (parent1.aggressiveness + parent2.aggressiveness) / 2
-        new_harvest_percent = (parent1.harvest_percent + parent2.harvest_percent) / 2
-        new_max_memory = (parent1.max_memory + parent2.max_memory) // 2
+        aggressiveness = (genes1[:, 0] + genes2[:, 0]) / 2
+        harvest_percent = (genes1[:, 1] + genes2[:, 1]) / 2
+        max_memory = (genes1[:, 2] + genes2[:, 2]).astype(int) // 2
         # Apply mutation
-        new_aggressiveness += (np.random.random() - 0.5) / 5
-        new_harvest_percent += (np.random.random() - 0.5) / 5
-        new_max_memory += np.random.randint(-2, 3)
+        mutation = RNG.uniforms(3 * len(parents1)).reshape(-1, 3)
+        aggressiveness += (mutation[:, 0] - 0.5) / 5
+        harvest_percent += (mutation[:, 1] - 0.5) / 5
+        max_memory += (mutation[:, 2] * 5).astype(int) - 2
         # Properly bound
-        new_aggressiveness = min(
-            max(new_aggressiveness, AGGRESSIVE_BOUNDS[0]), AGGRESSIVE_BOUNDS[1]
-        )
-        new_harvest_percent = min(
-            max(new_harvest_percent, HARVEST_BOUNDS[0]), HARVEST_BOUNDS[1]
-        )
-        new_max_memory = min(max(new_max_memory, MEMORY_BOUNDS[0]), MEMORY_BOUNDS[1])
+        aggressiveness = np.clip(aggressiveness, *config.aggressive_bounds)
+        harvest_percent = np.clip(harvest_percent, *config.harvest_bounds)
+        max_memory = np.clip(max_memory, *config.memory_bounds).tolist()
         # Share memory
-        parent_memory = list(parent1.memory.items()) + list(parent2.memory.items())
-        np.random.shuffle(parent_memory)
-        new_memory = OrderedDict(parent_memory[0:new_max_memory])
-        return Agent(
-            parent1.pos,
-            new_aggressiveness,
-            new_harvest_percent,
-            new_max_memory,
-            new_memory,
-            # we are assuming the parents have identical calorie costs for basic activities
+        memories = Memory.from_parents_many(
+            [p.memory for p in parents1], [p.memory for p in parents2], max_memory
         )
+        return [
+            Agent(parent1.pos, aggr, harvest, count, memory, config)
+            for parent1, aggr, harvest, count, memory in zip(
+                parents1, aggressiveness.tolist(), harvest_percent.tolist(), max_memory, memories
+            )
+        ]
 
     @property
     def calorie_expenditure(self) -> float:
@@ -346,12 +532,40 @@ class Agent(WorldEntity):
         Formula for base calories expenditure from genes
         """
         basic_metabalism = (
-            (self.aggressiveness * MAX_AGGR_CAL)
-            + (self.harvest_percent * MAX_HARVEST_CAL)
-            + (self.max_memory * CAL_PER_MEM)
+            (self.aggressiveness * self.config.max_aggr_cal)
+            + (self.harvest_percent * self.config.max_harvest_cal)
+            + (self.max_memory * self.config.cal_per_mem)
         )
         return basic_metabalism + self.calories_burned_for_exercise
 
+    @staticmethod
+    def survivals(agents: List["Agent"], config: SimulationConfig = DEFAULT_CONFIG) -> np.ndarray:
+        """
+        Tells which of several agents survived the day at once, like survived.
+
+        Args:
+            agents: The agents to check.
+            config: The config of the world the agents are in.
+
+        Returns:
+            An array of True for each agent sleeping in a cave that covered its calorie expenditure.
+        """
+        state = np.array(
+            [
+                [a.aggressiveness, a.harvest_percent, a.max_memory, a.calories_burned_for_exercise, a.calories]
+                for a in agents
+            ],
+            dtype=float,
+        ).reshape(-1, 5)
+        asleep = np.array([a.action_state == ActionSpace.Sleep for a in agents], dtype=bool)
+        expenditure = (
+            state[:, 0] * config.max_aggr_cal
+            + state[:, 1] * config.max_harvest_cal
+            + state[:, 2] * config.cal_per_mem
+            + state[:, 3]
+        )
+        return asleep & (expenditure < state[:, 4])
+
     @property
     def survived(self) -> bool:
         """
@@ -374,7 +588,8 @@ class Agent(WorldEntity):
             True if it will be aggressive, otherwise false
         """
         modifier = 0
-        if other in self.memory:
+        code = self.memory.code_of(other)
+        if code >= 0:
             # Double if the other stole from you, half if they shared
-            modifier = 2 if self.memory[other] == "steal" else 0.5
-        return np.random.random() < (self.aggressiveness * modifier)
+            modifier = 2 if code == STOLE else 0.5
+        return RNG.random() < (self.aggressiveness * modifier)
@@ -0,0 +1,218 @@
+from ActionSpace import ActionSpace
+from Agent import Agent
+from BerryBush import BerryBush
+from Cave import Cave
+from Position import Position
+from WorldEntity import WorldEntity
+from typing import List
+import numpy as np
+
+# Kinds of goal an agent can have, stored in AgentArrays.goal_kind
+GOAL_NONE = 0
+GOAL_BUSH = 1
+GOAL_CAVE = 2
+GOAL_AGENT = 3
+
+
+class AgentArrays:
+    """
+    Structure of arrays holding the state of a whole population of agents.
+    Index i of every array belongs to agents[i].
+    """
+
+    def __init__(self, agents: List[Agent], caves: List[Cave], bushes: List[BerryBush]) -> None:
+        """
+        Builds the arrays from the object model.
+
+        Args:
+            agents: The agents to hold the state of.
+            caves: The caves of the world, used to resolve goals.
+            bushes: The bushes of the world, used to resolve goals.
+        """
+        self.agents = list(agents)
+        self.caves = caves
+        self.bushes = bushes
+        self.agent_index = {agent: i for i, agent in enumerate(self.agents)}
+        self.cave_index = {cave: i for i, cave in enumerate(caves)}
+        self.bush_index = {bush: i for i, bush in enumerate(bushes)}
+        # Every entity in one list, used to resolve neighbour indices
+        self.entities = list(caves) + list(bushes) + self.agents
+        self.agent_offset = len(caves) + len(bushes)
+        # Static entities never move
+        self.cave_x = np.array([cave.pos.x for cave in caves], dtype=float)
+        self.cave_y = np.array([cave.pos.y for cave in caves], dtype=float)
+        self.bush_x = np.array([bush.pos.x for bush in bushes], dtype=float)
+        self.bush_y = np.array([bush.pos.y for bush in bushes], dtype=float)
+        # Genes
+        n = len(self.agents)
+        self.aggressiveness = np.array([a.aggressiveness for a in self.agents], dtype=float)
+        self.harvest_percent = np.array([a.harvest_percent for a in self.agents], dtype=float)
+        self.max_memory = np.array([a.max_memory for a in self.agents], dtype=int)
+        # Mutable state
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.calories = np.zeros(n)
+        self.calories_burned_for_exercise = np.zeros(n)
+        self.action_state = np.zeros(n, dtype=np.int8)
+        self.goal_kind = np.zeros(n, dtype=np.int8)
+        self.goal_index = np.full(n, -1, dtype=int)
+        self.wander_x = np.zeros(n)
+        self.wander_y = np.zeros(n)
+        self.has_wander_spot = np.zeros(n, dtype=bool)
+        self.pull()
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def knows(self, entity: WorldEntity) -> bool:
+        """
+        Tells if an entity is part of the world these arrays were built for.
+
+        Args:
+            entity: The entity to check.
+
+        Returns:
+            True if the entity can be used as a goal, else False.
+        """
+        return entity in self.agent_index or entity in self.bush_index or entity in self.cave_index
+
+    def locate(self, entity: WorldEntity):
+        """
+        Finds the goal kind and index of an entity.
+
+        Args:
+            entity: The entity to find, may be None.
+
+        Returns:
+            A tuple of the goal kind and the index into the list of that kind.
+        """
+        if entity is None:
+            return GOAL_NONE, -1
+        if type(entity) == BerryBush:
+            return GOAL_BUSH, self.bush_index[entity]
+        if type(entity) == Cave:
+            return GOAL_CAVE, self.cave_index[entity]
+        return GOAL_AGENT, self.agent_index[entity]
+
+    def entity_of(self, kind: int, index: int) -> WorldEntity:
+        """
+        Inverse of locate.
+
+        Args:
+            kind: The goal kind.
+            index: The index into the list of that kind.
+
+        Returns:
+            The entity, or None if there is no goal.
+        """
+        if kind == GOAL_BUSH:
+            return self.bushes[index]
+        if kind == GOAL_CAVE:
+            return self.caves[index]
+        if kind == GOAL_AGENT:
+            return self.agents[index]
+        return None
+
+    def entity_positions(self):
+        """
+        Returns the X and Y coordinates of every entity, in the order of entities.
+        """
+        return (
+            np.concatenate([self.cave_x, self.bush_x, self.x]),
+            np.concatenate([self.cave_y, self.bush_y, self.y]),
+        )
+
+    def split_view(self, view: np.ndarray, kinds: tuple):
+        """
+        Splits entity indices by kind using the index ranges of the kinds, keeping only the
+        kinds asked for.
+
+        Args:
+            view: Indices into entities.
+            kinds: The entity classes to keep.
+
+        Returns:
+            A dictionary from entity class to the entities of that class.
+        """
+        ranges = {
+            Cave: (0, len(self.caves)),
+            BerryBush: (len(self.caves), self.agent_offset),
+            Agent: (self.agent_offset, len(self.entities)),
+        }
+        split = {}
+        for kind in kinds:
+            low, high = ranges[kind]
+            split[kind] = [self.entities[j] for j in view[(view >= low) & (view < high)]]
+        return split
+
+    def goal_positions(self):
+        """
+        Returns the X and Y coordinates of every agent's goal, NaN where there is no goal.
+        Agent goals are looked up each call since they move.
+        """
+        gx = np.full(len(self), np.nan)
+        gy = np.full(len(self), np.nan)
+        for kind, ex, ey in (
+            (GOAL_BUSH, self.bush_x, self.bush_y),
+            (GOAL_CAVE, self.cave_x, self.cave_y),
+            (GOAL_AGENT, self.x, self.y),
+        ):
+            mask = self.goal_kind == kind
+            gx[mask] = ex[self.goal_index[mask]]
+            gy[mask] = ey[self.goal_index[mask]]
+        return gx, gy
+
+    def pull(self, indices=None):
+        """
+        Reads the state of the agent objects into the arrays.
+
+        Args:
+            indices: The agent indices to read, all if None.
+        """
+        if indices is None:
+            indices = range(len(self))
+        for i in indices:
+            agent = self.agents[i]
+            self.x[i] = agent.pos.x
+            self.y[i] = agent.pos.y
+            self.calories[i] = agent.calories
+            self.calories_burned_for_exercise[i] = agent.calories_burned_for_exercise
+            self.action_state[i] = agent.action_state.value
+            self.goal_kind[i], self.goal_index[i] = self.locate(agent.goal)
+            if agent.wander_spot is None:
+                self.has_wander_spot[i] = False
+            else:
+                self.has_wander_spot[i] = True
+                self.wander_x[i] = agent.wander_spot.x
+                self.wander_y[i] = agent.wander_spot.y
+
+    def push(self, indices=None):
+        """
+        Writes the state in the arrays back to the agent objects.
+
+        Args:
+            indices: The agent indices to write, all if None.
+        """
+        if indices is None:
+            indices = range(len(self))
+        for i in indices:
+            agent = self.agents[i]
+            agent.pos = Position(float(self.x[i]), float(self.y[i]), agent.config)
+            agent.calories = float(self.calories[i])
+            agent.calories_burned_for_exercise = float(self.calories_burned_for_exercise[i])
+            agent.action_state = ActionSpace(int(self.action_state[i]))
+            agent.goal = self.entity_of(self.goal_kind[i], self.goal_index[i])
+            if self.has_wander_spot[i]:
+                agent.wander_spot = Position(float(self.wander_x[i]), float(self.wander_y[i]), agent.config)
+            else:
+                agent.wander_spot = None
+
+    def to_agents(self) -> List[Agent]:
+        """
+        Exports the array state to the agent objects.
+
+        Returns:
+            The up to date agents.
+        """
+        self.push()
+        return self.agents
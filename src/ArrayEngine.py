@@ -0,0 +1,295 @@
+from ActionSpace import ActionSpace
+from AgentArrays import AgentArrays, GOAL_NONE, GOAL_AGENT, GOAL_CAVE
+from Neighbours import Neighbours
+from Agent import Agent
+from Memory import aggression_modifiers
+from RandomStreams import RNG
+from Profiler import PROFILER
+from Summary import CAVE_STATS, ENCOUNTER_STATS
+from Position import distance_many, step_toward_many, random_points_within_radius
+from typing import Dict, List
+import numpy as np
+
+
+
+class ArrayEngine:
+    """
+    Steps a world by advancing the movement of the whole population at once in array operations.
+    Only the agents that reach their goal or wander spot on a step drop back to the object model to
+    interact or pick a new goal, so most of the work for a step is done by NumPy.
+
+    Unlike the object engine, all agents move simultaneously, so an agent does not see the moves
+    made by agents before it in the same step. Encounters between agents are also resolved all at
+    once, with each agent meeting at most one other agent per step, and so are the arrivals at each cave.
+    """
+
+    def __init__(self, world) -> None:
+        """
+        Initializes the engine with the state of a world.
+
+        Args:
+            world: The world to step.
+        """
+        self.world = world
+        self.config = world.config
+        self.reload()
+        # Contention at each cave since the start of the day by cave ID, keyed by CAVE_STATS with
+        # fill_time None until the cave is full. Recorded by the world at the end of the day.
+        self.cave_stats: Dict[int, Dict] = {}
+
+    def reload(self):
+        """
+        Rebuilds the array state from the world's agent objects. Must be called whenever
+        the list of agents changes.
+        """
+        self.state = AgentArrays(self.world.agents, self.world.caves, self.world.bushes)
+
+    def sync(self):
+        """
+        Writes the array state back to the world's agent objects.
+        """
+        self.state.to_agents()
+
+    def close(self):
+        """
+        Stops the engine, which holds nothing that needs stopping.
+        """
+
+    def positions(self):
+        """
+        Gets the X and Y coordinates of every agent.
+        """
+        return self.state.x, self.state.y
+
+    def active_count(self) -> int:
+        """
+        Gets the number of agents awake, which the world's active set keeps track of.
+        """
+        return len(self.world.active)
+
+    def step(self, timestep: int) -> Dict[str, int]:
+        """
+        Advances every agent by one step.
+
+        Args:
+            timestep: The current timestep for the day
+
+        Returns:
+            The number of encounters between agents on this step and of each outcome, keyed by ENCOUNTER_STATS.
+        """
+        s = self.state
+        c = self.config
+        if len(s) == 0:
+            return dict.fromkeys(ENCOUNTER_STATS, 0)
+        if timestep == 0:
+            self.cave_stats = {}
+        with PROFILER.section("move"):
+            # Decide which branch every agent takes before anyone changes state
+            going = s.action_state == ActionSpace.GoTo.value
+            wandering = s.action_state == ActionSpace.Wander.value
+            # Agents that already reached their goal interact with it instead of moving
+            gx, gy = s.goal_positions()
+            arrived = going & (distance_many(s.x, s.y, gx, gy) < c.interaction_radius)
+            moving = going & ~arrived
+            self.walk(moving, gx, gy)
+            bored = moving & (RNG.uniforms(len(s)) < c.chance_to_get_bored)
+            s.action_state[bored] = ActionSpace.Wander.value
+            s.goal_kind[bored] = GOAL_NONE
+            s.goal_index[bored] = -1
+            # Wandering agents pick a spot if they need one and walk toward it
+            need_spot = wandering & ~s.has_wander_spot
+            s.wander_x[need_spot], s.wander_y[need_spot] = random_points_within_radius(
+                s.x[need_spot], s.y[need_spot], c.vision_radius, c
+            )
+            s.has_wander_spot[need_spot] = True
+            self.walk(wandering, s.wander_x, s.wander_y)
+            reached = wandering & (distance_many(s.x, s.y, s.wander_x, s.wander_y) < c.interaction_radius)
+            s.has_wander_spot[reached] = False
+        with PROFILER.section("view"):
+            # Only agents picking a new goal need to look around
+            looking = np.flatnonzero(reached)
+            ex, ey = s.entity_positions()
+            neighbours = Neighbours.compute(
+                s.x[looking], s.y[looking], ex, ey, exclude=looking + s.agent_offset, config=c,
+            )
+            row = {i: k for k, i in enumerate(looking)}
+        with PROFILER.section("meet"):
+            # Agents that reached another agent meet all together
+            meeting = arrived & (s.goal_kind == GOAL_AGENT)
+            stats = self.meet(np.flatnonzero(meeting))
+            PROFILER.count("encounters", stats["encounters"])
+            PROFILER.count("fights", stats["steal_share"] + stats["steal_steal"])
+        with PROFILER.section("enter"):
+            # And agents that reached a cave go in together, cave by cave
+            entering = arrived & (s.goal_kind == GOAL_CAVE)
+            self.enter(np.flatnonzero(entering), timestep)
+        with PROFILER.section("goals"):
+            # Other interactions and goal choices go through the object model in agent order
+            for i in np.flatnonzero((arrived & ~meeting & ~entering) | reached):
+                if i in row:
+                    self.choose_goal(i, timestep, neighbours.view(row[i]))
+                elif s.action_state[i] == ActionSpace.GoTo.value:
+                    self.interact_goal(i)
+        return stats
+
+    def walk(self, mask, tx, ty):
+        """
+        Moves the masked agents one step toward their targets, adding the calorie cost of walking.
+
+        Args:
+            mask: Which agents to move.
+            tx: The X coordinate of each agent's target.
+            ty: The Y coordinate of each agent's target.
+        """
+        s = self.state
+        c = self.config
+        if mask.all():
+            # Everyone moves, so step in place without gathering
+            step_toward_many(s.x, s.y, tx, ty, c, out=(s.x, s.y))
+        else:
+            s.x[mask], s.y[mask] = step_toward_many(s.x[mask], s.y[mask], tx[mask], ty[mask], c)
+        s.calories_burned_for_exercise[mask] += c.walk_cal_cost
+
+    @staticmethod
+    def match(initiators: List[int], targets: List[int]) -> List[int]:
+        """
+        Pairs agents up so that none meets more than one other, going through the initiators in order.
+
+        Args:
+            initiators: The agents that reached the agent they were going to.
+            targets: The agent each initiator was going to.
+
+        Returns:
+            The positions in initiators of the encounters that take place.
+        """
+        busy = set()
+        matched = []
+        for k, (i, j) in enumerate(zip(initiators, targets)):
+            if i not in busy and j not in busy:
+                busy.update((i, j))
+                matched.append(k)
+        return matched
+
+    def meet(self, initiators: np.ndarray) -> Dict[str, int]:
+        """
+        Resolves the encounters of agents that reached the agent they were going to, like
+        Agent.interact_agent but for every pair at once. Initiators left out of the matching stay
+        on their way and try again on the next step.
+
+        Args:
+            initiators: The indices of the agents that reached their goal agent, in order.
+
+        Returns:
+            The number of encounters and of each outcome, keyed by ENCOUNTER_STATS.
+        """
+        s = self.state
+        c = self.config
+        matched = self.match(initiators.tolist(), s.goal_index[initiators].tolist())
+        first = initiators[matched]
+        second = s.goal_index[first]
+        agents = s.agents
+        # Both sides of every encounter, in columns
+        pairs = np.stack([first, second], axis=1)
+        codes = np.array(
+            [[agents[i].memory.code_of(agents[j]), agents[j].memory.code_of(agents[i])] for i, j in pairs.tolist()],
+            dtype=int,
+        ).reshape(-1, 2)
+        aggressive = RNG.uniforms(pairs.size).reshape(-1, 2) < s.aggressiveness[pairs] * aggression_modifiers(codes)
+        s.calories_burned_for_exercise[pairs] += c.fight_cal_cost * aggressive
+        # Both share or both steal splits the calories, otherwise the aggressor takes everything
+        total = s.calories[pairs].sum(axis=1, keepdims=True)
+        same = aggressive[:, :1] == aggressive[:, 1:]
+        s.calories[pairs] = np.where(same, total / 2, np.where(aggressive, total, 0))
+        for (i, j), (steals, stolen) in zip(pairs.tolist(), aggressive.tolist()):
+            agents[i].seen_today.add(agents[j])
+            agents[j].seen_today.add(agents[i])
+            agents[i].add_memory(agents[j], "steal" if stolen else "share")
+            agents[j].add_memory(agents[i], "steal" if steals else "share")
+        # The initiators are done with their goal
+        s.action_state[first] = ActionSpace.Wander.value
+        s.goal_kind[first] = GOAL_NONE
+        s.goal_index[first] = -1
+        stealing = np.bincount(aggressive.sum(axis=1), minlength=3)
+        return dict(zip(ENCOUNTER_STATS, [len(first)] + stealing.tolist()))
+
+    def enter(self, arrivals: np.ndarray, timestep: int) -> Dict[int, Dict]:
+        """
+        Has the agents that reached a cave try to go in, like Agent.interact_cave but with all the
+        arrivals at a cave resolved together by Cave.admit. The agents kicked out of every cave are
+        woken together at the end. Adds the contention at each cave to cave_stats.
+
+        Args:
+            arrivals: The indices of the agents that reached their goal cave, in order.
+            timestep: The current timestep for the day
+
+        Returns:
+            The arrivals, fights and evictions at each cave reached on this step, by cave ID.
+        """
+        s = self.state
+        if len(arrivals) == 0:
+            return {}
+        goals = s.goal_index[arrivals]
+        caves = np.unique(goals).tolist()
+        involved = arrivals.tolist()
+        for c in caves:
+            involved.extend(s.agent_index[occupant] for occupant in s.caves[c].occupants)
+        s.push(involved)
+        stats = {}
+        evicted = []
+        for c in caves:
+            cave = s.caves[c]
+            agents = [s.agents[i] for i in arrivals[goals == c].tolist()]
+            kicked_out, stats[cave.id] = cave.admit(agents)
+            evicted.extend(kicked_out)
+            total = self.cave_stats.setdefault(cave.id, {**dict.fromkeys(CAVE_STATS, 0), "fill_time": None})
+            for key, count in stats[cave.id].items():
+                total[key] += count
+            if cave.is_full and total["fill_time"] is None:
+                total["fill_time"] = timestep
+        for agent in evicted:
+            agent.wake()
+        for i in arrivals.tolist():
+            agent = s.agents[i]
+            agent.seen_today.add(agent.goal)
+            if RNG.random() < self.config.chance_to_remember_cave:
+                agent.add_memory(agent.goal)
+            if agent.action_state != ActionSpace.Sleep:
+                agent.action_state = ActionSpace.Wander
+            agent.goal = None
+        s.pull(involved)
+        return stats
+
+    def choose_goal(self, i: int, timestep: int, view: np.ndarray):
+        """
+        Has an agent that reached its wander spot pick a new goal.
+        Remembered entities that are no longer in the world, such as agents that died, are not chosen.
+
+        Args:
+            i: The index of the agent.
+            timestep: The current timestep for the day
+            view: Indices into the state's entities of everything the agent sees.
+        """
+        s = self.state
+        s.push([i])
+        seen = s.split_view(view, Agent.goal_kinds(timestep, self.config))
+        s.agents[i].choose_goal(seen, timestep, known=s.knows)
+        s.pull([i])
+
+    def interact_goal(self, i: int):
+        """
+        Has an agent interact with the goal it reached, updating everyone involved.
+
+        Args:
+            i: The index of the agent.
+        """
+        s = self.state
+        involved = [i]
+        if s.goal_kind[i] == GOAL_AGENT:
+            involved.append(s.goal_index[i])
+        elif s.goal_kind[i] == GOAL_CAVE:
+            # A rival may be kicked out of the cave
+            cave = s.caves[s.goal_index[i]]
+            involved.extend(s.agent_index[o] for o in cave.occupants)
+        s.push(involved)
+        s.agents[i].interact_goal()
+        s.pull(involved)
@@ -1,6 +1,7 @@
 from Position import Position
 from WorldEntity import WorldEntity
 from Counter import Counter
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
 
 BushCounter = Counter()
 
@@ -8,18 +9,29 @@ class BerryBush(WorldEntity):
     """
     Represents a berry bush in the world
     """
-    def __init__(self, pos: Position, max_calories: int) -> None:
+    __slots__ = ("pos", "config", "max_calories", "current_calories", "id")
+
+    def __init__(self, pos: Position, max_calories: int, config: SimulationConfig = DEFAULT_CONFIG) -> None:
         """
         Initializes a new berry bush
 
         Args:
             pos: The position to put the berry bush.
             max_calories: The maximum amount of calories this berry bush has.
+            config: The config of the world the bush is in.
         """
         super().__init__(pos)
+        self.config = config
         self.max_calories = max_calories
         self.current_calories = max_calories
-        self.name = f"Bush {BushCounter.get_next()}"
+        self.id = BushCounter.get_next()
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the bush, for display and JSON
+        """
+        return f"Bush {self.id}"
 
     def reset(self):
         """
@@ -44,7 +56,10 @@ class BerryBush(WorldEntity):
         return calories_gotten
     
     def __hash__(self) -> int:
-        return self.name.__hash__() 
+        return self.id
+
+    def __eq__(self, other) -> bool:
+        return self is other or (type(other) is BerryBush and other.id == self.id)
     
     def to_json(self):
         """
@@ -59,15 +74,42 @@ class BerryBush(WorldEntity):
             "y": self.pos.y
         }
     
+    def to_snapshot(self):
+        """
+        Returns the full state of this BerryBush.
+
+        Returns:
+            A dictionary of the state of this BerryBush.
+        """
+        return {**self.to_json(), "id": self.id, "current_calories": self.current_calories}
+
+    @staticmethod
+    def from_snapshot(data: dict, config: SimulationConfig = DEFAULT_CONFIG):
+        """
+        Creates a BerryBush from a snapshot taken by to_snapshot.
+
+        Args:
+            data: The snapshot to make a berry bush from.
+            config: The config of the world the bush is in.
+
+        Returns:
+            A berry bush in the state of the snapshot.
+        """
+        bush = BerryBush.from_json(data, config)
+        bush.id = data["id"]
+        bush.current_calories = data["current_calories"]
+        return bush
+
     @staticmethod
-    def from_json(data: dict):
+    def from_json(data: dict, config: SimulationConfig = DEFAULT_CONFIG):
         """
         Creates a BerryBush from data.
 
         Args:
             data: The data to make a berry bush from.
+            config: The config of the world the bush is in.
         
         Returns:
             A berry bush matched with the data.
         """
-        return BerryBush(Position(data["x"], data["y"]), data["max_calories"])
\ No newline at end of file
+        return BerryBush(Position(data["x"], data["y"], config), data["max_calories"], config)
\ No newline at end of file
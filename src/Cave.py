@@ -1,10 +1,12 @@
-from ActionSpace import ActionSpace
+from RandomStreams import RNG
+from Memory import aggression_modifiers
+from typing import Dict, List, Set, Tuple
 import numpy as np
-from typing import Set
 from WorldEntity import WorldEntity
 from Counter import Counter
 from Position import Position
-from ProjectParameters import FIGHT_CAL_COST
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+from Profiler import PROFILER
 
 CaveCounter = Counter()
 
@@ -12,18 +14,29 @@ class Cave(WorldEntity):
     """
     Represents a cave with a limited capacity
     """
-    def __init__(self, pos: Position, max_capacity: int) -> None:
+    __slots__ = ("pos", "config", "max_capacity", "occupants", "id")
+
+    def __init__(self, pos: Position, max_capacity: int, config: SimulationConfig = DEFAULT_CONFIG) -> None:
         """
         Initializes a cave with a max capacity.
 
         Args:
             pos: The position of this cave.
             max_capacity: The maximum number of entities in a cave.
+            config: The config of the world the cave is in.
         """
         super().__init__(pos)
+        self.config = config
         self.max_capacity = max_capacity
         self.occupants: Set = set()
-        self.name = f"Cave {CaveCounter.get_next()}"
+        self.id = CaveCounter.get_next()
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the cave, for display and JSON
+        """
+        return f"Cave {self.id}"
 
     def append(self, agent):
         """
@@ -34,28 +47,85 @@ class Cave(WorldEntity):
         """
         if not self.is_full:
             self.occupants.add(agent)
-            agent.action_state = ActionSpace.Sleep
+            agent.sleep()
             agent.pos = self.pos
         else:
-            rival = np.random.choice(list(self.occupants))
+            # Sorted so that a seeded run picks the same rival
+            rival = RNG.choice(sorted(self.occupants, key=lambda occupant: occupant.id))
             # Interact and maybe chuck out rival
             agent_agg = agent.is_aggressive(rival)
             rival_agg = rival.is_aggressive(agent)
+            PROFILER.count("fights", agent_agg or rival_agg)
             if agent_agg:
-                agent.calories_burned_for_exercise += FIGHT_CAL_COST
+                agent.calories_burned_for_exercise += self.config.fight_cal_cost
             if rival_agg:
-                rival.calories_burned_for_exercise += FIGHT_CAL_COST
+                rival.calories_burned_for_exercise += self.config.fight_cal_cost
             if agent_agg and not rival_agg:
                 # Agent successfully kicks out rival
                 self.occupants.remove(rival)
-                rival.action_state = ActionSpace.Wander
+                rival.wake()
+                PROFILER.count("evictions")
                 self.occupants.add(agent)
-                agent.action_state = ActionSpace.Sleep
+                agent.sleep()
                 agent.pos = self.pos
             # Add to memory
             agent.add_memory(rival, "steal" if rival_agg else "share")
             rival.add_memory(agent, "steal" if agent_agg else "share")
 
+    def admit(self, agents: List) -> Tuple[List, Dict[str, int]]:
+        """
+        Does the process for several agents entering the cave on the same step, like append for each
+        but resolved together. Agents take the free places in order and the rest each pick a rival
+        among the occupants there were before the fights. A rival can only be kicked out by the first
+        agent to beat it, the others stay out.
+
+        Args:
+            agents: The agents entering the cave, in order.
+
+        Returns:
+            The rivals kicked out of the cave, which the caller must wake, and the number of arrivals,
+            fights and evictions.
+        """
+        free = max(self.max_capacity - len(self.occupants), 0)
+        for agent in agents[:free]:
+            self.occupants.add(agent)
+            agent.sleep()
+            agent.pos = self.pos
+        contesting = agents[free:]
+        stats = {"arrivals": len(agents), "fights": 0, "evictions": 0}
+        if not contesting or not self.occupants:
+            return [], stats
+        # Sorted so that a seeded run picks the same rivals
+        occupants = sorted(self.occupants, key=lambda occupant: occupant.id)
+        rivals = [occupants[k] for k in (RNG.uniforms(len(contesting)) * len(occupants)).astype(int).tolist()]
+        # Both sides of every fight, in columns
+        codes = np.array(
+            [[agent.memory.code_of(rival), rival.memory.code_of(agent)] for agent, rival in zip(contesting, rivals)],
+            dtype=int,
+        )
+        aggressiveness = np.array([[agent.aggressiveness, rival.aggressiveness] for agent, rival in zip(contesting, rivals)])
+        aggressive = RNG.uniforms(codes.size).reshape(-1, 2) < aggressiveness * aggression_modifiers(codes)
+        evicted = []
+        for agent, rival, (agent_agg, rival_agg) in zip(contesting, rivals, aggressive.tolist()):
+            if agent_agg:
+                agent.calories_burned_for_exercise += self.config.fight_cal_cost
+            if rival_agg:
+                rival.calories_burned_for_exercise += self.config.fight_cal_cost
+            if agent_agg and not rival_agg and rival in self.occupants:
+                # Agent successfully kicks out rival
+                self.occupants.remove(rival)
+                evicted.append(rival)
+                self.occupants.add(agent)
+                agent.sleep()
+                agent.pos = self.pos
+            agent.add_memory(rival, "steal" if rival_agg else "share")
+            rival.add_memory(agent, "steal" if agent_agg else "share")
+        stats["fights"] = int(aggressive.any(axis=1).sum())
+        stats["evictions"] = len(evicted)
+        PROFILER.count("fights", stats["fights"])
+        PROFILER.count("evictions", stats["evictions"])
+        return evicted, stats
+
     @property
     def is_full(self):
         """
@@ -70,7 +140,10 @@ class Cave(WorldEntity):
         self.occupants = set()
 
     def __hash__(self) -> int:
-        return self.name.__hash__()
+        return self.id
+
+    def __eq__(self, other) -> bool:
+        return self is other or (type(other) is Cave and other.id == self.id)
     
     def to_json(self):
         """
@@ -85,15 +158,45 @@ class Cave(WorldEntity):
             "max_capacity": self.max_capacity
         }
     
+    def to_snapshot(self):
+        """
+        Returns the full state of this Cave, with its occupants by name.
+
+        Returns:
+            A dictionary of the state of this Cave.
+        """
+        return {
+            **self.to_json(),
+            "id": self.id,
+            "occupants": [occupant.name for occupant in sorted(self.occupants, key=lambda occupant: occupant.id)],
+        }
+
+    @staticmethod
+    def from_snapshot(data: dict, config: SimulationConfig = DEFAULT_CONFIG):
+        """
+        Produces an empty Cave from a snapshot taken by to_snapshot, the World puts the occupants back.
+
+        Args:
+            data: The snapshot to make the cave from.
+            config: The config of the world the cave is in.
+
+        Returns:
+            A new Cave with the ID of the snapshot.
+        """
+        cave = Cave.from_json(data, config)
+        cave.id = data["id"]
+        return cave
+
     @staticmethod
-    def from_json(data: dict):
+    def from_json(data: dict, config: SimulationConfig = DEFAULT_CONFIG):
         """
         Produces a Cave object from json data.
 
         Args:
             data: The JSON data to make the cave from.
+            config: The config of the world the cave is in.
 
         Returns:
             A new Cave based on the provided data.
         """
-        return Cave(Position(data["x"], data["y"]), data["max_capacity"])
+        return Cave(Position(data["x"], data["y"], config), data["max_capacity"], config)
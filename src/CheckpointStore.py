@@ -0,0 +1,332 @@
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+import gzip
+import json
+import os
+
+# Columns stored for every agent on every checkpointed day, and their types
+AGENT_FIELDS = {
+    "aggressiveness": np.float64,
+    "harvest_percent": np.float64,
+    "max_memory": np.int32,
+    "x": np.float64,
+    "y": np.float64,
+    "calories": np.float64,
+}
+# Columns of the caves and bushes, which never change during a run
+CAVE_FIELDS = ("x", "y", "max_capacity")
+BUSH_FIELDS = ("x", "y", "max_calories")
+
+
+def save_json_checkpoint(checkpoints: Path, day: int, data: dict, compress: bool = False):
+    """
+    Writes the JSON checkpoint of a day.
+
+    Args:
+        checkpoints: The directory of checkpoints.
+        day: The day of the checkpoint.
+        data: The JSON form of the world.
+        compress: Whether to gzip the checkpoint, writing checkpoint_{day}.json.gz.
+    """
+    if compress:
+        with gzip.open(checkpoints.joinpath(f"checkpoint_{day}.json.gz"), "wt") as f:
+            json.dump(data, f)
+    else:
+        with open(checkpoints.joinpath(f"checkpoint_{day}.json"), "wt+") as f:
+            json.dump(data, f, indent=2)
+
+
+def json_checkpoint_files(checkpoints: Path) -> Dict[int, Path]:
+    """
+    Finds the JSON checkpoints in a directory, compressed or not.
+
+    Args:
+        checkpoints: The directory of checkpoints.
+
+    Returns:
+        The file of every checkpointed day, in order of day.
+    """
+    files = {int(p.name.split("_")[1].split(".")[0]): p for p in checkpoints.glob("checkpoint_*.json*")}
+    return dict(sorted(files.items()))
+
+
+def load_json_checkpoint(checkpoints: Path, day: int) -> dict:
+    """
+    Reads the JSON checkpoint of a day, compressed or not.
+
+    Args:
+        checkpoints: The directory of checkpoints.
+        day: The day of the checkpoint.
+
+    Returns:
+        The JSON form of the world.
+    """
+    path = checkpoints.joinpath(f"checkpoint_{day}.json")
+    if path.exists():
+        with open(path, "r") as f:
+            return json.load(f)
+    with gzip.open(checkpoints.joinpath(f"checkpoint_{day}.json.gz"), "rt") as f:
+        return json.load(f)
+
+
+class CheckpointStore:
+    """
+    Columnar checkpoints of a run. The caves and bushes are written once to static.npz and every
+    agent field is appended to its own binary file, one block of agents per day, with index.npz
+    holding where each day's block starts. One field can then be read across every day by mapping
+    a single file, without loading anything else.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """
+        Opens the store in a directory, creating it if needed.
+
+        Args:
+            directory: The directory the store's files are in.
+        """
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.load_index()
+
+    def path(self, name: str) -> Path:
+        """
+        Gets the path of one of the store's files.
+
+        Args:
+            name: The file name.
+        """
+        return self.directory.joinpath(name)
+
+    def load_index(self):
+        """
+        Reads the day index, an empty store has no days.
+        """
+        if self.path("index.npz").exists():
+            with np.load(self.path("index.npz")) as index:
+                self.day_list = index["day"].tolist()
+                self.starts = index["start"].tolist()
+                self.counts = index["count"].tolist()
+        else:
+            self.day_list, self.starts, self.counts = [], [], []
+
+    def save_index(self):
+        """
+        Writes the day index, replacing the old one only once the new one is complete.
+        """
+        with self.path("index.tmp.npz").open("wb") as f:
+            np.savez(f, day=np.array(self.day_list, dtype=np.int64),
+                     start=np.array(self.starts, dtype=np.int64),
+                     count=np.array(self.counts, dtype=np.int64))
+        os.replace(self.path("index.tmp.npz"), self.path("index.npz"))
+
+    def clear(self):
+        """
+        Removes every checkpoint in the store.
+        """
+        for name in ["static.npz", "index.npz"] + [f"{field}.bin" for field in AGENT_FIELDS]:
+            if self.path(name).exists():
+                self.path(name).unlink()
+        self.load_index()
+
+    def truncate(self, day: int):
+        """
+        Removes every checkpoint after a day, such as when resuming a run from that day.
+
+        Args:
+            day: The last day to keep.
+        """
+        keep = sum(1 for stored in self.day_list if stored <= day)
+        if keep == len(self.day_list):
+            return
+        del self.day_list[keep:], self.starts[keep:], self.counts[keep:]
+        total = self.starts[-1] + self.counts[-1] if self.day_list else 0
+        for field, dtype in AGENT_FIELDS.items():
+            if self.path(f"{field}.bin").exists():
+                os.truncate(self.path(f"{field}.bin"), total * np.dtype(dtype).itemsize)
+        self.save_index()
+
+    def write_static(self, caves: List[dict], bushes: List[dict]):
+        """
+        Writes the caves and bushes of the run.
+
+        Args:
+            caves: The JSON form of every cave.
+            bushes: The JSON form of every bush.
+        """
+        columns = {f"cave_{field}": [cave[field] for cave in caves] for field in CAVE_FIELDS}
+        columns.update({f"bush_{field}": [bush[field] for bush in bushes] for field in BUSH_FIELDS})
+        np.savez(self.path("static.npz"), **{name: np.array(values) for name, values in columns.items()})
+
+    def append(self, day: int, agents: Dict[str, np.ndarray]):
+        """
+        Appends one day's agents to the store.
+
+        Args:
+            day: The day of the checkpoint, later than every stored day.
+            agents: The columns of the agents, keyed by the fields of AGENT_FIELDS.
+                    Missing fields are stored as NaN or -1.
+        """
+        if self.day_list and day <= self.day_list[-1]:
+            raise ValueError(f"Day {day} is not after the last stored day {self.day_list[-1]}.")
+        count = len(next(iter(agents.values()))) if agents else 0
+        for field, dtype in AGENT_FIELDS.items():
+            if field in agents:
+                column = np.asarray(agents[field], dtype=dtype)
+            else:
+                column = np.full(count, np.nan if dtype == np.float64 else -1, dtype=dtype)
+            with self.path(f"{field}.bin").open("ab") as f:
+                f.write(column.tobytes())
+        self.starts.append(self.starts[-1] + self.counts[-1] if self.day_list else 0)
+        self.counts.append(count)
+        self.day_list.append(day)
+        self.save_index()
+
+    @staticmethod
+    def agent_columns(agents) -> Dict[str, np.ndarray]:
+        """
+        Gets the stored columns of a list of agents.
+
+        Args:
+            agents: The agents.
+
+        Returns:
+            A dictionary from field to the value of every agent.
+        """
+        return {
+            "aggressiveness": [agent.aggressiveness for agent in agents],
+            "harvest_percent": [agent.harvest_percent for agent in agents],
+            "max_memory": [agent.max_memory for agent in agents],
+            "x": [agent.pos.x for agent in agents],
+            "y": [agent.pos.y for agent in agents],
+            "calories": [agent.calories for agent in agents],
+        }
+
+    def days(self) -> List[int]:
+        """
+        Gets the stored days in order.
+        """
+        return list(self.day_list)
+
+    def column(self, field: str) -> np.ndarray:
+        """
+        Maps every stored value of an agent field, day after day.
+
+        Args:
+            field: The field to map.
+
+        Returns:
+            A read only array of the field of every agent on every day.
+        """
+        if field not in AGENT_FIELDS:
+            raise ValueError(f"Unknown agent field {field}.")
+        total = self.starts[-1] + self.counts[-1] if self.day_list else 0
+        if total == 0:
+            return np.zeros(0, dtype=AGENT_FIELDS[field])
+        return np.memmap(self.path(f"{field}.bin"), dtype=AGENT_FIELDS[field], mode="r", shape=(total,))
+
+    def field(self, field: str) -> List[np.ndarray]:
+        """
+        Gets an agent field across every stored day.
+
+        Args:
+            field: The field to get, such as "aggressiveness".
+
+        Returns:
+            The values of the field on each day, in the order of days().
+        """
+        column = self.column(field)
+        return [column[start:start + count] for start, count in zip(self.starts, self.counts)]
+
+    def population(self) -> List[int]:
+        """
+        Gets the number of agents on each stored day.
+        """
+        return list(self.counts)
+
+    def day(self, day: int) -> Dict[str, np.ndarray]:
+        """
+        Gets every agent field on one day.
+
+        Args:
+            day: The stored day to get.
+
+        Returns:
+            A dictionary from field to the values of that day.
+        """
+        i = self.day_list.index(day)
+        start, count = self.starts[i], self.counts[i]
+        return {field: np.array(self.column(field)[start:start + count]) for field in AGENT_FIELDS}
+
+    def static(self) -> Dict[str, np.ndarray]:
+        """
+        Gets the columns of the caves and bushes, such as "cave_x" or "bush_max_calories".
+        """
+        with np.load(self.path("static.npz")) as static:
+            return {name: static[name] for name in static.files}
+
+    def to_json(self, day: int):
+        """
+        Rebuilds the JSON form of a world from one stored day, as written by World.to_json.
+
+        Args:
+            day: The stored day to rebuild.
+
+        Returns:
+            The JSON serializable checkpoint.
+        """
+        static = self.static()
+        agents = self.day(day)
+        return {
+            "caves": [
+                {field: static[f"cave_{field}"][i].item() for field in CAVE_FIELDS}
+                for i in range(len(static["cave_x"]))
+            ],
+            "bushes": [
+                {field: static[f"bush_{field}"][i].item() for field in BUSH_FIELDS}
+                for i in range(len(static["bush_x"]))
+            ],
+            "agents": [
+                {field: agents[field][i].item() for field in ("max_memory", "aggressiveness", "harvest_percent", "x", "y")}
+                for i in range(len(agents["x"]))
+            ],
+        }
+
+    @staticmethod
+    def from_json_checkpoints(checkpoints: Path, directory: Path = None) -> "CheckpointStore":
+        """
+        Imports a directory of checkpoint_{day}.json(.gz) files. The caves and bushes are taken from the
+        first checkpoint, and calories, which the JSON checkpoints do not hold, are stored as NaN.
+
+        Args:
+            checkpoints: The directory of JSON checkpoints.
+            directory: The directory to write the store in, defaults to the checkpoints directory.
+
+        Returns:
+            The new store.
+        """
+        days = list(json_checkpoint_files(checkpoints))
+        store = CheckpointStore(directory or checkpoints)
+        store.clear()
+        for i, day in enumerate(days):
+            data = load_json_checkpoint(checkpoints, day)
+            if i == 0:
+                store.write_static(data["caves"], data["bushes"])
+            store.append(
+                day,
+                {
+                    field: [agent[field] for agent in data["agents"]]
+                    for field in ("aggressiveness", "harvest_percent", "max_memory", "x", "y")
+                },
+            )
+        return store
+
+
+if __name__ == "__main__":
+    args = ArgumentParser("Converts a directory of JSON checkpoints to a columnar checkpoint store")
+    args.add_argument("checkpoints", help="The directory of checkpoint_{day}.json files.")
+    args.add_argument("--out", help="The directory to write the store in, defaults to the checkpoints directory.")
+    args = args.parse_args()
+    store = CheckpointStore.from_json_checkpoints(Path(args.checkpoints), args.out and Path(args.out))
+    print(f"Imported {len(store.days())} days")
@@ -0,0 +1,134 @@
+from queue import Queue
+from threading import Thread
+from typing import Any, Callable
+import time
+
+
+class CheckpointWriter:
+    """
+    Writes checkpoints on a background thread so the step loop only pays for taking a snapshot.
+    Snapshots wait in a bounded queue, so if writing falls behind the step loop blocks rather than
+    holding an unbounded number of snapshots. With a queue size of 0 checkpoints are written in
+    the step loop as before.
+    """
+
+    def __init__(self, write: Callable[[int, Any], None], queue_size: int) -> None:
+        """
+        Initializes the writer and starts its thread.
+
+        Args:
+            write: Writes the snapshot of a day, called with the day and the snapshot.
+            queue_size: The most snapshots waiting to be written, 0 to write synchronously.
+        """
+        self.write = write
+        self.queue_size = queue_size
+        self.queue: Queue = Queue(queue_size) if queue_size > 0 else None
+        self.error: BaseException = None
+        # Reported costs
+        self.checkpoints = 0
+        self.snapshot_seconds = 0.0
+        self.write_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_depth = 0
+        self.thread = None
+        if self.queue is not None:
+            self.thread = Thread(target=self.work, name="checkpoint-writer", daemon=True)
+            self.thread.start()
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of snapshots waiting to be written.
+        """
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def submit(self, day: int, snapshot: Callable[[], Any], write: Callable[[int, Any], None] = None):
+        """
+        Takes a snapshot and queues it to be written. Snapshots are written in the order submitted.
+
+        Args:
+            day: The day of the checkpoint.
+            snapshot: Makes an immutable copy of the state to write.
+            write: Writes this snapshot instead of the writer's own write function.
+        """
+        self.check()
+        start = time.perf_counter()
+        data = snapshot()
+        self.snapshot_seconds += time.perf_counter() - start
+        self.checkpoints += 1
+        if self.thread is None:
+            self.timed_write(day, data, write)
+            return
+        start = time.perf_counter()
+        self.queue.put((day, data, write))
+        self.blocked_seconds += time.perf_counter() - start
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def timed_write(self, day: int, data, write: Callable[[int, Any], None] = None):
+        """
+        Writes a snapshot, adding to the time spent writing.
+
+        Args:
+            day: The day of the checkpoint.
+            data: The snapshot.
+            write: Writes the snapshot, defaults to the writer's own write function.
+        """
+        start = time.perf_counter()
+        (write or self.write)(day, data)
+        self.write_seconds += time.perf_counter() - start
+
+    def work(self):
+        """
+        Writes queued snapshots until told to stop. After a failure the rest are dropped and the
+        error is raised in the step loop.
+        """
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is None:
+                    self.timed_write(*item)
+            except BaseException as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def check(self):
+        """
+        Raises the error of a failed write, if any.
+        """
+        if self.error is not None:
+            raise RuntimeError("Writing a checkpoint failed.") from self.error
+
+    def flush(self):
+        """
+        Waits until every queued snapshot is written.
+        """
+        if self.queue is not None:
+            self.queue.join()
+        self.check()
+
+    def close(self):
+        """
+        Writes every queued snapshot and stops the thread. Safe to call more than once.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        self.check()
+
+    def report(self) -> str:
+        """
+        Describes where checkpointing spent its time. Time blocked on a full queue means writing
+        is slower than the simulation.
+        """
+        each = 1000 * self.snapshot_seconds / self.checkpoints if self.checkpoints else 0
+        return (
+            f"Checkpoints: {self.checkpoints}, "
+            f"snapshots {self.snapshot_seconds:.2f} s ({each:.1f} ms each), "
+            f"writing {self.write_seconds:.2f} s, "
+            f"blocked on full queue {self.blocked_seconds:.2f} s, "
+            f"max queue depth {self.max_depth}/{self.queue_size}"
+        )
@@ -1,8 +1,12 @@
 class Counter():
     """
-    A counter which continually counts up from 0.
+    A registry of dense integer IDs for one kind of entity, counting up from 0.
     """
-    count = 0
+    def __init__(self) -> None:
+        """
+        Initializes a counter at 0.
+        """
+        self.count = 0
 
     def get_next(self):
         """
@@ -11,5 +15,12 @@ class Counter():
         next_num = self.count
         self.count += 1
         return next_num
-    def reset(self):
-        count = 0
\ No newline at end of file
+
+    def reset(self, count: int = 0):
+        """
+        Sets the number the counter gives next.
+
+        Args:
+            count: The next number to give, 0 to start again.
+        """
+        self.count = count
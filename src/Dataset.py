@@ -0,0 +1,335 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+from CheckpointStore import CheckpointStore, AGENT_FIELDS, json_checkpoint_files, load_json_checkpoint
+import numpy as np
+import hashlib
+import json
+import os
+
+# Statistics a trajectory can be made of
+TRAJECTORY_STATS = ("mean", "std", "min", "max")
+
+
+def signature(path: Path, use_hash: bool = False):
+    """
+    Gets what a file is compared by to tell if it changed since it was ingested.
+
+    Args:
+        path: The file.
+        use_hash: Compare by content hash rather than by modification time and size.
+
+    Returns:
+        A JSON serializable signature of the file.
+    """
+    if use_hash:
+        return hashlib.sha1(path.read_bytes()).hexdigest()
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def read_checkpoint(path: Path) -> Dict[str, np.ndarray]:
+    """
+    Reads the agents of one JSON checkpoint into columns. Module level so it can be sent to worker processes.
+
+    Args:
+        path: The checkpoint file.
+
+    Returns:
+        A dictionary from field to the value of every agent, with the day in the "day" column and
+        in "checkpoint_days". Fields that JSON checkpoints do not hold, such as calories, are NaN.
+    """
+    day = int(path.name.split("_")[1].split(".")[0])
+    agents = load_json_checkpoint(path.parent, day)["agents"]
+    columns = {"checkpoint_days": np.array([day], dtype=np.int64), "day": np.full(len(agents), day, dtype=np.int64)}
+    for field, dtype in AGENT_FIELDS.items():
+        missing = np.nan if dtype == np.float64 else -1
+        columns[field] = np.array([agent.get(field, missing) for agent in agents], dtype=dtype)
+    return columns
+
+
+def read_store(checkpoints: Path) -> Dict[str, np.ndarray]:
+    """
+    Reads every day of a columnar checkpoint store.
+
+    Args:
+        checkpoints: The directory of the store.
+
+    Returns:
+        A dictionary from field to the value of every agent on every day, with the day in the "day"
+        column and every stored day in "checkpoint_days".
+    """
+    store = CheckpointStore(checkpoints)
+    days = np.array(store.days(), dtype=np.int64)
+    columns = {"checkpoint_days": days, "day": np.repeat(days, store.population())}
+    for field in AGENT_FIELDS:
+        columns[field] = np.array(store.column(field))
+    return columns
+
+
+def concatenate(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Joins blocks of agent rows and sorts them by day.
+
+    Args:
+        parts: The blocks, each a dictionary from column to values as returned by read_checkpoint.
+
+    Returns:
+        The joined columns.
+    """
+    names = ["day"] + list(AGENT_FIELDS)
+    columns = {
+        name: np.concatenate([part[name] for part in parts] + [np.zeros(0, dtype=AGENT_FIELDS.get(name, np.int64))])
+        for name in names
+    }
+    order = np.argsort(columns["day"], kind="stable")
+    columns = {name: values[order] for name, values in columns.items()}
+    columns["checkpoint_days"] = np.unique(
+        np.concatenate([part["checkpoint_days"] for part in parts] + [np.zeros(0, dtype=np.int64)])
+    )
+    return columns
+
+
+def ingest(projects: List[Path], cache: Path, workers: int = None, use_hash: bool = False) -> Dict[str, int]:
+    """
+    Adds the checkpoints of many projects to a cached dataset. Only checkpoints that are new or
+    changed since the last ingest are read, and those from every project are read together across
+    a pool of processes. Each project is stored in the cache under its directory name.
+
+    Args:
+        projects: The project directories, each with a checkpoints directory and usually a params.json.
+        cache: The directory of the dataset.
+        workers: The number of processes, defaults to the number of cores.
+        use_hash: Tell changed checkpoints by content hash rather than by modification time and size.
+
+    Returns:
+        The number of checkpoints read for each project.
+    """
+    cache.mkdir(parents=True, exist_ok=True)
+    manifest_path = cache.joinpath("manifest.json")
+    manifest = {}
+    if manifest_path.exists():
+        with manifest_path.open("r") as f:
+            manifest = json.load(f)
+    plans = {}
+    to_read: List[Path] = []
+    for project in projects:
+        name = project.name
+        checkpoints = project.joinpath("checkpoints")
+        old = manifest.get(name, {}).get("files", {})
+        if not cache.joinpath(f"{name}.npz").exists():
+            old = {}
+        if checkpoints.joinpath("index.npz").exists():
+            # A columnar store is cheap to read whole, so it is only compared as a whole
+            files = {"store": signature(checkpoints.joinpath("index.npz"), use_hash)}
+            plans[name] = (files, [], files != old)
+            continue
+        paths = json_checkpoint_files(checkpoints)
+        files = {str(day): signature(path, use_hash) for day, path in paths.items()}
+        keep = [int(day) for day, sig in files.items() if old.get(day) == sig]
+        changed = [path for day, path in paths.items() if old.get(str(day)) != files[str(day)]]
+        plans[name] = (files, keep, False)
+        to_read.extend(changed)
+    read: Dict[Path, Dict[str, np.ndarray]] = {}
+    if to_read:
+        with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+            read = dict(zip(to_read, pool.map(read_checkpoint, to_read, chunksize=8)))
+    counts = {}
+    for project in projects:
+        name = project.name
+        files, keep, reread_store = plans[name]
+        checkpoints = project.joinpath("checkpoints")
+        new_parts = [columns for path, columns in read.items() if path.parent == checkpoints]
+        counts[name] = len(new_parts) + (len(CheckpointStore(checkpoints).days()) if reread_store else 0)
+        if "store" in files:
+            if not reread_store:
+                continue
+            columns = read_store(checkpoints)
+        else:
+            if not new_parts and len(keep) == len(manifest.get(name, {}).get("files", {})):
+                continue
+            parts = new_parts
+            if keep:
+                with np.load(cache.joinpath(f"{name}.npz")) as old:
+                    kept = np.isin(old["day"], keep)
+                    part = {column: old[column][kept] for column in old.files if column != "checkpoint_days"}
+                    part["checkpoint_days"] = np.array(keep, dtype=np.int64)
+                    parts = [part] + parts
+            columns = concatenate(parts)
+        np.savez(cache.joinpath(f"{name}.npz"), **columns)
+        params = {}
+        if project.joinpath("params.json").exists():
+            with project.joinpath("params.json").open("r") as f:
+                params = json.load(f)
+        manifest[name] = {"project": str(project), "files": files, "params": params}
+    with manifest_path.open("wt+") as f:
+        json.dump(manifest, f, indent=2)
+    return counts
+
+
+class Dataset:
+    """
+    The agents of many experiments, stored as columns sorted by day for each experiment, with
+    queries for per day statistics that compare experiments side by side.
+    """
+
+    def __init__(self, experiments: Dict[str, Dict[str, np.ndarray]], params: Dict[str, dict]) -> None:
+        """
+        Initializes a dataset.
+
+        Args:
+            experiments: For each experiment, a dictionary from column to the value of every agent
+                         on every day, sorted by the "day" column, and every checkpointed day in
+                         "checkpoint_days".
+            params: The params.json of each experiment.
+        """
+        self.experiments = experiments
+        self.params = params
+        # Where each day's rows start in each experiment and how many there are
+        self.index = {}
+        for name, columns in experiments.items():
+            days = columns["checkpoint_days"]
+            starts = np.searchsorted(columns["day"], days, "left")
+            self.index[name] = (days, starts, np.searchsorted(columns["day"], days, "right") - starts)
+
+    @staticmethod
+    def load(cache: Path, experiments: List[str] = None) -> "Dataset":
+        """
+        Loads an ingested dataset.
+
+        Args:
+            cache: The directory of the dataset.
+            experiments: The experiments to load, defaults to all.
+
+        Returns:
+            The dataset.
+        """
+        with cache.joinpath("manifest.json").open("r") as f:
+            manifest = json.load(f)
+        names = experiments if experiments is not None else list(manifest)
+        data = {}
+        for name in names:
+            with np.load(cache.joinpath(f"{name}.npz")) as columns:
+                data[name] = {column: columns[column] for column in columns.files}
+        return Dataset(data, {name: manifest[name]["params"] for name in names})
+
+    def names(self) -> List[str]:
+        """
+        Gets the name of every experiment.
+        """
+        return list(self.experiments)
+
+    def days(self, experiment: str) -> np.ndarray:
+        """
+        Gets the days stored for an experiment.
+
+        Args:
+            experiment: The name of the experiment.
+        """
+        return self.index[experiment][0]
+
+    def population(self, experiment: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the population of every day of an experiment.
+
+        Args:
+            experiment: The name of the experiment.
+
+        Returns:
+            The days and the population of each.
+        """
+        days, _, counts = self.index[experiment]
+        return days, counts
+
+    def agents(self, experiment: str, day: int) -> Dict[str, np.ndarray]:
+        """
+        Gets every agent of one day of an experiment.
+
+        Args:
+            experiment: The name of the experiment.
+            day: The day.
+
+        Returns:
+            A dictionary from field to the value of every agent alive that day.
+        """
+        days, starts, counts = self.index[experiment]
+        i = np.searchsorted(days, day)
+        if i == len(days) or days[i] != day:
+            raise KeyError(f"{experiment} has no day {day}.")
+        rows = slice(starts[i], starts[i] + counts[i])
+        return {field: self.experiments[experiment][field][rows] for field in AGENT_FIELDS}
+
+    def trajectory(self, experiment: str, field: str, stat: str = "mean") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets a statistic of an agent field on every day of an experiment.
+
+        Args:
+            experiment: The name of the experiment.
+            field: The field, such as "aggressiveness".
+            stat: One of TRAJECTORY_STATS.
+
+        Returns:
+            The days and the statistic of each. Days with too few agents have NaN.
+        """
+        days, starts, counts = self.index[experiment]
+        values = self.experiments[experiment][field].astype(float)
+        result = np.full(len(days), np.nan)
+        filled = counts > 0
+        if not np.any(filled):
+            return days, result
+        # Days where every agent died have no rows, so reduce over the rest only
+        starts, counts = starts[filled], counts[filled]
+        if stat == "mean":
+            result[filled] = np.add.reduceat(values, starts) / counts
+        elif stat == "std":
+            mean = np.add.reduceat(values, starts) / counts
+            squares = np.add.reduceat((values - np.repeat(mean, counts)) ** 2, starts)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result[filled] = np.where(counts > 1, np.sqrt(squares / (counts - 1)), np.nan)
+        elif stat == "min":
+            result[filled] = np.minimum.reduceat(values, starts)
+        elif stat == "max":
+            result[filled] = np.maximum.reduceat(values, starts)
+        else:
+            raise ValueError(f"Unknown statistic {stat}.")
+        return days, result
+
+    def side_by_side(self, field: str, stat: str = "mean", experiments: List[str] = None):
+        """
+        Lines up a statistic of an agent field across experiments.
+
+        Args:
+            field: The field, such as "aggressiveness".
+            stat: One of TRAJECTORY_STATS, or "population" to compare populations.
+            experiments: The experiments to compare, defaults to all.
+
+        Returns:
+            Every day any of the experiments has, and a row of the statistic for each experiment
+            with NaN on the days it does not have.
+        """
+        experiments = experiments if experiments is not None else self.names()
+        if stat == "population":
+            trajectories = [self.population(name) for name in experiments]
+        else:
+            trajectories = [self.trajectory(name, field, stat) for name in experiments]
+        days = np.unique(np.concatenate([d for d, _ in trajectories])) if trajectories else np.zeros(0, dtype=int)
+        table = np.full((len(experiments), len(days)), np.nan)
+        for row, (d, values) in enumerate(trajectories):
+            table[row, np.searchsorted(days, d)] = values
+        return days, table
+
+
+if __name__ == "__main__":
+    args = ArgumentParser("Ingests the checkpoints of many projects into one cached dataset")
+    args.add_argument("projects", nargs="+", help="The names of the projects to ingest.")
+    args.add_argument("--cache", default="dataset", help="The name of the dataset directory.")
+    args.add_argument("--workers", type=int, help="Number of processes to read with, defaults to the number of cores.")
+    args.add_argument("--hash", action="store_true", help="Tell changed checkpoints by content hash instead of modification time.")
+    args = args.parse_args()
+    cache = Path("../").joinpath(args.cache)
+    counts = ingest([Path("../").joinpath(p) for p in args.projects], cache, args.workers, args.hash)
+    dataset = Dataset.load(cache, list(counts))
+    for name, count in counts.items():
+        days, means = dataset.trajectory(name, "aggressiveness")
+        print(f"{name}: read {count} checkpoints, {len(days)} days, final mean aggressiveness {means[-1]:.3f}")
@@ -0,0 +1,256 @@
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Dict, List
+from RandomStreams import RNG
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+from World import World
+import matplotlib.pyplot as plt
+import numpy as np
+import json
+import os
+
+# Per day statistics recorded for every replica
+METRICS = ("population", "aggressiveness", "harvest_percent", "max_memory")
+# Two sided 95% critical values of Student's t for 1 to 30 degrees of freedom
+T_CRITICAL = (
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+)
+
+
+def run_replica(project: Path, seed: int, config: SimulationConfig = DEFAULT_CONFIG) -> Dict[str, np.ndarray]:
+    """
+    Runs one replica of the simulation and saves its exact config in its project as params.json.
+    Module level so it can be sent to worker processes.
+
+    Args:
+        project: The directory to save the replica's checkpoints in.
+        seed: The seed of the replica, replaces the seed of the config.
+        config: The config to run with.
+
+    Returns:
+        A dictionary from metric to its value at the start and the end of every day, with "stop_day"
+        and "stop_reason" if the replica stopped early. The days after an extinction have no population
+        and no genes, the days after convergence keep the last values and the days after falling under
+        the population floor are NaN.
+    """
+    config = config.replace(seed=seed)
+    RNG.reseed(seed)
+    world = World(project, [], [], [], config=config)
+    with project.joinpath("params.json").open("wt+") as f:
+        json.dump(config.to_json(), f, indent=2)
+    for t in range(config.num_days * config.steps_per_day):
+        world.step(t)
+        if world.stopped:
+            break
+    world.close()
+    summary = world.summary
+    stats = {"population": np.array(summary.population, dtype=float)}
+    for gene in METRICS[1:]:
+        stats[gene] = summary.stat(gene, "mean")
+    if world.stopped:
+        # Fill the days that were not run so that every replica covers the same days
+        missing = config.num_days + 1 - len(summary)
+        for metric in METRICS:
+            if summary.stop_reason == "converged":
+                fill = stats[metric][-1]
+            elif summary.stop_reason == "extinction" and metric == "population":
+                fill = 0
+            else:
+                fill = np.nan
+            stats[metric] = np.append(stats[metric], np.full(missing, fill))
+        stats["stop_day"] = summary.stop_day
+        stats["stop_reason"] = summary.stop_reason
+    return stats
+
+
+def t_critical(df: int) -> float:
+    """
+    Gets the two sided 95% critical value of Student's t distribution.
+
+    Args:
+        df: Degrees of freedom, at least 1.
+    """
+    return T_CRITICAL[df - 1] if df <= len(T_CRITICAL) else 1.96
+
+
+class Ensemble:
+    """
+    Runs independently seeded replicas of the same configuration across a pool of processes
+    and aggregates their per day statistics into confidence bands.
+    """
+
+    def __init__(self, project: Path, config: SimulationConfig = DEFAULT_CONFIG) -> None:
+        """
+        Initializes an ensemble with no replicas.
+
+        Args:
+            project: The directory to save the ensemble in, replicas go in subdirectories.
+            config: The config every replica runs with. Each replica's seed is spawned from the
+                    config's seed, a fresh one is drawn if it is None.
+        """
+        self.project = project
+        self.project.mkdir(exist_ok=True)
+        self.seed_sequence = np.random.SeedSequence(config.seed)
+        self.seed = self.seed_sequence.entropy
+        self.config = config.replace(seed=self.seed)
+        self.seeds: List[int] = []
+        self.results: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def next_seed(self) -> int:
+        """
+        Spawns an independent seed for the next replica.
+        """
+        child = self.seed_sequence.spawn(1)[0]
+        self.seeds.append(int(child.generate_state(1, np.uint64)[0]))
+        return self.seeds[-1]
+
+    def add(self, replica: int, stats: Dict[str, np.ndarray]):
+        """
+        Adds the statistics of a finished replica.
+
+        Args:
+            replica: The index of the replica.
+            stats: The statistics returned by run_replica.
+        """
+        self.results[replica] = stats
+
+    def band(self, metric: str):
+        """
+        Gets the mean and 95% confidence interval of a metric across replicas for every day.
+        Replicas whose population died out are left out of the gene metrics from then on.
+
+        Args:
+            metric: The metric to get.
+
+        Returns:
+            Arrays of the mean, lower bound and upper bound for each day.
+        """
+        values = np.array([self.results[r][metric] for r in sorted(self.results)], dtype=float)
+        n = np.sum(~np.isnan(values), axis=0)
+        mean = np.full(values.shape[1], np.nan)
+        half_width = np.full(values.shape[1], np.inf)
+        has_data = n > 0
+        mean[has_data] = np.nanmean(values[:, has_data], axis=0)
+        spread = n > 1
+        if np.any(spread):
+            sd = np.nanstd(values[:, spread], axis=0, ddof=1)
+            t = np.array([t_critical(df) for df in n[spread] - 1])
+            half_width[spread] = t * sd / np.sqrt(n[spread])
+        return mean, mean - half_width, mean + half_width
+
+    def width(self, metric: str) -> float:
+        """
+        Gets the widest confidence interval of a metric over the days that have any data.
+
+        Args:
+            metric: The metric to check.
+        """
+        mean, low, high = self.band(metric)
+        widths = (high - low)[~np.isnan(mean)]
+        return widths.max() if len(widths) > 0 else np.inf
+
+    def converged(self, target_width: float, metrics) -> bool:
+        """
+        Tells if every chosen metric's confidence interval is narrower than a target.
+
+        Args:
+            target_width: The widest confidence interval allowed.
+            metrics: The metrics to check.
+        """
+        return all(self.width(metric) < target_width for metric in metrics)
+
+    def run(
+        self,
+        replicas: int,
+        workers: int = None,
+        target_width: float = None,
+        metrics=("aggressiveness",),
+        max_replicas: int = 100,
+    ):
+        """
+        Runs replicas across a process pool. With a target width, keeps starting replicas as others
+        finish until the chosen metrics have converged or max_replicas have been started.
+
+        Args:
+            replicas: The number of replicas to run, or the minimum with a target width.
+            workers: The number of processes, defaults to the number of cores.
+            target_width: The widest confidence interval to accept for the chosen metrics.
+            metrics: The metrics the target width applies to.
+            max_replicas: The most replicas to run with a target width.
+        """
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(workers) as pool:
+            running = {}
+
+            def start():
+                replica = len(self.seeds)
+                seed = self.next_seed()
+                project = self.project.joinpath(f"replica_{replica}")
+                running[pool.submit(run_replica, project, seed, self.config)] = replica
+
+            for _ in range(replicas if target_width is None else min(replicas, workers)):
+                start()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.add(running.pop(future), future.result())
+                if target_width is None:
+                    continue
+                finished = len(self.results) >= replicas and self.converged(target_width, metrics)
+                while not finished and len(running) < workers and len(self.seeds) < max(replicas, max_replicas):
+                    start()
+        self.save()
+
+    def save(self):
+        """
+        Saves the seeds and per day statistics of every replica.
+        """
+        with self.project.joinpath("ensemble.json").open("wt+") as f:
+            json.dump(
+                {
+                    "seed": self.seed,
+                    "replica_seeds": self.seeds,
+                    "replicas": {
+                        str(r): {metric: self.results[r][metric].tolist() for metric in METRICS}
+                        for r in sorted(self.results)
+                    },
+                    "stopped": {
+                        str(r): {"day": self.results[r]["stop_day"], "reason": self.results[r]["stop_reason"]}
+                        for r in sorted(self.results) if "stop_reason" in self.results[r]
+                    },
+                },
+                f,
+                indent=2,
+            )
+
+    def plot(self, metric: str, file_name: str, title: str, ylabel: str):
+        """
+        Plots the mean of a metric across replicas with its confidence band.
+
+        Args:
+            metric: The metric to plot.
+            file_name: The file to save the plot in.
+            title: The title of the plot.
+            ylabel: The label of the Y axis.
+        """
+        mean, low, high = self.band(metric)
+        days = np.arange(len(mean))
+        plt.plot(days, mean, label=f"mean over {len(self.results)} replicas", color="black")
+        plt.fill_between(days, low, high, alpha=0.5, label="95% confidence interval")
+        plt.legend()
+        plt.xlabel("Checkpoint Day")
+        plt.ylabel(ylabel)
+        plt.title(title)
+        plt.savefig(self.project.joinpath(file_name), format="pdf")
+        plt.close()
+
+    def plot_all(self):
+        """
+        Makes the aggressiveness, memory, harvest percentage and population plots.
+        """
+        self.plot("aggressiveness", "Aggressiveness_Evolution.pdf", "Evolution of Aggressiveness via Mean", "Aggressiveness Value")
+        self.plot("max_memory", "Memory_Evolution.pdf", "Evolution of Memory via Mean", "Memory Value")
+        self.plot("harvest_percent", "Harvest_Percentage_Evolution.pdf", "Evolution of Harvest Percentage via Mean", "Harvest Percentage")
+        self.plot("population", "Total Population across Checkpoints.pdf", "Total Population across Checkpoints", "Total Population")
@@ -0,0 +1,485 @@
+from ActionSpace import ActionSpace
+from ActiveSet import phase_of
+from Agent import Agent
+from BerryBush import BerryBush
+from Cave import Cave
+from Position import Position, clamp_many, distance_many
+from RandomStreams import RNG
+from typing import List
+import numpy as np
+import heapq
+import math
+
+# What an agent is doing between its events
+IDLE = 0
+WANDER = 1
+GOTO = 2
+CHASE = 3
+
+
+class EventEngine:
+    """
+    Steps a world by only waking agents when something can happen to them. An agent walking to a
+    bush, a cave or its wander spot moves in a straight line, so the tick it arrives is worked out
+    up front and the tick it gets bored is drawn as a geometric variable. The agent is then left
+    alone in a priority queue until the first of those ticks, or until a new phase of the day starts.
+    Its position in between is interpolated whenever another agent looks at it, and the calories of
+    walking are added in bulk when it wakes. Only agents chasing another agent are stepped every tick.
+
+    Like the array engine this is not the same run as the object engine: the draws happen at
+    different times, and agents see the others where they were at the start of the step.
+    """
+
+    def __init__(self, world) -> None:
+        """
+        Initializes the engine with the state of a world.
+
+        Args:
+            world: The world to step.
+        """
+        self.world = world
+        self.config = world.config
+        c = self.config
+        if 2 * c.interaction_radius <= c.distance_per_step:
+            raise ValueError("The event engine needs interaction_radius above half of distance_per_step.")
+        # Ticks where a new phase of the day starts
+        self.boundaries = [
+            t for t in range(1, c.steps_per_day) if phase_of(t, c) != phase_of(t - 1, c)
+        ]
+        # Number of agent events handled, for comparing with the agent steps of the other engines
+        self.events = 0
+        self.reload()
+
+    def reload(self):
+        """
+        Forgets every plan and takes the world's agents as they are. Must be called whenever the list
+        of agents changes. The agents are planned on the next step, so that no random draws are made
+        between a day ending and the next one starting.
+        """
+        self.agents: List[Agent] = list(self.world.agents)
+        self.index = {agent: i for i, agent in enumerate(self.agents)}
+        n = len(self.agents)
+        # Where each agent was when its plan started and which way it is walking
+        self.x0 = np.array([agent.pos.x for agent in self.agents], dtype=float)
+        self.y0 = np.array([agent.pos.y for agent in self.agents], dtype=float)
+        self.ux = np.zeros(n)
+        self.uy = np.zeros(n)
+        self.t0 = np.zeros(n, dtype=np.int64)
+        # Touched one agent at a time, so kept as lists rather than arrays
+        self.plan = [IDLE] * n
+        self.due = [None] * n
+        self.arrive = [None] * n
+        self.bored = [None] * n
+        self.queue = []
+        self.planned = False
+        self.tick = 0
+        # The step the agents were last sorted by cell for, None when they are not
+        self.seen_at = None
+
+    def sync(self):
+        """
+        Moves every walking or chasing agent to where it is at the end of the day and adds the calories
+        of walking.
+        """
+        end = self.config.steps_per_day
+        for i in range(len(self.agents)):
+            if self.plan[i] in (WANDER, GOTO):
+                self.settle(i, end, end - int(self.t0[i]))
+                self.plan[i] = IDLE
+            elif self.plan[i] == CHASE:
+                self.agents[i].pos = Position(self.x0[i], self.y0[i], self.config)
+                self.plan[i] = IDLE
+                self.due[i] = None
+        self.queue = []
+        self.seen_at = None
+
+    def close(self):
+        """
+        Stops the engine, which holds nothing that needs stopping.
+        """
+
+    def positions(self):
+        """
+        Gets the X and Y coordinates of every agent after the current step.
+        """
+        return self.positions_at(self.tick + 1)
+
+    def active_count(self) -> int:
+        """
+        Gets the number of agents awake, which the world's active set keeps track of.
+        """
+        return len(self.world.active)
+
+    def positions_at(self, timestep: int):
+        """
+        Gets where every agent is at the start of a step, interpolating the walking agents.
+
+        Args:
+            timestep: The step of the day.
+        """
+        # Agents planned from the next step on have not started walking yet
+        steps = np.maximum(timestep - self.t0, 0) * self.config.distance_per_step
+        return clamp_many(self.x0 + self.ux * steps, self.y0 + self.uy * steps, self.config)
+
+    def position_of(self, i: int, timestep: int) -> Position:
+        """
+        Gets where one agent is at the start of a step.
+
+        Args:
+            i: The index of the agent.
+            timestep: The step of the day.
+        """
+        d = max(timestep - int(self.t0[i]), 0) * self.config.distance_per_step
+        return Position(self.x0[i] + self.ux[i] * d, self.y0[i] + self.uy[i] * d, self.config)
+
+    def sight(self, timestep: int):
+        """
+        Works out where every agent is at the start of a step and sorts the agents by cell, in cells
+        as wide as the vision radius, so an agent looking around only checks the cells next to its own.
+        Done once per step, agents whose plan changes later in the step are marked by place.
+
+        Args:
+            timestep: The step of the day.
+        """
+        self.seen_at = timestep
+        self.sx, self.sy = self.positions_at(timestep)
+        self.width = int(self.config.map_size / self.config.vision_radius) + 1
+        self.cells = self.cell_of(self.sx, self.sy)
+        # Agents of a column of cells are next to each other, so the cells around an agent are three slices
+        self.by_cell = np.argsort(self.cells, kind="stable")
+        self.cell_starts = np.searchsorted(self.cells[self.by_cell], np.arange(self.width * self.width + 1)).tolist()
+        # Agents placed since, and those of them now in another cell, which everyone checks
+        self.placed = {}
+        self.moved = np.empty(0, dtype=np.int64)
+        self.has_moved = np.zeros(len(self.agents), dtype=bool)
+
+    def cell_of(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Gets the cells positions fall in, numbered column by column.
+
+        Args:
+            x: The X coordinates.
+            y: The Y coordinates.
+        """
+        vision = self.config.vision_radius
+        return (x / vision).astype(np.int64) * self.width + (y / vision).astype(np.int64)
+
+    def place(self, i: int):
+        """
+        Marks an agent whose plan changed, to be moved to where it now is at the start of the sorted
+        step the next time someone looks around.
+
+        Args:
+            i: The index of the agent.
+        """
+        # Positions of an earlier step are worked out again before anyone looks at them
+        if self.seen_at == self.tick:
+            self.placed[i] = None
+
+    def near(self, x: float, y: float) -> np.ndarray:
+        """
+        Gets the agents that may be within the vision radius of a position on the sorted step.
+
+        Args:
+            x: The X coordinate of the position.
+            y: The Y coordinate of the position.
+
+        Returns:
+            The indices of the agents in the cell of the position and the eight cells around it, and of
+            the agents that moved to another cell since the step was sorted, in index order.
+        """
+        if self.placed:
+            # The same as positions_at, for the agents placed since the last look
+            placed = np.fromiter(self.placed, dtype=np.int64, count=len(self.placed))
+            self.placed = {}
+            steps = np.maximum(self.seen_at - self.t0[placed], 0) * self.config.distance_per_step
+            self.sx[placed], self.sy[placed] = clamp_many(
+                self.x0[placed] + self.ux[placed] * steps, self.y0[placed] + self.uy[placed] * steps, self.config
+            )
+            moved = placed[self.cell_of(self.sx[placed], self.sy[placed]) != self.cells[placed]]
+            moved = moved[~self.has_moved[moved]]
+            self.has_moved[moved] = True
+            self.moved = np.concatenate([self.moved, moved])
+        vision = self.config.vision_radius
+        width = self.width
+        starts = self.cell_starts
+        cx, cy = int(x / vision), int(y / vision)
+        first, last = max(cy - 1, 0), min(cy + 1, width - 1)
+        parts = [
+            self.by_cell[starts[column * width + first]:starts[column * width + last + 1]]
+            for column in range(max(cx - 1, 0), min(cx + 2, width))
+        ]
+        parts.append(self.moved)
+        near = np.sort(np.concatenate(parts))
+        # Agents that moved can also be in the slice of their old cell
+        return near[np.concatenate(([True], near[1:] != near[:-1]))] if len(self.moved) else near
+
+    def step(self, timestep: int):
+        """
+        Handles every event due on a step.
+
+        Args:
+            timestep: The current timestep for the day
+        """
+        self.tick = timestep
+        if not self.planned:
+            self.planned = True
+            for i in range(len(self.agents)):
+                self.plan_next(i, timestep)
+        while self.queue and self.queue[0][0] <= timestep:
+            due, i = heapq.heappop(self.queue)
+            # Skips events replaced by a newer plan
+            if self.due[i] == due:
+                self.due[i] = None
+                self.events += 1
+                self.handle(i, timestep)
+
+    def schedule(self, i: int, timestep: int):
+        """
+        Queues the next event of an agent, at the latest when the next phase starts.
+
+        Args:
+            i: The index of the agent.
+            timestep: The step of the event.
+        """
+        start = self.t0[i]
+        for boundary in self.boundaries:
+            if start < boundary < timestep:
+                timestep = boundary
+                break
+        self.due[i] = timestep
+        heapq.heappush(self.queue, (timestep, i))
+
+    def settle(self, i: int, timestep: int, steps: int):
+        """
+        Moves an agent to the end of the steps it walked since its plan started, adds their calories
+        and makes it stand still from a step on.
+
+        Args:
+            i: The index of the agent.
+            timestep: The step the agent stands still from.
+            steps: The number of steps walked.
+        """
+        agent = self.agents[i]
+        if steps > 0:
+            agent.pos = self.position_of(i, int(self.t0[i]) + steps)
+            agent.calories_burned_for_exercise += steps * self.config.walk_cal_cost
+        self.stand(i, timestep)
+
+    def stand(self, i: int, timestep: int):
+        """
+        Makes an agent stand still where it is from a step on.
+
+        Args:
+            i: The index of the agent.
+            timestep: The step the agent stands still from.
+        """
+        agent = self.agents[i]
+        self.x0[i], self.y0[i] = agent.pos.x, agent.pos.y
+        self.ux[i] = self.uy[i] = 0
+        self.t0[i] = timestep
+        self.place(i)
+
+    def walk(self, i: int, timestep: int, target: Position) -> float:
+        """
+        Starts an agent walking in a straight line toward a target from a step on.
+
+        Args:
+            i: The index of the agent.
+            timestep: The step of the first step walked.
+            target: Where the agent walks to.
+
+        Returns:
+            The distance to the target.
+        """
+        self.stand(i, timestep)
+        dx, dy = target.x - self.x0[i], target.y - self.y0[i]
+        distance = math.sqrt(dx * dx + dy * dy)
+        if distance > 0:
+            self.ux[i], self.uy[i] = dx / distance, dy / distance
+            self.place(i)
+        return distance
+
+    def plan_next(self, i: int, timestep: int):
+        """
+        Plans what an agent does from a step on, based on its action state.
+
+        Args:
+            i: The index of the agent.
+            timestep: The step the plan starts on.
+        """
+        agent = self.agents[i]
+        if agent.action_state == ActionSpace.Wander:
+            self.plan_wander(i, timestep)
+        elif agent.action_state == ActionSpace.GoTo and type(agent.goal) is Agent:
+            # Goals that move are walked to one step at a time
+            self.plan[i] = CHASE
+            self.stand(i, timestep)
+            self.schedule(i, timestep)
+        elif agent.action_state == ActionSpace.GoTo:
+            self.plan_goto(i, timestep)
+        else:
+            self.plan[i] = IDLE
+            self.stand(i, timestep)
+
+    def plan_wander(self, i: int, timestep: int):
+        """
+        Plans a wandering agent's walk to its wander spot, picking one if it has none.
+
+        Args:
+            i: The index of the agent.
+            timestep: The step the walk starts on.
+        """
+        agent = self.agents[i]
+        c = self.config
+        if agent.wander_spot is None:
+            agent.wander_spot = agent.pos.get_pos_within_radius(c.vision_radius)
+        distance = self.walk(i, timestep, agent.wander_spot)
+        # Agents check if they reached the spot after each step, so always take at least one
+        steps = int((distance - c.interaction_radius) // c.distance_per_step) + 1 if distance >= c.interaction_radius else 1
+        self.plan[i] = WANDER
+        self.arrive[i] = timestep + steps - 1
+        self.schedule(i, self.arrive[i])
+
+    def plan_goto(self, i: int, timestep: int):
+        """
+        Plans an agent's walk to a goal that does not move, drawing when it gets bored on the way.
+
+        Args:
+            i: The index of the agent.
+            timestep: The step the walk starts on.
+        """
+        agent = self.agents[i]
+        c = self.config
+        distance = self.walk(i, timestep, agent.goal.pos)
+        # Agents check if they reached the goal before each step
+        steps = int((distance - c.interaction_radius) // c.distance_per_step) + 1 if distance >= c.interaction_radius else 0
+        # Each step walked has the same chance of getting bored after it
+        bored = RNG.geometric(c.chance_to_get_bored)
+        self.plan[i] = GOTO
+        self.arrive[i] = timestep + steps
+        self.bored[i] = timestep + bored if bored <= steps else None
+        self.schedule(i, self.arrive[i] if self.bored[i] is None else self.bored[i])
+
+    def handle(self, i: int, timestep: int):
+        """
+        Has an agent do what it planned to do on a step.
+
+        Args:
+            i: The index of the agent.
+            timestep: The current timestep for the day
+        """
+        agent = self.agents[i]
+        plan = self.plan[i]
+        walked = timestep - int(self.t0[i])
+        if plan == WANDER and timestep == self.arrive[i]:
+            # Reached the spot with this step, set up goal for next action
+            self.settle(i, timestep + 1, walked + 1)
+            agent.wander_spot = None
+            agent.choose_goal(self.view(i, timestep), timestep, known=self.knows)
+            self.plan_next(i, timestep + 1)
+        elif plan == WANDER:
+            # A new phase, carry on to the same spot
+            self.settle(i, timestep, walked)
+            self.plan_wander(i, timestep)
+        elif plan == GOTO and timestep == self.bored[i]:
+            # Got bored on the way after the last step, wander from now on
+            self.settle(i, timestep, walked)
+            agent.goal = None
+            agent.action_state = ActionSpace.Wander
+            self.plan_wander(i, timestep)
+        elif plan == GOTO and timestep == self.arrive[i]:
+            self.settle(i, timestep + 1, walked)
+            self.interact_goal(i, timestep)
+        elif plan == GOTO:
+            # A new phase, draw again for the rest of the way
+            self.settle(i, timestep, walked)
+            self.plan_goto(i, timestep)
+        elif plan == CHASE:
+            self.chase(i, timestep)
+
+    def chase(self, i: int, timestep: int):
+        """
+        Has an agent take one step toward the agent it is going to, or interact with it if in reach.
+
+        Args:
+            i: The index of the agent.
+            timestep: The current timestep for the day
+        """
+        agent = self.agents[i]
+        c = self.config
+        target = self.position_of(self.index[agent.goal], timestep)
+        # The agent's own position is kept in the arrays until the chase ends
+        x, y = float(self.x0[i]), float(self.y0[i])
+        dx, dy = target.x - x, target.y - y
+        distance = math.sqrt(dx * dx + dy * dy)
+        if distance < c.interaction_radius:
+            agent.pos = Position(x, y, c)
+            self.interact_goal(i, timestep)
+            return
+        # The same step as Position.step_toward
+        scale = c.distance_per_step / (distance + 1e-4)
+        self.x0[i] = min(max(x + dx * scale, 0), c.map_size)
+        self.y0[i] = min(max(y + dy * scale, 0), c.map_size)
+        self.t0[i] = timestep + 1
+        self.place(i)
+        agent.calories_burned_for_exercise += c.walk_cal_cost
+        if RNG.random() < c.chance_to_get_bored:
+            agent.pos = Position(self.x0[i], self.y0[i], c)
+            agent.goal = None
+            agent.action_state = ActionSpace.Wander
+            self.plan_wander(i, timestep + 1)
+        else:
+            self.schedule(i, timestep + 1)
+
+    def interact_goal(self, i: int, timestep: int):
+        """
+        Has an agent interact with the goal it reached and plans everyone whose state changed.
+
+        Args:
+            i: The index of the agent.
+            timestep: The current timestep for the day
+        """
+        agent = self.agents[i]
+        goal = agent.goal
+        occupants = set(goal.occupants) if type(goal) is Cave else set()
+        agent.interact_goal()
+        self.plan_next(i, timestep + 1)
+        if type(goal) is Cave:
+            # A rival kicked out of the cave wakes up
+            for rival in sorted(occupants - goal.occupants, key=lambda occupant: occupant.id):
+                self.plan_next(self.index[rival], timestep + 1)
+
+    def knows(self, entity) -> bool:
+        """
+        Says if an entity is still in the world, agents that died are not.
+
+        Args:
+            entity: The entity to check.
+        """
+        return type(entity) is not Agent or entity in self.index
+
+    def view(self, i: int, timestep: int) -> dict:
+        """
+        Gets what an agent sees, split by kind. Only the kinds wanted at this time of day are looked for.
+
+        Args:
+            i: The index of the agent.
+            timestep: The current timestep for the day
+        """
+        agent = self.agents[i]
+        c = self.config
+        cx, cy = int(agent.pos.x / c.vision_radius), int(agent.pos.y / c.vision_radius)
+        view = {}
+        for kind in Agent.goal_kinds(timestep, c):
+            if kind is Agent:
+                if self.seen_at != timestep:
+                    self.sight(timestep)
+                near = self.near(agent.pos.x, agent.pos.y)
+                # In index order, as if every agent were checked
+                seen = near[distance_many(self.sx[near], self.sy[near], agent.pos.x, agent.pos.y) < c.vision_radius]
+                view[kind] = [self.agents[j] for j in seen.tolist() if j != i]
+                continue
+            nearby = self.world.bush_zones[cx][cy] if kind is BerryBush else self.world.cave_zones[cx][cy]
+            view[kind] = [entity for entity in nearby if agent.pos.distance_to(entity.pos) < c.vision_radius]
+        return view
@@ -0,0 +1,208 @@
+from pathlib import Path
+from typing import Dict, List, Tuple
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+from Summary import GENES
+import numpy as np
+import os
+import re
+
+
+class FrameRecorder:
+    """
+    Records a run for Render.py to animate after it is done, so the run goes at full speed instead
+    of waiting on matplotlib. The caves and bushes are written once to static.npz. Every step keeps
+    a float32 copy of each agent's position, and at the end of a day the day's positions and the
+    day end gene histograms go to day_{day}.npz, written by the world's checkpoint writer.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """
+        Opens the recording in a directory, creating it if needed.
+
+        Args:
+            directory: The directory the recording's files are in.
+        """
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.x: List[np.ndarray] = []
+        self.y: List[np.ndarray] = []
+
+    def path(self, name: str) -> Path:
+        """
+        Gets the path of one of the recording's files.
+
+        Args:
+            name: The file name.
+        """
+        return self.directory.joinpath(name)
+
+    def days(self) -> List[int]:
+        """
+        Gets the recorded days, in order.
+        """
+        return sorted(int(match.group(1)) for name in os.listdir(self.directory)
+                      if (match := re.fullmatch(r"day_(\d+)\.npz", name)))
+
+    def clear(self):
+        """
+        Removes every recorded day.
+        """
+        self.truncate(-1)
+
+    def truncate(self, day: int):
+        """
+        Removes the days recorded after a day, such as when resuming a run from that day.
+
+        Args:
+            day: The last day to keep.
+        """
+        for recorded in self.days():
+            if recorded > day:
+                self.path(f"day_{recorded}.npz").unlink()
+        self.x, self.y = [], []
+
+    def write_static(self, caves: List[dict], bushes: List[dict], edges: Dict[str, np.ndarray],
+                     config: SimulationConfig = DEFAULT_CONFIG):
+        """
+        Writes what does not change during the run.
+
+        Args:
+            caves: The JSON form of every cave.
+            bushes: The JSON form of every bush.
+            edges: The bin edges of the histogram of each gene.
+            config: The config of the run.
+        """
+        np.savez(
+            self.path("static.npz"),
+            cave_x=np.array([cave["x"] for cave in caves], dtype=np.float32),
+            cave_y=np.array([cave["y"] for cave in caves], dtype=np.float32),
+            bush_x=np.array([bush["x"] for bush in bushes], dtype=np.float32),
+            bush_y=np.array([bush["y"] for bush in bushes], dtype=np.float32),
+            map_size=np.array(config.map_size),
+            steps_per_day=np.array(config.steps_per_day),
+            **{f"{gene}_edges": edges[gene] for gene in GENES},
+        )
+
+    def record(self, x, y):
+        """
+        Keeps the positions of the agents on a step.
+
+        Args:
+            x: The X coordinate of every agent.
+            y: The Y coordinate of every agent.
+        """
+        self.x.append(np.asarray(x, dtype=np.float32))
+        self.y.append(np.asarray(y, dtype=np.float32))
+
+    def take(self, histograms: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Takes the positions kept since the last day and starts the next day.
+
+        Args:
+            histograms: The day end count of agents in each bin of each gene.
+
+        Returns:
+            The day's arrays, ready for write.
+        """
+        day = {
+            "count": np.array([len(x) for x in self.x], dtype=np.int32),
+            "x": np.concatenate(self.x + [np.empty(0, dtype=np.float32)]),
+            "y": np.concatenate(self.y + [np.empty(0, dtype=np.float32)]),
+            **{f"{gene}_hist": np.asarray(histograms[gene], dtype=np.int32) for gene in GENES},
+        }
+        self.x, self.y = [], []
+        return day
+
+    def write(self, day: int, frames: Dict[str, np.ndarray]):
+        """
+        Writes the frames of a day taken by take. Can run on the checkpoint writer's thread.
+
+        Args:
+            day: The day.
+            frames: The day's arrays.
+        """
+        # Written under another name first so a day file is never half written
+        with self.path(f"day_{day}.tmp.npz").open("wb") as f:
+            np.savez(f, **frames)
+        os.replace(self.path(f"day_{day}.tmp.npz"), self.path(f"day_{day}.npz"))
+
+
+class FrameReader:
+    """
+    Reads a recording made by a FrameRecorder, one day at a time.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        """
+        Opens a recording.
+
+        Args:
+            directory: The directory the recording's files are in.
+        """
+        self.directory = directory
+        with np.load(directory.joinpath("static.npz")) as static:
+            self.static = {name: static[name] for name in static.files}
+        self.day_list = FrameRecorder(directory).days()
+        self.loaded_day: int = None
+        self.loaded: Dict[str, np.ndarray] = None
+        self.histogram_cache: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def frames(self, every: int = 1) -> List[Tuple[int, int]]:
+        """
+        Gets the frames of the recording, keeping one in every few steps.
+
+        Args:
+            every: The number of steps between kept frames.
+
+        Returns:
+            The (day, step) of each kept frame, in order.
+        """
+        frames = []
+        for day in self.day_list:
+            with np.load(self.directory.joinpath(f"day_{day}.npz")) as data:
+                frames.extend((day, step) for step in range(len(data["count"])))
+        return frames[::every]
+
+    def day(self, day: int) -> Dict[str, np.ndarray]:
+        """
+        Gets the arrays of a day, keeping the last day read in memory.
+
+        Args:
+            day: The day.
+        """
+        if self.loaded_day != day:
+            with np.load(self.directory.joinpath(f"day_{day}.npz")) as data:
+                self.loaded = {name: data[name] for name in data.files}
+                self.loaded["start"] = np.concatenate([[0], np.cumsum(self.loaded["count"])])
+            self.loaded_day = day
+        return self.loaded
+
+    def positions(self, day: int, step: int) -> np.ndarray:
+        """
+        Gets the positions of the agents on a step.
+
+        Args:
+            day: The day.
+            step: The step of the day.
+
+        Returns:
+            An array of the X and Y coordinates of every agent, one agent per row.
+        """
+        data = self.day(day)
+        start, end = data["start"][step], data["start"][step + 1]
+        return np.stack([data["x"][start:end], data["y"][start:end]], axis=1)
+
+    def histograms(self, day: int) -> Dict[str, np.ndarray]:
+        """
+        Gets the gene histograms at the end of a day.
+
+        Args:
+            day: The day.
+
+        Returns:
+            The count of agents in each bin, by gene.
+        """
+        if day not in self.histogram_cache:
+            with np.load(self.directory.joinpath(f"day_{day}.npz")) as data:
+                self.histogram_cache[day] = {gene: data[f"{gene}_hist"] for gene in GENES}
+        return self.histogram_cache[day]
@@ -0,0 +1,386 @@
+from typing import Dict, Iterable, Iterator, KeysView, List, Tuple
+from RandomStreams import RNG
+from SimulationConfig import DEFAULT_CONFIG
+import numpy as np
+
+# What is remembered about an entity, stored in MemoryBank.codes
+SEEN = 0
+SHARED = 1
+STOLE = 2
+# The value of each code, as agents and snapshots name them
+VALUES = ("", "share", "steal")
+CODES = {value: code for code, value in enumerate(VALUES)}
+
+
+def aggression_modifiers(codes: np.ndarray) -> np.ndarray:
+    """
+    Gets how much what agents remember about others scales their aggressiveness towards them, the
+    batched form of the rule in Agent.is_aggressive.
+
+    Args:
+        codes: What each agent remembers about the other, -1 where it remembers nothing.
+
+    Returns:
+        2 where the other stole, 0.5 where it was otherwise remembered and 0 for strangers.
+    """
+    return np.select([codes == STOLE, codes >= 0], [2.0, 0.5], 0.0)
+
+
+class MemoryBank:
+    """
+    The memories of a whole population in preallocated arrays. Every agent's memory is one row, used as
+    a ring of fixed capacity: keys holds which entity each slot remembers and codes what is remembered
+    about it, oldest first from the row's head. Adding a memory or forgetting the oldest one only touches
+    one slot, and an index from (row, entity) to slot makes looking a memory up O(1). Another index keeps
+    the remembered entities of each row by kind, oldest first, for agents looking for a kind of goal.
+    """
+
+    def __init__(self, width: int, rows: int = 1024) -> None:
+        """
+        Initializes an empty bank.
+
+        Args:
+            width: The most memories any row can hold, such as the top of the config's memory bounds.
+                   Grown if an agent needs more.
+            rows: The number of rows to start with, doubled whenever they run out.
+        """
+        self.width = width
+        self.keys = np.full((rows, width), -1, dtype=np.int64)
+        self.codes = np.zeros((rows, width), dtype=np.int8)
+        # The remembered entities themselves, so a memory can be turned back into an entity
+        self.entities = np.empty((rows, width), dtype=object)
+        # Touched one agent at a time, so kept as lists rather than arrays
+        self.head: List[int] = [0] * rows
+        self.size: List[int] = [0] * rows
+        self.slots: Dict[Tuple[int, int], int] = {}
+        # Dictionaries used as ordered sets of the remembered entities, by row and kind
+        self.by_kind: Dict[Tuple[int, type], Dict] = {}
+        self.kinds: Dict[type, int] = {}
+        self.free: List[int] = list(range(rows - 1, -1, -1))
+
+    def key(self, entity) -> int:
+        """
+        Gets the integer that stands for an entity, unique across kinds of entity.
+
+        Args:
+            entity: The entity.
+        """
+        kind = self.kinds.get(type(entity))
+        if kind is None:
+            kind = self.kinds[type(entity)] = len(self.kinds)
+        return entity.id * 8 + kind
+
+    def allocate(self) -> int:
+        """
+        Takes an empty row, growing the bank if there are none left.
+
+        Returns:
+            The row.
+        """
+        if not self.free:
+            rows = len(self.head)
+            self.keys = np.concatenate([self.keys, np.full((rows, self.width), -1, dtype=np.int64)])
+            self.codes = np.concatenate([self.codes, np.zeros((rows, self.width), dtype=np.int8)])
+            self.entities = np.concatenate([self.entities, np.empty((rows, self.width), dtype=object)])
+            self.head += [0] * rows
+            self.size += [0] * rows
+            self.free = list(range(2 * rows - 1, rows - 1, -1))
+        return self.free.pop()
+
+    def release(self, row: int):
+        """
+        Empties a row and makes it available to new memories.
+
+        Args:
+            row: The row to release.
+        """
+        for slot in self.order(row):
+            del self.slots[(row, int(self.keys[row, slot]))]
+        for kind in self.kinds:
+            self.by_kind.pop((row, kind), None)
+        self.entities[row] = None
+        self.head[row] = 0
+        self.size[row] = 0
+        self.free.append(row)
+
+    def widen(self, width: int):
+        """
+        Makes every row able to hold at least a number of memories.
+
+        Args:
+            width: The number of memories.
+        """
+        if width <= self.width:
+            return
+        rows = len(self.head)
+        # Unroll every ring so its oldest memory is in the first slot
+        order = (np.array(self.head)[:, None] + np.arange(self.width)) % self.width
+        pad = width - self.width
+        self.keys = np.pad(np.take_along_axis(self.keys, order, 1), ((0, 0), (0, pad)), constant_values=-1)
+        self.codes = np.pad(np.take_along_axis(self.codes, order, 1), ((0, 0), (0, pad)))
+        self.entities = np.concatenate(
+            [np.take_along_axis(self.entities, order, 1), np.empty((rows, pad), dtype=object)], axis=1
+        )
+        self.head = [0] * rows
+        self.width = width
+        self.slots = {
+            (row, int(self.keys[row, slot])): slot for row in range(rows) for slot in range(self.size[row])
+        }
+
+    def order(self, row: int) -> np.ndarray:
+        """
+        Gets the slots of a row's memories, oldest first.
+
+        Args:
+            row: The row.
+        """
+        return (self.head[row] + np.arange(self.size[row])) % self.width
+
+    def append(self, row: int, entity, key: int, code: int):
+        """
+        Adds a memory of an entity the row does not remember yet as its newest memory.
+
+        Args:
+            row: The row.
+            entity: The entity to remember.
+            key: The key of the entity.
+            code: What is remembered about it.
+        """
+        size = self.size[row]
+        if size == self.width:
+            raise OverflowError("Memory is full, forget the oldest memory first.")
+        slot = (self.head[row] + size) % self.width
+        self.keys[row, slot] = key
+        self.codes[row, slot] = code
+        self.entities[row, slot] = entity
+        self.slots[(row, key)] = slot
+        self.by_kind.setdefault((row, type(entity)), {})[entity] = None
+        self.size[row] = size + 1
+
+    def remove(self, row: int, slot: int):
+        """
+        Forgets the memory in one slot, moving the newer memories down to close the gap.
+
+        Args:
+            row: The row.
+            slot: The slot of the memory to forget.
+        """
+        del self.slots[(row, int(self.keys[row, slot]))]
+        entity = self.entities[row, slot]
+        del self.by_kind[(row, type(entity))][entity]
+        position = (slot - self.head[row]) % self.width
+        if position == 0:
+            # The oldest memory, the ring just starts one slot later
+            self.entities[row, slot] = None
+            self.head[row] = (self.head[row] + 1) % self.width
+        else:
+            order = self.order(row)
+            later = order[position + 1:]
+            self.keys[row, order[position:-1]] = self.keys[row, later]
+            self.codes[row, order[position:-1]] = self.codes[row, later]
+            self.entities[row, order[position:-1]] = self.entities[row, later]
+            self.entities[row, order[-1]] = None
+            for moved in order[position:-1]:
+                self.slots[(row, int(self.keys[row, moved]))] = int(moved)
+        self.size[row] -= 1
+
+
+# Holds the memories made outside of a world, each world moves the memories of its agents to its own bank
+BANK = MemoryBank(DEFAULT_CONFIG.memory_bounds[1])
+
+
+class Memory:
+    """
+    An agent's memory of entities, oldest first. A view of one row of a MemoryBank that reads like
+    the ordered dictionary from entity to "", "share" or "steal" it replaces.
+    """
+
+    __slots__ = ("bank", "row")
+
+    def __init__(self, items: Iterable = (), bank: MemoryBank = None) -> None:
+        """
+        Initializes a memory, optionally from existing (entity, value) pairs, oldest first.
+
+        Args:
+            items: The pairs to remember, or a dictionary of them.
+            bank: The bank to keep the memory in, defaults to the bank for memories outside of a world.
+        """
+        self.bank = bank if bank is not None else BANK
+        self.row = self.bank.allocate()
+        if hasattr(items, "items"):
+            items = items.items()
+        for entity, value in items:
+            self[entity] = value
+
+    def reserve(self, capacity: int):
+        """
+        Makes sure this memory can hold a number of memories.
+
+        Args:
+            capacity: The number of memories.
+        """
+        if capacity > self.bank.width:
+            self.bank.widen(capacity)
+
+    def release(self):
+        """
+        Gives this memory's row back to the bank. The memory must not be used afterwards.
+        """
+        self.bank.release(self.row)
+
+    def move_to(self, bank: MemoryBank) -> "Memory":
+        """
+        Moves this memory to another bank, giving its row back to its old bank.
+        The memory must not be used afterwards.
+
+        Args:
+            bank: The bank to move to.
+
+        Returns:
+            The same memories in the new bank.
+        """
+        moved = Memory(bank=bank)
+        moved.reserve(len(self))
+        for entity, value in self.items():
+            moved[entity] = value
+        self.release()
+        return moved
+
+    def __len__(self) -> int:
+        return self.bank.size[self.row]
+
+    def __contains__(self, entity) -> bool:
+        return (self.row, self.bank.key(entity)) in self.bank.slots
+
+    def code_of(self, entity) -> int:
+        """
+        Gets what is remembered about an entity.
+
+        Args:
+            entity: The entity.
+
+        Returns:
+            One of SEEN, SHARED or STOLE, or -1 if the entity is not remembered.
+        """
+        slot = self.bank.slots.get((self.row, self.bank.key(entity)))
+        return -1 if slot is None else int(self.bank.codes[self.row, slot])
+
+    def __getitem__(self, entity) -> str:
+        code = self.code_of(entity)
+        if code < 0:
+            raise KeyError(entity)
+        return VALUES[code]
+
+    def __setitem__(self, entity, value: str):
+        key = self.bank.key(entity)
+        slot = self.bank.slots.get((self.row, key))
+        if slot is None:
+            self.bank.append(self.row, entity, key, CODES[value])
+        else:
+            # Like a dictionary, remembering again keeps the memory's place
+            self.bank.codes[self.row, slot] = CODES[value]
+
+    def __delitem__(self, entity):
+        slot = self.bank.slots.get((self.row, self.bank.key(entity)))
+        if slot is None:
+            raise KeyError(entity)
+        self.bank.remove(self.row, slot)
+
+    def popitem(self, last: bool = True):
+        """
+        Forgets the newest memory, or the oldest if last is False.
+
+        Returns:
+            The entity and its value.
+        """
+        if len(self) == 0:
+            raise KeyError("Memory is empty.")
+        bank, row = self.bank, self.row
+        slot = (bank.head[row] + (len(self) - 1 if last else 0)) % bank.width
+        entity, value = bank.entities[row, slot], VALUES[bank.codes[row, slot]]
+        bank.remove(row, slot)
+        return entity, value
+
+    def __iter__(self) -> Iterator:
+        return iter(self.bank.entities[self.row, self.bank.order(self.row)].tolist())
+
+    def keys(self) -> List:
+        """
+        Gets the remembered entities, oldest first.
+        """
+        return list(self)
+
+    def items(self) -> List[Tuple]:
+        """
+        Gets the remembered entities and their values, oldest first.
+        """
+        order = self.bank.order(self.row)
+        entities = self.bank.entities[self.row, order].tolist()
+        return [(entity, VALUES[code]) for entity, code in zip(entities, self.bank.codes[self.row, order].tolist())]
+
+    def of_kind(self, kind: type) -> KeysView:
+        """
+        Gets the remembered entities of one kind.
+
+        Args:
+            kind: The class of entity.
+
+        Returns:
+            A set-like view of the remembered entities of that kind, oldest first, which changes as the memory does.
+        """
+        return self.bank.by_kind.get((self.row, kind), {}).keys()
+
+    @staticmethod
+    def from_parents_many(parents1: List["Memory"], parents2: List["Memory"], counts: List[int]) -> List["Memory"]:
+        """
+        Makes the memories of several children at once, each a random sample of both its parents'
+        memories. An entity a child samples more than once keeps the place of its first sample and the
+        value of its last. The samples of every child are drawn and written together.
+
+        Args:
+            parents1: The memory of one parent of each child.
+            parents2: The memory of the other parent of each child.
+            counts: The number of memories to sample for each child.
+
+        Returns:
+            The new memories, in the order of the parents.
+        """
+        n = len(counts)
+        if n == 0:
+            return []
+        bank = parents1[0].bank
+        bank.widen(max(counts))
+        # Every memory of both parents of each child, grouped by child
+        parents = [parent for pair in zip(parents1, parents2) for parent in pair]
+        sizes = np.array([len(parent) for parent in parents], dtype=int)
+        rows = np.repeat([parent.row for parent in parents], sizes)
+        slots = np.concatenate([bank.order(parent.row) for parent in parents] + [np.empty(0, dtype=int)])
+        owners = np.repeat(np.arange(n), sizes.reshape(-1, 2).sum(axis=1))
+        # Shuffles each child's memories and keeps its first count
+        order = np.lexsort((RNG.uniforms(len(rows)), owners))
+        rows, slots, owners = rows[order], slots[order], owners[order]
+        rank = np.arange(len(owners)) - np.searchsorted(owners, owners)
+        kept = rank < np.asarray(counts, dtype=int)[owners]
+        rows, slots, owners, rank = rows[kept], slots[kept], owners[kept], rank[kept]
+        keys = bank.keys[rows, slots]
+        # The first and last sample of each entity a child got more than once
+        group = np.lexsort((rank, keys, owners))
+        starts = np.ones(len(group), dtype=bool)
+        starts[1:] = (owners[group][1:] != owners[group][:-1]) | (keys[group][1:] != keys[group][:-1])
+        ends = np.ones(len(group), dtype=bool)
+        ends[:-1] = starts[1:]
+        first, last = group[starts], group[ends]
+        place = np.lexsort((rank[first], owners[first]))
+        first, last = first[place], last[place]
+        children = [Memory(bank=bank) for _ in range(n)]
+        child_rows = np.array([child.row for child in children])[owners[first]]
+        child_slots = np.arange(len(first)) - np.searchsorted(owners[first], owners[first])
+        bank.keys[child_rows, child_slots] = keys[first]
+        bank.codes[child_rows, child_slots] = bank.codes[rows[last], slots[last]]
+        bank.entities[child_rows, child_slots] = bank.entities[rows[first], slots[first]]
+        for child, size in zip(children, np.bincount(owners[first], minlength=n).tolist()):
+            bank.size[child.row] = size
+        bank.slots.update(zip(zip(child_rows.tolist(), keys[first].tolist()), child_slots.tolist()))
+        for row, entity in zip(child_rows.tolist(), bank.entities[child_rows, child_slots].tolist()):
+            bank.by_kind.setdefault((row, type(entity)), {})[entity] = None
+        return children
@@ -0,0 +1,140 @@
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+from Profiler import PROFILER
+import numpy as np
+
+
+class Neighbours:
+    """
+    The entities within the vision and interaction radius of a batch of sources, stored as
+    compressed sparse rows. The targets of source i are indices[ptr[i]:ptr[i + 1]].
+    """
+
+    def __init__(
+        self,
+        view_ptr: np.ndarray,
+        view_idx: np.ndarray,
+        interact_ptr: np.ndarray,
+        interact_idx: np.ndarray,
+    ) -> None:
+        """
+        Initializes the adjacency from its CSR arrays.
+
+        Args:
+            view_ptr: Row pointers of the targets within the vision radius.
+            view_idx: Target indices within the vision radius.
+            interact_ptr: Row pointers of the targets within the interaction radius.
+            interact_idx: Target indices within the interaction radius.
+        """
+        self.view_ptr = view_ptr
+        self.view_idx = view_idx
+        self.interact_ptr = interact_ptr
+        self.interact_idx = interact_idx
+
+    def __len__(self) -> int:
+        return len(self.view_ptr) - 1
+
+    def view(self, i: int) -> np.ndarray:
+        """
+        Gets the targets a source can see.
+
+        Args:
+            i: The index of the source.
+
+        Returns:
+            The target indices within the vision radius.
+        """
+        return self.view_idx[self.view_ptr[i]:self.view_ptr[i + 1]]
+
+    def interact(self, i: int) -> np.ndarray:
+        """
+        Gets the targets a source can interact with.
+
+        Args:
+            i: The index of the source.
+
+        Returns:
+            The target indices within the interaction radius.
+        """
+        return self.interact_idx[self.interact_ptr[i]:self.interact_ptr[i + 1]]
+
+    @staticmethod
+    def compute(
+        src_x: np.ndarray,
+        src_y: np.ndarray,
+        dst_x: np.ndarray,
+        dst_y: np.ndarray,
+        exclude: np.ndarray = None,
+        config: SimulationConfig = DEFAULT_CONFIG,
+    ) -> "Neighbours":
+        """
+        Finds every target within the vision and interaction radius of every source in one pass.
+        Targets are bucketed into grid cells as wide as the vision radius, so each source only
+        measures the squared distance to the targets in its own and the eight neighbouring cells.
+
+        Args:
+            src_x: The X coordinates of the sources.
+            src_y: The Y coordinates of the sources.
+            dst_x: The X coordinates of the targets.
+            dst_y: The Y coordinates of the targets.
+            exclude: For each source a target index to leave out (such as itself), or -1.
+            config: The config of the world, giving the vision radius and the interaction radius,
+                    which is no larger than the vision radius.
+
+        Returns:
+            The neighbours of each source.
+        """
+        vision_radius, interaction_radius = config.vision_radius, config.interaction_radius
+        n_src = len(src_x)
+        if n_src == 0 or len(dst_x) == 0:
+            empty = np.zeros(0, dtype=int)
+            ptr = np.zeros(n_src + 1, dtype=int)
+            return Neighbours(ptr, empty, ptr.copy(), empty.copy())
+        # Bucket the targets by cell, leaving a border so that neighbouring cells always have a key
+        scx = np.floor(src_x / vision_radius).astype(int)
+        scy = np.floor(src_y / vision_radius).astype(int)
+        tcx = np.floor(dst_x / vision_radius).astype(int)
+        tcy = np.floor(dst_y / vision_radius).astype(int)
+        min_x = min(scx.min(), tcx.min()) - 1
+        min_y = min(scy.min(), tcy.min()) - 1
+        height = max(scy.max(), tcy.max()) - min_y + 2
+        keys = (tcx - min_x) * height + (tcy - min_y)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # Range of targets in each of the nine cells around each source, source major
+        offsets = np.array([dx * height + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+        cell_keys = ((scx - min_x) * height + (scy - min_y))[:, None] + offsets[None, :]
+        start = np.searchsorted(sorted_keys, cell_keys, "left").ravel()
+        counts = np.searchsorted(sorted_keys, cell_keys, "right").ravel() - start
+        # Expand to candidate pairs
+        total = counts.sum()
+        PROFILER.count("distance_checks", total)
+        pair_src = np.repeat(np.repeat(np.arange(n_src), offsets.size), counts)
+        within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_dst = order[np.repeat(start, counts) + within]
+        d2 = (src_x[pair_src] - dst_x[pair_dst]) ** 2 + (src_y[pair_src] - dst_y[pair_dst]) ** 2
+        seen = d2 < vision_radius**2
+        if exclude is not None:
+            seen &= pair_dst != exclude[pair_src]
+        close = seen & (d2 < interaction_radius**2)
+        return Neighbours(
+            Neighbours.row_pointers(pair_src[seen], n_src),
+            pair_dst[seen],
+            Neighbours.row_pointers(pair_src[close], n_src),
+            pair_dst[close],
+        )
+
+    @staticmethod
+    def row_pointers(rows: np.ndarray, n_rows: int) -> np.ndarray:
+        """
+        Builds CSR row pointers from the sorted row of every entry.
+
+        Args:
+            rows: The row of each entry, in order.
+            n_rows: The number of rows.
+
+        Returns:
+            The row pointers.
+        """
+        ptr = np.zeros(n_rows + 1, dtype=int)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=ptr[1:])
+        return ptr
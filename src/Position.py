@@ -1,20 +1,30 @@
-from ProjectParameters import MAP_SIZE, DISTANCE_PER_STEP
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+from typing import Tuple
 import numpy as np
+import math
+from RandomStreams import RNG
 
 class Position:
     """
     Represents a position within a world map. Automatically binds any position to within the world map
+
+    This is the object view used by agents one at a time. Whole populations are moved with the
+    functions below, which work on arrays of coordinates with the same clamping.
     """
-    def __init__(self, x: float, y: float) -> None:
+    __slots__ = ("config", "_x", "_y")
+
+    def __init__(self, x: float, y: float, config: SimulationConfig = DEFAULT_CONFIG) -> None:
         """
         Initializes a new position. Automatically limits to within the map.
 
         Args:
             x: The x-coord
             y: The y-coord
+            config: The config of the world the position is in, positions made from this one share it.
         """
-        self._x = max(min(x, MAP_SIZE), 0)
-        self._y = max(min(y, MAP_SIZE), 0)
+        self.config = config
+        self._x = max(min(x, config.map_size), 0)
+        self._y = max(min(y, config.map_size), 0)
 
     @property
     def x(self):
@@ -52,10 +62,10 @@ class Position:
         dx = pos.x - self.x
         dy = pos.y - self.y
         # Scale to direction and step distance
-        mag = np.sqrt((dx**2) + (dy**2)) + 1e-4
-        dx *= (DISTANCE_PER_STEP/mag)
-        dy *= (DISTANCE_PER_STEP/mag)
-        return Position(self.x + dx, self.y + dy)
+        mag = math.sqrt((dx**2) + (dy**2)) + 1e-4
+        dx *= (self.config.distance_per_step/mag)
+        dy *= (self.config.distance_per_step/mag)
+        return Position(self.x + dx, self.y + dy, self.config)
 
     def distance_to(self, pos) -> int:
         """
@@ -67,7 +77,7 @@ class Position:
         Returns:
             The l2 distance between the positions.
         """
-        return np.sqrt((self.x - pos.x)**2 + (self.y - pos.y)**2)
+        return math.sqrt((self.x - pos.x)**2 + (self.y - pos.y)**2)
     
     def get_pos_within_radius(self, radius):
         """
@@ -80,21 +90,106 @@ class Position:
             The new position within a radius of this position.
         """
         # Get random radius value
-        r = np.random.random() * radius
+        r = RNG.random() * radius
         # Get random value between 0 and 2pi
-        theta = np.random.random() * 2 * np.pi
+        theta = RNG.random() * 2 * math.pi
         # Compute displacement
-        dx = r * np.cos(theta)
-        dy = r * np.sin(theta)
+        dx = r * math.cos(theta)
+        dy = r * math.sin(theta)
         # Return new position with displacment
-        return Position(self.x + dx, self.y + dy)
+        return Position(self.x + dx, self.y + dy, self.config)
     
     @staticmethod
-    def get_random_pos():
+    def get_random_pos(config: SimulationConfig = DEFAULT_CONFIG):
         """
         Returns a random position in the map.
+
+        Args:
+            config: The config of the world to get a position in.
         """
-        return Position(np.random.random() * MAP_SIZE, np.random.random() * MAP_SIZE)
+        return Position(RNG.random() * config.map_size, RNG.random() * config.map_size, config)
     
     def __eq__(self,other):
-        return other.x == self.x and other.y == self.y
\ No newline at end of file
+        return other.x == self.x and other.y == self.y
+
+
+def clamp_many(x: np.ndarray, y: np.ndarray, config: SimulationConfig = DEFAULT_CONFIG, out=None):
+    """
+    Limits coordinates to within the map, as Position does.
+
+    Args:
+        x: The X coordinates.
+        y: The Y coordinates.
+        config: The config of the world, giving the size of the map.
+        out: Arrays to write the X and Y coordinates into, which may be x and y themselves.
+
+    Returns:
+        The clamped X and Y coordinates.
+    """
+    ox, oy = out if out is not None else (None, None)
+    return np.clip(x, 0, config.map_size, out=ox), np.clip(y, 0, config.map_size, out=oy)
+
+
+def distance_many(x: np.ndarray, y: np.ndarray, tx: np.ndarray, ty: np.ndarray) -> np.ndarray:
+    """
+    Gets the l2 distance between pairs of positions, as Position.distance_to does.
+
+    Args:
+        x: The X coordinates of the first positions.
+        y: The Y coordinates of the first positions.
+        tx: The X coordinates of the second positions.
+        ty: The Y coordinates of the second positions.
+
+    Returns:
+        The distance of each pair.
+    """
+    return np.sqrt((x - tx) ** 2 + (y - ty) ** 2)
+
+
+def step_toward_many(
+    x: np.ndarray, y: np.ndarray, tx: np.ndarray, ty: np.ndarray, config: SimulationConfig = DEFAULT_CONFIG, out=None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Takes a step from each position toward its target, as Position.step_toward does.
+
+    Args:
+        x: The X coordinates to step from.
+        y: The Y coordinates to step from.
+        tx: The X coordinates to step toward.
+        ty: The Y coordinates to step toward.
+        config: The config of the world, giving the step distance and the size of the map.
+        out: Arrays to write the new X and Y coordinates into, which may be x and y themselves.
+
+    Returns:
+        The X and Y coordinates after the step.
+    """
+    dx = tx - x
+    dy = ty - y
+    scale = config.distance_per_step / (np.sqrt(dx**2 + dy**2) + 1e-4)
+    dx *= scale
+    dy *= scale
+    dx += x
+    dy += y
+    return clamp_many(dx, dy, config, out)
+
+
+def random_points_within_radius(
+    x: np.ndarray, y: np.ndarray, radius: float, config: SimulationConfig = DEFAULT_CONFIG
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gets a random position within a radius of each position, as Position.get_pos_within_radius does.
+    Draws every distance and then every angle from the random streams.
+
+    Args:
+        x: The X coordinates of the centres.
+        y: The Y coordinates of the centres.
+        radius: The radius to look within.
+        config: The config of the world, giving the size of the map.
+
+    Returns:
+        The X and Y coordinates of the new positions.
+    """
+    n = len(x)
+    r = RNG.uniforms(n) * radius
+    theta = RNG.uniforms(n) * (2 * np.pi)
+    return clamp_many(x + r * np.cos(theta), y + r * np.sin(theta), config)
@@ -0,0 +1,248 @@
+from contextlib import nullcontext
+from pathlib import Path
+from threading import Lock, local
+from typing import Dict, List, Tuple
+import time
+
+# What a section does while the profiler is off, shared since it holds no state
+NULL_SECTION = nullcontext()
+
+
+class Section:
+    """
+    Times a section of code run inside a with statement, nested under the sections open around it.
+    """
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.profiler.stack().append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        stack = self.profiler.stack()
+        self.profiler.add(tuple(stack), seconds)
+        stack.pop()
+        return False
+
+
+class Profiler:
+    """
+    Times the phases of a run and counts what happens in them, to tell where the time of a slow run
+    goes. Sections nest, so each is kept under the path of the sections open around it, like
+    ("step", "midday", "act", "interact_agent"). Counts are kept under the section they happen in.
+    Everything is split by day so a change in timings can be tied to a change in behaviour.
+
+    While off, a section is a shared no-op context and a count is a single check, so the
+    instrumented code can stay in place. Sections on other threads, such as the checkpoint writer's,
+    start their own paths and go to the day that is open when they finish.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes a profiler that is off.
+        """
+        self.enabled = False
+        self.lock = Lock()
+        self.local = local()
+        self.reset()
+
+    def reset(self):
+        """
+        Drops everything profiled so far.
+        """
+        with self.lock:
+            # Seconds and calls of each section path, for the day that is open
+            self.sections: Dict[Tuple[str, ...], List] = {}
+            # Counts of each section path by name, for the day that is open
+            self.counts: Dict[Tuple[str, ...], Dict[str, int]] = {}
+            self.days: List[dict] = []
+
+    def enable(self):
+        """
+        Starts profiling from scratch.
+        """
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stops profiling, keeping what was profiled so far.
+        """
+        self.enabled = False
+
+    def stack(self) -> List[str]:
+        """
+        Gets the names of the sections open on this thread, outermost first.
+        """
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def section(self, name: str):
+        """
+        Times the code in a with statement, if profiling.
+
+        Args:
+            name: The name of the section.
+
+        Returns:
+            The context manager to run the code in.
+        """
+        return Section(self, name) if self.enabled else NULL_SECTION
+
+    def add(self, path: Tuple[str, ...], seconds: float):
+        """
+        Adds a call of a section.
+
+        Args:
+            path: The names of the section and the sections open around it, outermost first.
+            seconds: How long the call took.
+        """
+        with self.lock:
+            totals = self.sections.setdefault(path, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def count(self, name: str, n: int = 1):
+        """
+        Counts something that happened in the innermost open section, if profiling.
+
+        Args:
+            name: What happened, such as "fights".
+            n: How many times it happened.
+        """
+        if self.enabled and n:
+            path = tuple(self.stack())
+            with self.lock:
+                counts = self.counts.setdefault(path, {})
+                counts[name] = counts.get(name, 0) + int(n)
+
+    def end_day(self, day: int):
+        """
+        Closes the profile of a day and opens the next.
+
+        Args:
+            day: The day that ended.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.days.append({"day": day, "sections": self.sections, "counts": self.counts})
+            self.sections = {}
+            self.counts = {}
+
+    def totals(self) -> Tuple[Dict[Tuple[str, ...], List], Dict[Tuple[str, ...], Dict[str, int]]]:
+        """
+        Adds up every day profiled, with the day that is open.
+
+        Returns:
+            The seconds and calls of each section path, and the counts of each section path by name.
+        """
+        sections = {}
+        counts = {}
+        with self.lock:
+            days = self.days + [{"sections": self.sections, "counts": self.counts}]
+            for day in days:
+                for path, (seconds, calls) in day["sections"].items():
+                    totals = sections.setdefault(path, [0.0, 0])
+                    totals[0] += seconds
+                    totals[1] += calls
+                for path, named in day["counts"].items():
+                    totals = counts.setdefault(path, {})
+                    for name, n in named.items():
+                        totals[name] = totals.get(name, 0) + n
+        return sections, counts
+
+    @staticmethod
+    def self_seconds(sections: Dict[Tuple[str, ...], List]) -> Dict[Tuple[str, ...], float]:
+        """
+        Gets the time spent in each section outside of the sections nested in it.
+
+        Args:
+            sections: The seconds and calls of each section path.
+
+        Returns:
+            The self time of each section path, in seconds.
+        """
+        own = {path: seconds for path, (seconds, _) in sections.items()}
+        for path, (seconds, _) in sections.items():
+            if path[:-1] in own:
+                own[path[:-1]] -= seconds
+        # Clock reads between nested sections can leave a tiny negative remainder
+        return {path: max(seconds, 0.0) for path, seconds in own.items()}
+
+    @staticmethod
+    def table(sections: Dict[Tuple[str, ...], List], counts: Dict[Tuple[str, ...], Dict[str, int]]) -> str:
+        """
+        Lays out a profile as a table, with nested sections indented under the section they run in.
+
+        Args:
+            sections: The seconds and calls of each section path.
+            counts: The counts of each section path by name.
+
+        Returns:
+            The table, one section per line.
+        """
+        own = Profiler.self_seconds(sections)
+        # Parents finish after their children, so order paths by when each part of them first finished
+        order = {path: k for k, path in enumerate(sections)}
+        paths = sorted(sections, key=lambda path: [order.get(path[:k + 1], -1) for k in range(len(path))])
+        lines = [f"{'section':<40} {'calls':>9} {'total s':>10} {'self s':>10} {'of root':>8}  counts"]
+        for path in paths:
+            seconds, calls = sections[path]
+            root = sections.get(path[:1], [seconds])[0]
+            share = 100 * seconds / root if root > 0 else 100.0
+            named = " ".join(f"{name}={n}" for name, n in sorted(counts.get(path, {}).items()))
+            name = "  " * (len(path) - 1) + path[-1]
+            lines.append(f"{name:<40} {calls:>9} {seconds:>10.4f} {own[path]:>10.4f} {share:>7.1f}%  {named}")
+        return "\n".join(lines)
+
+    def report(self) -> str:
+        """
+        Gets the table of the whole run so far.
+        """
+        return Profiler.table(*self.totals())
+
+    def folded(self) -> List[str]:
+        """
+        Gets the whole run so far as folded stacks, the input of flame graph tools such as
+        flamegraph.pl and speedscope: the section path joined by semicolons and its self time in microseconds.
+
+        Returns:
+            One line per section path.
+        """
+        sections, _ = self.totals()
+        return [
+            f"{';'.join(path)} {round(seconds * 1e6)}"
+            for path, seconds in Profiler.self_seconds(sections).items()
+            if round(seconds * 1e6) > 0
+        ]
+
+    def write(self, project: Path):
+        """
+        Writes the table of each day and of the whole run to profile.txt in a project, and the folded
+        stacks of the whole run to profile.folded.
+
+        Args:
+            project: The directory of the run.
+        """
+        with self.lock:
+            days = list(self.days)
+        with project.joinpath("profile.txt").open("wt+") as f:
+            for day in days:
+                f.write(f"Day {day['day']}\n{Profiler.table(day['sections'], day['counts'])}\n\n")
+            f.write(f"Run\n{self.report()}\n")
+        with project.joinpath("profile.folded").open("wt+") as f:
+            f.write("".join(f"{line}\n" for line in self.folded()))
+
+
+# The profiler the simulation is instrumented with, off unless a run turns it on
+PROFILER = Profiler()
@@ -31,9 +31,39 @@ STEPS_PER_DAY = 250
 # How much of the day to consider morning and evening.
 MORNING_PERCENT = 0.15
 EVENING_PERCENT = 0.15
+# Simulation engine, "object" steps each Agent in turn, "array" steps the population in NumPy arrays,
+# "event" only wakes an Agent when it arrives, gets bored or a new phase of the day starts,
+# "tiled" splits the map into strips stepped by worker processes
+ENGINE = "object"
+# Number of strips and worker processes of the "tiled" engine
+TILES = 4
+# Seed for the random streams, None draws a fresh one. The seed used is saved in params.json
+SEED = None
 # Checkpointing
 DAYS_PER_CHECKPOINT = 1
+# "json" writes checkpoint_{day}.json files, "columnar" appends to a CheckpointStore
+CHECKPOINT_BACKEND = "json"
+# Gzip JSON checkpoints. Columnar checkpoints stay uncompressed so they can be memory mapped
+CHECKPOINT_COMPRESSION = False
+# Checkpoints waiting for the background writer before the simulation has to wait, 0 writes them in the step loop
+CHECKPOINT_QUEUE_SIZE = 4
+# Days between full snapshots a run can be resumed from with --resume, 0 never snapshots
+DAYS_PER_SNAPSHOT = 1
+# Stopping early, checked at the end of every day
+STOP_ON_EXTINCTION = True
+# Stop once fewer agents than this are alive, 0 never stops
+MIN_POPULATION = 0
+# Stop once every gene's mean and standard deviation have drifted less than CONVERGENCE_THRESHOLD
+# (a fraction of the gene's range) over this many days, 0 never stops
+CONVERGENCE_WINDOW = 0
+CONVERGENCE_THRESHOLD = 0.01
 # Visualization
 VISUALIZE = False
+# Records the run to frames/ and renders animation.mp4 from it with Render.py once the run is done
 AS_MP4 = False
 NUM_BINS = 25
+# Records agent positions on every step to frames/ without rendering, for Render.py to animate later
+RECORD_FRAMES = False
+# Serves live metrics of the run as JSON, polled with Telemetry.py. None is off, otherwise a port on
+# localhost (0 for any free port) or the path of a Unix socket. The address is put in telemetry.json
+TELEMETRY = None
@@ -0,0 +1,160 @@
+import numpy as np
+import math
+
+# How many uniforms to draw from the generator at a time for scalar draws
+BLOCK_SIZE = 8192
+
+
+class RandomStreams:
+    """
+    A source of random numbers built on a single seeded numpy Generator. Scalar draws are handed
+    out from blocks drawn ahead of time, since a single NumPy call per scalar is slow, while batched
+    draws for a whole population go straight to the generator.
+    """
+
+    def __init__(self, seed: int = None, block_size: int = BLOCK_SIZE) -> None:
+        """
+        Initializes the streams.
+
+        Args:
+            seed: The seed to start from, a fresh one is drawn if None.
+            block_size: How many uniforms to draw at a time for scalar draws.
+        """
+        self.block_size = block_size
+        self.reseed(seed)
+
+    def reseed(self, seed: int = None):
+        """
+        Restarts the streams from a seed. The seed used is kept in self.seed so it can be saved.
+
+        Args:
+            seed: The seed to restart from, a fresh one is drawn if None.
+        """
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self.seed = int(seed)
+        self.generator = np.random.default_rng(self.seed)
+        self.block = []
+        self.block_state = None
+        self.next = 0
+
+    def refill(self):
+        """
+        Draws a new block of uniforms for scalar draws.
+        """
+        # Kept so that the block can be drawn again when restoring a saved state
+        self.block_state = self.generator.bit_generator.state
+        self.block = self.generator.random(self.block_size).tolist()
+        self.next = 0
+
+    def state(self) -> dict:
+        """
+        Gets the full state of the streams, including how far into the current block draws are.
+
+        Returns:
+            A JSON serializable state.
+        """
+        return {
+            "seed": self.seed,
+            "block_size": self.block_size,
+            "generator": self.generator.bit_generator.state,
+            "block_state": self.block_state,
+            "next": self.next,
+        }
+
+    def set_state(self, state: dict):
+        """
+        Restores a state from state(), so that the following draws are the same as they were
+        after the state was taken.
+
+        Args:
+            state: The state to restore.
+        """
+        self.seed = state["seed"]
+        self.block_size = state["block_size"]
+        self.generator = np.random.default_rng(self.seed)
+        self.block = []
+        self.block_state = state["block_state"]
+        if self.block_state is not None:
+            self.generator.bit_generator.state = self.block_state
+            self.block = self.generator.random(self.block_size).tolist()
+        self.next = state["next"]
+        self.generator.bit_generator.state = state["generator"]
+
+    def random(self) -> float:
+        """
+        Returns a uniform float in [0, 1).
+        """
+        if self.next == len(self.block):
+            self.refill()
+        value = self.block[self.next]
+        self.next += 1
+        return value
+
+    def integers(self, low: int, high: int) -> int:
+        """
+        Returns a uniform integer in [low, high).
+
+        Args:
+            low: The lowest possible value.
+            high: One more than the highest possible value.
+        """
+        return low + int(self.random() * (high - low))
+
+    def choice(self, seq):
+        """
+        Returns a uniformly chosen element of a sequence.
+
+        Args:
+            seq: A non empty sequence to choose from.
+        """
+        return seq[int(self.random() * len(seq))]
+
+    def geometric(self, p: float) -> float:
+        """
+        Returns the number of trials up to and including the first success, with a chance p of
+        success on each trial. Takes a single uniform draw.
+
+        Args:
+            p: The chance of success on each trial.
+
+        Returns:
+            An integer of at least 1, or infinity if p is 0.
+        """
+        u = self.random()
+        if p <= 0:
+            return math.inf
+        if p >= 1:
+            return 1
+        return int(math.log1p(-u) / math.log1p(-p)) + 1
+
+    def shuffle(self, seq):
+        """
+        Shuffles a mutable sequence in place.
+
+        Args:
+            seq: The sequence to shuffle.
+        """
+        self.generator.shuffle(seq)
+
+    def permutation(self, n: int) -> np.ndarray:
+        """
+        Draws a random order of 0 to n - 1, the same order shuffle would put a sequence of length n in.
+
+        Args:
+            n: The number of items.
+        """
+        return self.generator.permutation(n)
+
+    def uniforms(self, n: int) -> np.ndarray:
+        """
+        Returns an array of n uniform floats in [0, 1).
+
+        Args:
+            n: The number of floats.
+        """
+        return self.generator.random(n)
+
+
+# The streams used by the whole simulation, reseed it before building a World to reproduce a run.
+RNG = RandomStreams()
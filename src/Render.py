@@ -0,0 +1,218 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+from Frames import FrameReader
+from PIL import Image
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib
+import numpy as np
+import os
+import subprocess
+import tempfile
+
+# Animation formats that can be rendered, by file extension
+FORMATS = ("mp4", "gif")
+# Title of the histogram of each gene, in the order of the plots after the map
+TITLES = {"max_memory": "Max Memory", "aggressiveness": "Aggressiveness", "harvest_percent": "Harvest Percent"}
+
+
+class FramePlot:
+    """
+    The figure of a recorded frame, laid out like the live view of World.make_plot: the map and the
+    histograms of the genes at the end of the day before. The layout is worked out once and
+    everything but the agents and the title is drawn once a day, so drawing a frame only blits the
+    agents onto a saved background.
+    """
+
+    def __init__(self, reader: FrameReader) -> None:
+        """
+        Makes the figure with the caves and bushes of a recording.
+
+        Args:
+            reader: The recording to draw frames of.
+        """
+        self.reader = reader
+        static = reader.static
+        self.fig = Figure(figsize=(8, 8), dpi=100)
+        self.canvas = FigureCanvasAgg(self.fig)
+        (self.map, memory), (aggression, harvest) = self.fig.subplots(2, 2)
+        self.map.scatter(static["cave_x"], static["cave_y"], c="grey", marker="^")
+        self.map.scatter(static["bush_x"], static["bush_y"], c="green", marker="p")
+        self.map.set_xlim(0, static["map_size"])
+        self.map.set_ylim(0, static["map_size"])
+        # Animated artists are left out of full draws and drawn over the background instead
+        self.agents = self.map.scatter(np.empty(0), np.empty(0), c="black", marker="o", animated=True)
+        self.title = self.map.set_title("Day 0, step 0", animated=True)
+        self.axes = dict(zip(TITLES, (memory, aggression, harvest)))
+        self.bars = {}
+        for gene, axis in self.axes.items():
+            edges = static[f"{gene}_edges"]
+            axis.set_title(TITLES[gene])
+            axis.set_ylabel("Num Agents")
+            axis.set_xlabel(TITLES[gene])
+            self.bars[gene] = axis.bar(edges[:-1], np.zeros(len(edges) - 1), np.diff(edges), align="edge")
+        self.fig.tight_layout()
+        self.histogram_day: int = None
+        self.background = None
+
+    def draw(self, day: int, step: int) -> np.ndarray:
+        """
+        Draws a frame.
+
+        Args:
+            day: The day of the frame.
+            step: The step of the day.
+
+        Returns:
+            The RGBA pixels of the frame, valid until the next frame is drawn.
+        """
+        # The histograms of the latest day that ended before this one
+        ended = [recorded for recorded in self.reader.day_list if recorded < day]
+        if ended and ended[-1] != self.histogram_day:
+            self.histogram_day = ended[-1]
+            for gene, counts in self.reader.histograms(self.histogram_day).items():
+                for count, bar in zip(counts, self.bars[gene]):
+                    bar.set_height(count)
+                self.axes[gene].relim()
+                self.axes[gene].autoscale_view()
+            self.background = None
+        if self.background is None:
+            self.canvas.draw()
+            self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.canvas.restore_region(self.background)
+        self.title.set_text(f"Day {day}, step {step}")
+        self.agents.set_offsets(self.reader.positions(day, step))
+        self.map.draw_artist(self.agents)
+        self.map.draw_artist(self.title)
+        return np.asarray(self.canvas.buffer_rgba())
+
+
+def quantize(images: List[Image.Image]) -> List[Image.Image]:
+    """
+    Maps frames onto the colours of the first for a GIF, which is far faster than finding the best
+    colours of every frame. Frames only differ in where the agents are and in text, so no colour is lost.
+
+    Args:
+        images: The frames.
+
+    Returns:
+        The frames with the palette of the first.
+    """
+    palette = images[0].convert("RGB").quantize()
+    return [image.convert("RGB").quantize(palette=palette, dither=Image.Dither.NONE) for image in images]
+
+
+def render_segment(directory: Path, frames: List[Tuple[int, int]], path: Path, fps: int) -> Path:
+    """
+    Renders some frames of a recording to their own animation. Runs in a worker process.
+
+    Args:
+        directory: The directory of the recording.
+        frames: The (day, step) of each frame, in order.
+        path: The file to save the animation to, its extension gives the format.
+        fps: Frames per second of the animation.
+
+    Returns:
+        The path of the animation.
+    """
+    plot = FramePlot(FrameReader(directory))
+    if path.suffix == ".mp4":
+        width, height = plot.canvas.get_width_height()
+        # Raw frames are piped to ffmpeg, like matplotlib's FFMpegWriter does
+        process = subprocess.Popen(
+            [matplotlib.rcParams["animation.ffmpeg_path"], "-y", "-loglevel", "error", "-f", "rawvideo",
+             "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+             "-vcodec", "libx264", "-pix_fmt", "yuv420p", str(path)],
+            stdin=subprocess.PIPE,
+        )
+        for day, step in frames:
+            process.stdin.write(plot.draw(day, step).tobytes())
+        process.stdin.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to write {path}.")
+    else:
+        images = quantize([Image.fromarray(plot.draw(day, step)).convert("RGB") for day, step in frames])
+        images[0].save(path, save_all=True, append_images=images[1:], duration=round(1000 / fps), loop=0)
+    return path
+
+
+def concatenate(segments: List[Path], output: Path, fps: int):
+    """
+    Joins animations of the same format, one after the other.
+
+    Args:
+        segments: The animations, in order.
+        output: The file to save the joined animation to.
+        fps: Frames per second of the animations.
+    """
+    if output.suffix == ".mp4":
+        # The segments share their encoding, so ffmpeg joins them without encoding again
+        listing = output.with_suffix(".txt")
+        listing.write_text("".join(f"file '{segment.resolve()}'\n" for segment in segments))
+        try:
+            subprocess.run(
+                [matplotlib.rcParams["animation.ffmpeg_path"], "-y", "-loglevel", "error", "-f", "concat",
+                 "-safe", "0", "-i", str(listing), "-c", "copy", str(output)],
+                check=True,
+            )
+        finally:
+            listing.unlink()
+    else:
+        images = []
+        for segment in segments:
+            with Image.open(segment) as image:
+                for k in range(image.n_frames):
+                    image.seek(k)
+                    images.append(image.convert("RGB"))
+        images = quantize(images)
+        images[0].save(output, save_all=True, append_images=images[1:], duration=round(1000 / fps), loop=0)
+
+
+def render(project: Path, output: Path = None, every: int = 1, workers: int = None, fps: int = 50) -> Path:
+    """
+    Renders the animation of a run from the frames it recorded. The frames are split into one
+    consecutive chunk per worker, each rendered by its own process, and the chunks are joined at the end.
+
+    Args:
+        project: The directory of the run, with its recording in frames/.
+        output: The file to save the animation to, an .mp4 or .gif. Defaults to animation.mp4 in the project.
+        every: Keeps one frame in this many steps.
+        workers: Number of processes to render on, defaults to the number of cores.
+        fps: Frames per second of the animation.
+
+    Returns:
+        The path of the animation.
+    """
+    directory = project.joinpath("frames")
+    output = output or project.joinpath("animation.mp4")
+    if output.suffix[1:] not in FORMATS:
+        raise ValueError(f"Unknown animation format {output.suffix}.")
+    frames = FrameReader(directory).frames(every)
+    if len(frames) == 0:
+        raise ValueError(f"No frames recorded in {directory}.")
+    workers = min(workers or os.cpu_count(), len(frames))
+    chunks = [[frames[k] for k in chunk] for chunk in np.array_split(np.arange(len(frames)), workers)]
+    with tempfile.TemporaryDirectory(dir=project) as scratch:
+        paths = [Path(scratch).joinpath(f"segment_{k}{output.suffix}") for k in range(workers)]
+        if workers == 1:
+            segments = [render_segment(directory, chunks[0], paths[0], fps)]
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                segments = list(pool.map(render_segment, [directory] * workers, chunks, paths, [fps] * workers))
+        concatenate(segments, output, fps)
+    return output
+
+
+if __name__ == "__main__":
+    args = ArgumentParser("Renders the animation of a run from the frames it recorded")
+    args.add_argument("project", help="The name of the project to render.")
+    args.add_argument("--output", help="The file to save the animation to, an .mp4 or .gif. Defaults to animation.mp4 in the project.")
+    args.add_argument("--every", type=int, default=1, help="Keep one frame in this many steps.")
+    args.add_argument("--workers", type=int, help="Number of processes to render on, defaults to the number of cores.")
+    args.add_argument("--fps", type=int, default=50, help="Frames per second of the animation.")
+    args = args.parse_args()
+    project = Path("../").joinpath(args.project)
+    output = project.joinpath(args.output) if args.output is not None else None
+    print(f"Saved {render(project, output, args.every, args.workers, args.fps)}")
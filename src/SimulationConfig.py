@@ -0,0 +1,155 @@
+from ProjectParameters import (
+    AGGRESSIVE_BOUNDS,
+    HARVEST_BOUNDS,
+    MEMORY_BOUNDS,
+    INTERACTION_RADIUS,
+    VISION_RADIUS,
+    DISTANCE_PER_STEP,
+    CHANCE_TO_REMEMBER_BUSH,
+    CHANCE_TO_REMEMBER_CAVE,
+    CHANCE_TO_USE_MEMORY,
+    CHANCE_TO_GET_BORED,
+    FAT_PRESERVATION_PERCENT,
+    MAX_AGGR_CAL,
+    MAX_HARVEST_CAL,
+    CAL_PER_MEM,
+    WALK_CAL_COST,
+    HARVEST_CAL_COST,
+    FIGHT_CAL_COST,
+    INIT_NUM_AGENTS,
+    INIT_NUM_CAVES,
+    INIT_CAVE_CAP,
+    INIT_NUM_BUSHES,
+    INIT_BUSH_CAP,
+    MAP_SIZE,
+    NUM_DAYS,
+    STEPS_PER_DAY,
+    MORNING_PERCENT,
+    EVENING_PERCENT,
+    ENGINE,
+    TILES,
+    SEED,
+    DAYS_PER_CHECKPOINT,
+    CHECKPOINT_BACKEND,
+    CHECKPOINT_COMPRESSION,
+    CHECKPOINT_QUEUE_SIZE,
+    DAYS_PER_SNAPSHOT,
+    STOP_ON_EXTINCTION,
+    MIN_POPULATION,
+    CONVERGENCE_WINDOW,
+    CONVERGENCE_THRESHOLD,
+    VISUALIZE,
+    AS_MP4,
+    NUM_BINS,
+    RECORD_FRAMES,
+    TELEMETRY,
+)
+from dataclasses import dataclass, replace, asdict
+from typing import Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    """
+    Every tunable of a simulation. Defaults to the values in ProjectParameters, so a configuration
+    only has to name what it changes. Frozen so one config can be shared by every entity of a world.
+    """
+
+    # Agent Parameters
+    aggressive_bounds: Tuple[float, float] = AGGRESSIVE_BOUNDS
+    harvest_bounds: Tuple[float, float] = HARVEST_BOUNDS
+    memory_bounds: Tuple[int, int] = MEMORY_BOUNDS
+    interaction_radius: float = INTERACTION_RADIUS
+    vision_radius: float = VISION_RADIUS
+    distance_per_step: float = DISTANCE_PER_STEP
+    chance_to_remember_bush: float = CHANCE_TO_REMEMBER_BUSH
+    chance_to_remember_cave: float = CHANCE_TO_REMEMBER_CAVE
+    chance_to_use_memory: float = CHANCE_TO_USE_MEMORY
+    chance_to_get_bored: float = CHANCE_TO_GET_BORED
+    fat_preservation_percent: float = FAT_PRESERVATION_PERCENT
+    # Calorie parameters
+    max_aggr_cal: float = MAX_AGGR_CAL
+    max_harvest_cal: float = MAX_HARVEST_CAL
+    cal_per_mem: float = CAL_PER_MEM
+    # Calories that various activities cost
+    walk_cal_cost: float = WALK_CAL_COST
+    harvest_cal_cost: float = HARVEST_CAL_COST
+    fight_cal_cost: float = FIGHT_CAL_COST
+    # Initialization
+    init_num_agents: int = INIT_NUM_AGENTS
+    init_num_caves: int = INIT_NUM_CAVES
+    init_cave_cap: Tuple[int, int] = INIT_CAVE_CAP
+    init_num_bushes: int = INIT_NUM_BUSHES
+    init_bush_cap: Tuple[int, int] = INIT_BUSH_CAP
+    map_size: float = MAP_SIZE
+    # How long to run
+    num_days: int = NUM_DAYS
+    steps_per_day: int = STEPS_PER_DAY
+    # How much of the day to consider morning and evening.
+    morning_percent: float = MORNING_PERCENT
+    evening_percent: float = EVENING_PERCENT
+    # Simulation engine and seed
+    engine: str = ENGINE
+    tiles: int = TILES
+    seed: Optional[int] = SEED
+    # Checkpointing
+    days_per_checkpoint: int = DAYS_PER_CHECKPOINT
+    checkpoint_backend: str = CHECKPOINT_BACKEND
+    checkpoint_compression: bool = CHECKPOINT_COMPRESSION
+    checkpoint_queue_size: int = CHECKPOINT_QUEUE_SIZE
+    days_per_snapshot: int = DAYS_PER_SNAPSHOT
+    # Stopping early
+    stop_on_extinction: bool = STOP_ON_EXTINCTION
+    min_population: int = MIN_POPULATION
+    convergence_window: int = CONVERGENCE_WINDOW
+    convergence_threshold: float = CONVERGENCE_THRESHOLD
+    # Visualization
+    visualize: bool = VISUALIZE
+    as_mp4: bool = AS_MP4
+    num_bins: int = NUM_BINS
+    record_frames: bool = RECORD_FRAMES
+    telemetry: Optional[Union[int, str]] = TELEMETRY
+
+    def replace(self, **changes) -> "SimulationConfig":
+        """
+        Makes a copy of this config with some values changed.
+
+        Args:
+            changes: The new values by field or ProjectParameters name. Lists are taken as tuples.
+
+        Returns:
+            The new config.
+        """
+        values = {}
+        for name, value in changes.items():
+            name = name.lower()
+            if name not in SimulationConfig.__dataclass_fields__:
+                raise ValueError(f"Unknown parameter {name.upper()}.")
+            values[name] = tuple(value) if isinstance(value, list) else value
+        return replace(self, **values)
+
+    def to_json(self):
+        """
+        Returns a JSON serializable form of this config, keyed by the ProjectParameters names.
+
+        Returns:
+            A dictionary of every value in this config.
+        """
+        return {name.upper(): value for name, value in asdict(self).items()}
+
+    @staticmethod
+    def from_json(data: dict):
+        """
+        Makes a config from saved data. Values missing from the data keep their defaults,
+        so params.json files from older runs can be loaded too.
+
+        Args:
+            data: The data to make the config from, keyed by field or ProjectParameters names.
+
+        Returns:
+            The config matching the data.
+        """
+        return SimulationConfig().replace(**data)
+
+
+DEFAULT_CONFIG = SimulationConfig()
@@ -0,0 +1,107 @@
+from Position import Position
+from WorldEntity import WorldEntity
+from typing import Dict, Tuple
+
+
+class SpatialHash:
+    """
+    A uniform grid of buckets that entities are kept in by position. Entities are inserted once and
+    only change buckets when they move into a new cell, so the cost of keeping the grid up to date is
+    proportional to the number of cell crossings rather than to the size of the map or population.
+    """
+
+    def __init__(self, cell_size: float) -> None:
+        """
+        Initializes an empty grid.
+
+        Args:
+            cell_size: The width of a cell. Entities within cell_size of each other are always
+                       in the same or neighbouring cells.
+        """
+        self.cell_size = cell_size
+        # Buckets are dictionaries rather than sets so the order is the same in every run
+        self.buckets: Dict[Tuple[int, int], Dict[WorldEntity, None]] = {}
+        self.cells: Dict[WorldEntity, Tuple[int, int]] = {}
+        # Number of times an entity changed bucket
+        self.crossings = 0
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __contains__(self, entity: WorldEntity) -> bool:
+        return entity in self.cells
+
+    def cell_of(self, pos: Position) -> Tuple[int, int]:
+        """
+        Gets the cell a position falls in.
+
+        Args:
+            pos: The position to look up.
+
+        Returns:
+            The cell coordinates.
+        """
+        return int(pos.x // self.cell_size), int(pos.y // self.cell_size)
+
+    def insert(self, entity: WorldEntity):
+        """
+        Adds an entity to the grid. The entity is told about the grid so that it can report its
+        own moves.
+
+        Args:
+            entity: The entity to add.
+        """
+        cell = self.cell_of(entity.pos)
+        self.cells[entity] = cell
+        self.buckets.setdefault(cell, {})[entity] = None
+        entity.grid = self
+
+    def remove(self, entity: WorldEntity):
+        """
+        Removes an entity from the grid.
+
+        Args:
+            entity: The entity to remove.
+        """
+        cell = self.cells.pop(entity)
+        bucket = self.buckets[cell]
+        del bucket[entity]
+        if len(bucket) == 0:
+            del self.buckets[cell]
+        entity.grid = None
+
+    def move(self, entity: WorldEntity):
+        """
+        Moves an entity to the bucket of its current position if it crossed into a new cell.
+
+        Args:
+            entity: The entity that moved.
+        """
+        cell = self.cell_of(entity.pos)
+        old_cell = self.cells[entity]
+        if cell != old_cell:
+            bucket = self.buckets[old_cell]
+            del bucket[entity]
+            if len(bucket) == 0:
+                del self.buckets[old_cell]
+            self.buckets.setdefault(cell, {})[entity] = None
+            self.cells[entity] = cell
+            self.crossings += 1
+
+    def near(self, pos: Position):
+        """
+        Gets every entity in the cell of a position and the eight cells around it.
+        This includes everything within cell_size of the position.
+
+        Args:
+            pos: The position to look around.
+
+        Returns:
+            An iterator over the nearby entities.
+        """
+        cx, cy = self.cell_of(pos)
+        for i in range(cx - 1, cx + 2):
+            for j in range(cy - 1, cy + 2):
+                bucket = self.buckets.get((i, j))
+                if bucket is not None:
+                    yield from bucket
@@ -0,0 +1,394 @@
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+from ActiveSet import PHASES
+import matplotlib.pyplot as plt
+import numpy as np
+
+# Genes summarized every day
+GENES = ("aggressiveness", "harvest_percent", "max_memory")
+# Per day statistics kept for each gene
+STATS = ("mean", "std", "min", "max")
+# Counts of the agent encounters of a day, by how many sides stole
+ENCOUNTER_STATS = ("encounters", "share_share", "steal_share", "steal_steal")
+# Contention at each cave over a day, fill_time is the step of the day the cave filled up
+CAVE_STATS = ("arrivals", "fights", "evictions", "fill_time")
+# The labels of the mean, maximum and minimum, the Y axis label and the title of the plot of each gene
+GENE_PLOTS = {
+    "aggressiveness": (("mean aggressiveness", "max aggressiveness", "min aggressiveness"),
+                       "Aggressiveness Value", "Evolution of Aggressiveness via Mean"),
+    "max_memory": (("mean max memory", "maximum of max memory", "minimum of max memory"),
+                   "Memory Value", "Evolution of Memory via Mean"),
+    "harvest_percent": (("mean harvest percentage", "max harvest percentage", "min harvest percentage"),
+                        "Harvest Percentage", "Evolution of Harvest Percentage via Mean"),
+}
+
+
+class Summary:
+    """
+    Statistics of every day of a run, gathered as the run goes so that plots never have to re-read
+    the checkpoints. Each day keeps the population and, for each gene, its mean, standard deviation,
+    minimum, maximum and a histogram over fixed bins, along with the mean number of agents
+    active on a step in each phase of the day, the number of encounters between agents and
+    their outcomes, and the contention at each cave, NaN where the engine does not count them.
+    Also records why and when the run stopped early.
+    """
+
+    def __init__(self, config: SimulationConfig = DEFAULT_CONFIG) -> None:
+        """
+        Initializes an empty summary.
+
+        Args:
+            config: The config of the run, giving the range and number of bins of each gene.
+        """
+        # Same bins as the histograms shown while visualizing
+        self.edges: Dict[str, np.ndarray] = {
+            "aggressiveness": np.linspace(*config.aggressive_bounds, config.num_bins + 1),
+            "harvest_percent": np.linspace(*config.harvest_bounds, config.num_bins + 1),
+            "max_memory": np.linspace(*config.memory_bounds, config.memory_bounds[1] + 1),
+        }
+        self.days: List[int] = []
+        self.population: List[int] = []
+        self.stats: Dict[str, Dict[str, List[float]]] = {gene: {stat: [] for stat in STATS} for gene in GENES}
+        self.histograms: Dict[str, List[np.ndarray]] = {gene: [] for gene in GENES}
+        self.active: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+        self.encounters: Dict[str, List[float]] = {stat: [] for stat in ENCOUNTER_STATS}
+        # One value per cave each day, an empty day where contention was not counted
+        self.caves: Dict[str, List[np.ndarray]] = {stat: [] for stat in CAVE_STATS}
+        # Set once the run stops before its last day
+        self.stop_day: Optional[int] = None
+        self.stop_reason: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def record(self, day: int, agents, active: Dict[str, float] = None, encounters: Dict[str, int] = None,
+               caves: Dict[str, np.ndarray] = None):
+        """
+        Adds the statistics of one day.
+
+        Args:
+            day: The day, 0 for the initial world.
+            agents: The agents alive at the end of the day.
+            active: The mean number of active agents on a step of each phase, 0 for phases without steps.
+            encounters: The number of encounters over the day and of each outcome, keyed by
+                        ENCOUNTER_STATS, None if they were not counted.
+            caves: The contention at each cave over the day, keyed by CAVE_STATS, None if it was not counted.
+        """
+        self.days.append(day)
+        self.population.append(len(agents))
+        for phase in PHASES:
+            self.active[phase].append((active or {}).get(phase, 0.0))
+        for stat in ENCOUNTER_STATS:
+            self.encounters[stat].append(np.nan if encounters is None else float(encounters[stat]))
+        for stat in CAVE_STATS:
+            self.caves[stat].append(np.empty(0) if caves is None else np.asarray(caves[stat], dtype=float))
+        for gene in GENES:
+            values = np.array([getattr(agent, gene) for agent in agents], dtype=float)
+            stats = self.stats[gene]
+            stats["mean"].append(values.mean() if len(values) > 0 else np.nan)
+            stats["std"].append(values.std(ddof=1) if len(values) > 1 else np.nan)
+            stats["min"].append(values.min() if len(values) > 0 else np.nan)
+            stats["max"].append(values.max() if len(values) > 0 else np.nan)
+            self.histograms[gene].append(np.histogram(values, self.edges[gene])[0])
+
+    def converged(self, window: int, threshold: float) -> bool:
+        """
+        Tells if every gene's mean and standard deviation drifted less than a threshold over the
+        last days.
+
+        Args:
+            window: The number of days to look back over.
+            threshold: The largest drift allowed, as a fraction of the range of the gene.
+        """
+        if len(self) <= window:
+            return False
+        for gene in GENES:
+            scale = self.edges[gene][-1] - self.edges[gene][0]
+            for stat in ("mean", "std"):
+                values = self.stat(gene, stat)[-window - 1:]
+                if np.any(np.isnan(values)) or np.ptp(values) > threshold * scale:
+                    return False
+        return True
+
+    def check_stop(self, config: SimulationConfig = DEFAULT_CONFIG) -> Optional[str]:
+        """
+        Checks the stop conditions of a config against the last recorded day.
+
+        Args:
+            config: The config giving the stop conditions.
+
+        Returns:
+            Why the run should stop, "extinction", "population floor" or "converged", or None to carry on.
+        """
+        if len(self) == 0:
+            return None
+        if config.stop_on_extinction and self.population[-1] == 0:
+            return "extinction"
+        if self.population[-1] < config.min_population:
+            return "population floor"
+        if config.convergence_window > 0 and self.converged(config.convergence_window, config.convergence_threshold):
+            return "converged"
+        return None
+
+    def stop(self, day: int, reason: str):
+        """
+        Records that the run stopped early.
+
+        Args:
+            day: The last day that was run.
+            reason: Why the run stopped.
+        """
+        self.stop_day = day
+        self.stop_reason = reason
+
+    def stat(self, gene: str, stat: str) -> np.ndarray:
+        """
+        Gets one statistic of a gene for every day.
+
+        Args:
+            gene: The gene, such as "aggressiveness".
+            stat: The statistic, one of STATS.
+        """
+        return np.array(self.stats[gene][stat], dtype=float)
+
+    def histogram(self, gene: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the histogram of a gene for every day.
+
+        Args:
+            gene: The gene, such as "aggressiveness".
+
+        Returns:
+            The counts with one row per day, and the bin edges.
+        """
+        counts = np.array(self.histograms[gene], dtype=int).reshape(len(self), len(self.edges[gene]) - 1)
+        return counts, self.edges[gene]
+
+    def cave_stat(self, stat: str) -> np.ndarray:
+        """
+        Gets the contention at each cave for every day, to find the caves fought over the most.
+
+        Args:
+            stat: The statistic, one of CAVE_STATS.
+
+        Returns:
+            The value at each cave with one row per day, NaN on days it was not counted.
+        """
+        rows = self.caves[stat]
+        values = np.full((len(rows), max((len(row) for row in rows), default=0)), np.nan)
+        for day, row in enumerate(rows):
+            values[day, :len(row)] = row
+        return values
+
+    def save(self, path: Path):
+        """
+        Saves the summary to one compressed file.
+
+        Args:
+            path: The file to save to, normally summary.npz in the project.
+        """
+        arrays = {"days": np.array(self.days, dtype=int), "population": np.array(self.population, dtype=int)}
+        if self.stop_reason is not None:
+            arrays["stop_day"] = np.array(self.stop_day)
+            arrays["stop_reason"] = np.array(self.stop_reason)
+        for gene in GENES:
+            for stat in STATS:
+                arrays[f"{gene}_{stat}"] = self.stat(gene, stat)
+            arrays[f"{gene}_hist"], arrays[f"{gene}_edges"] = self.histogram(gene)
+        for phase in PHASES:
+            arrays[f"active_{phase}"] = np.array(self.active[phase], dtype=float)
+        for stat in ENCOUNTER_STATS:
+            arrays[f"encounters_{stat}"] = np.array(self.encounters[stat], dtype=float)
+        for stat in CAVE_STATS:
+            arrays[f"caves_{stat}"] = self.cave_stat(stat)
+        np.savez_compressed(path, **arrays)
+
+    @staticmethod
+    def load(path: Path) -> "Summary":
+        """
+        Loads a saved summary.
+
+        Args:
+            path: The file the summary was saved to.
+
+        Returns:
+            The summary.
+        """
+        summary = Summary()
+        with np.load(path) as data:
+            summary.days = data["days"].tolist()
+            summary.population = data["population"].tolist()
+            for gene in GENES:
+                summary.stats[gene] = {stat: data[f"{gene}_{stat}"].tolist() for stat in STATS}
+                summary.histograms[gene] = list(data[f"{gene}_hist"])
+                summary.edges[gene] = data[f"{gene}_edges"]
+            for phase in PHASES:
+                # Summaries saved before active sets were kept have none
+                if f"active_{phase}" in data.files:
+                    summary.active[phase] = data[f"active_{phase}"].tolist()
+                else:
+                    summary.active[phase] = [np.nan] * len(summary.days)
+            for stat in ENCOUNTER_STATS:
+                # Summaries saved before encounters were kept have none
+                if f"encounters_{stat}" in data.files:
+                    summary.encounters[stat] = data[f"encounters_{stat}"].tolist()
+                else:
+                    summary.encounters[stat] = [np.nan] * len(summary.days)
+            for stat in CAVE_STATS:
+                # Summaries saved before cave contention was kept have none
+                if f"caves_{stat}" in data.files:
+                    summary.caves[stat] = list(data[f"caves_{stat}"])
+                else:
+                    summary.caves[stat] = [np.empty(0)] * len(summary.days)
+            if "stop_reason" in data.files:
+                summary.stop(int(data["stop_day"]), str(data["stop_reason"]))
+        return summary
+
+    def to_json(self) -> dict:
+        """
+        Returns a JSON serializable copy of the summary, as stored in snapshots.
+        """
+        return {
+            "days": list(self.days),
+            "population": list(self.population),
+            "stats": {gene: {stat: [float(v) for v in values] for stat, values in stats.items()}
+                      for gene, stats in self.stats.items()},
+            "histograms": {gene: [counts.tolist() for counts in histograms]
+                           for gene, histograms in self.histograms.items()},
+            "active": {phase: [float(v) for v in values] for phase, values in self.active.items()},
+            # NaN is not JSON, days without counted encounters are null
+            "encounters": {stat: [None if np.isnan(v) else float(v) for v in values]
+                           for stat, values in self.encounters.items()},
+            "caves": {stat: [[None if np.isnan(v) else float(v) for v in row.tolist()] for row in rows]
+                      for stat, rows in self.caves.items()},
+            "stop_day": self.stop_day,
+            "stop_reason": self.stop_reason,
+        }
+
+    @staticmethod
+    def from_json(data: dict, config: SimulationConfig = DEFAULT_CONFIG) -> "Summary":
+        """
+        Makes a summary from its JSON form.
+
+        Args:
+            data: The JSON form from to_json.
+            config: The config of the run, giving the bins of the histograms.
+
+        Returns:
+            The summary.
+        """
+        summary = Summary(config)
+        summary.days = list(data["days"])
+        summary.population = list(data["population"])
+        summary.stats = {gene: {stat: list(values) for stat, values in stats.items()}
+                         for gene, stats in data["stats"].items()}
+        summary.histograms = {gene: [np.array(counts, dtype=int) for counts in histograms]
+                              for gene, histograms in data["histograms"].items()}
+        summary.active = {phase: list(values) for phase, values in data.get(
+            "active", {phase: [np.nan] * len(summary.days) for phase in PHASES}
+        ).items()}
+        summary.encounters = {stat: [np.nan if v is None else v for v in values] for stat, values in data.get(
+            "encounters", {stat: [None] * len(summary.days) for stat in ENCOUNTER_STATS}
+        ).items()}
+        summary.caves = {stat: [np.array([np.nan if v is None else v for v in row], dtype=float) for row in rows]
+                         for stat, rows in data.get("caves", {stat: [[]] * len(summary.days) for stat in CAVE_STATS}).items()}
+        summary.stop_day = data.get("stop_day")
+        summary.stop_reason = data.get("stop_reason")
+        return summary
+
+    def mark_stop(self):
+        """
+        Marks the day the run stopped early on the current plot, if it did.
+        """
+        if self.stop_reason is not None:
+            plt.axvline(self.stop_day, color="grey", linestyle="--", label=f"stopped ({self.stop_reason})")
+
+    def plot_gene(self, gene: str, path: Path, labels: Tuple[str, str, str], ylabel: str, title: str):
+        """
+        Plots the mean, maximum and minimum of a gene with a band of one standard deviation.
+
+        Args:
+            gene: The gene to plot.
+            path: The file to save the plot in.
+            labels: The labels of the mean, maximum and minimum.
+            ylabel: The label of the Y axis.
+            title: The title of the plot.
+        """
+        days = np.array(self.days)
+        mean, std = self.stat(gene, "mean"), self.stat(gene, "std")
+        plt.plot(days, mean, label=labels[0], color="yellow")
+        plt.plot(days, self.stat(gene, "max"), label=labels[1], color="red")
+        plt.plot(days, self.stat(gene, "min"), label=labels[2], color="purple")
+        self.mark_stop()
+        plt.legend()
+        plt.fill_between(days, mean - std, mean + std, alpha=0.5)
+        plt.xlabel("Checkpoint Day")
+        plt.ylabel(ylabel)
+        plt.title(title)
+        plt.savefig(path, format="pdf")
+        plt.close()
+
+    def plot_population(self, path: Path):
+        """
+        Plots the population of every day.
+
+        Args:
+            path: The file to save the plot in.
+        """
+        plt.plot(np.array(self.days), np.array(self.population))
+        if self.stop_reason is not None:
+            self.mark_stop()
+            plt.legend()
+        plt.xlabel("Checkpoint Day")
+        plt.ylabel("Total Population")
+        plt.title("Total Population across Checkpoints")
+        plt.savefig(path, format="pdf")
+        plt.close()
+
+    def plot_heatmap(self, gene: str, path: Path, ylabel: str, title: str):
+        """
+        Plots the histogram of a gene on every day as a heatmap, days along X and gene values along Y.
+
+        Args:
+            gene: The gene to plot.
+            path: The file to save the plot in.
+            ylabel: The label of the Y axis.
+            title: The title of the plot.
+        """
+        counts, edges = self.histogram(gene)
+        days = np.array(self.days)
+        plt.pcolormesh(np.append(days, days[-1] + 1) - 0.5, edges, counts.T, cmap="viridis")
+        plt.colorbar(label="Num Agents")
+        plt.xlabel("Checkpoint Day")
+        plt.ylabel(ylabel)
+        plt.title(title)
+        plt.savefig(path, format="pdf")
+        plt.close()
+
+    def plot_all(self, project: Path):
+        """
+        Makes the aggressiveness, memory, harvest percentage and population plots and a heatmap of each gene.
+
+        Args:
+            project: The directory to save the plots in.
+        """
+        self.plot_gene("aggressiveness", project.joinpath("Aggressiveness_Evolution.pdf"), *GENE_PLOTS["aggressiveness"])
+        self.plot_gene("max_memory", project.joinpath("Memory_Evolution.pdf"), *GENE_PLOTS["max_memory"])
+        self.plot_gene("harvest_percent", project.joinpath("Harvest_Percentage_Evolution.pdf"), *GENE_PLOTS["harvest_percent"])
+        self.plot_population(project.joinpath("Total Population across Checkpoints.pdf"))
+        self.plot_heatmap("aggressiveness", project.joinpath("Aggressiveness_Heatmap.pdf"),
+                          "Aggressiveness", "Aggressiveness of Agents per Day")
+        self.plot_heatmap("max_memory", project.joinpath("Memory_Heatmap.pdf"),
+                          "Max Memory", "Max Memory of Agents per Day")
+        self.plot_heatmap("harvest_percent", project.joinpath("Harvest_Percentage_Heatmap.pdf"),
+                          "Harvest Percent", "Harvest Percent of Agents per Day")
+
+
+if __name__ == "__main__":
+    args = ArgumentParser("Renders the plots of a run from its summary")
+    args.add_argument("project", help="The name of the project to plot.")
+    args = args.parse_args()
+    project = Path("../").joinpath(args.project)
+    Summary.load(project.joinpath("summary.npz")).plot_all(project)
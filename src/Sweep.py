@@ -0,0 +1,195 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+from Ensemble import METRICS, run_replica
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+from argparse import ArgumentParser
+from datetime import datetime
+from tqdm import tqdm
+import itertools
+import numpy as np
+import json
+import os
+
+
+def grid(base: SimulationConfig, parameters: Dict[str, Sequence]) -> List[SimulationConfig]:
+    """
+    Makes a config for every combination of parameter values.
+
+    Args:
+        base: The config the values are changed in.
+        parameters: The values to try for each parameter, by field or ProjectParameters name.
+
+    Returns:
+        The configs, the last parameter changing fastest.
+    """
+    names = list(parameters)
+    configs = []
+    for values in itertools.product(*(parameters[name] for name in names)):
+        configs.append(base.replace(**dict(zip(names, values))))
+    return configs
+
+
+def latin_hypercube(
+    base: SimulationConfig, parameters: Dict[str, Tuple[float, float]], samples: int, seed: int = None
+) -> List[SimulationConfig]:
+    """
+    Makes configs from a Latin hypercube sample of parameter ranges. Each range is split into
+    as many strata as there are samples and every stratum of every parameter is used exactly once.
+    Parameters declared as integers in SimulationConfig are rounded.
+
+    Args:
+        base: The config the values are changed in.
+        parameters: The lowest and highest value of each parameter, by field or ProjectParameters name.
+        samples: The number of configs to make.
+        seed: The seed of the sample, a fresh one is drawn if None.
+
+    Returns:
+        The configs.
+    """
+    types = {f.name: f.type for f in fields(SimulationConfig)}
+    generator = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in parameters.items():
+        kind = types.get(name.lower())
+        if kind not in (int, float):
+            raise ValueError(f"{name.upper()} can not be sampled from a range.")
+        strata = (generator.permutation(samples) + generator.random(samples)) / samples
+        values = low + strata * (high - low)
+        if kind is int:
+            columns[name] = [int(round(value)) for value in values]
+        else:
+            columns[name] = [float(value) for value in values]
+    return [base.replace(**{name: columns[name][i] for name in columns}) for i in range(samples)]
+
+
+class Sweep:
+    """
+    Runs a set of configurations of the simulation across a pool of processes, each in its own
+    directory holding its exact config.
+    """
+
+    def __init__(self, project: Path, configs: List[SimulationConfig], seed: int = None) -> None:
+        """
+        Initializes a sweep.
+
+        Args:
+            project: The directory to save the sweep in, configurations go in subdirectories.
+            configs: The configurations to run.
+            seed: The seed every configuration's seed is spawned from, a fresh one is drawn if None.
+        """
+        self.project = project
+        self.project.mkdir(exist_ok=True)
+        seed_sequence = np.random.SeedSequence(seed)
+        self.seed = seed_sequence.entropy
+        self.configs = [
+            config.replace(seed=int(child.generate_state(1, np.uint64)[0]))
+            for config, child in zip(configs, seed_sequence.spawn(len(configs)))
+        ]
+        self.results: Dict[int, Dict[str, np.ndarray]] = {}
+
+    @staticmethod
+    def from_spec(project: Path, spec: dict, base: SimulationConfig = DEFAULT_CONFIG) -> "Sweep":
+        """
+        Makes a sweep from a specification such as
+        {"method": "grid", "parameters": {"FIGHT_CAL_COST": [5, 10, 20]}} or
+        {"method": "latin_hypercube", "samples": 20, "parameters": {"FIGHT_CAL_COST": [5, 20]}}.
+        The specification may also hold a "seed" and "base" values for every configuration.
+
+        Args:
+            project: The directory to save the sweep in.
+            spec: The specification.
+            base: The config the specification's base values are applied to.
+
+        Returns:
+            The sweep.
+        """
+        base = base.replace(**spec.get("base", {}))
+        seed = spec.get("seed", base.seed)
+        if spec["method"] == "grid":
+            configs = grid(base, spec["parameters"])
+        elif spec["method"] == "latin_hypercube":
+            configs = latin_hypercube(base, spec["parameters"], spec["samples"], seed)
+        else:
+            raise ValueError(f"Unknown sweep method {spec['method']}.")
+        return Sweep(project, configs, seed)
+
+    def config_project(self, i: int) -> Path:
+        """
+        Gets the directory a configuration is saved in.
+
+        Args:
+            i: The index of the configuration.
+        """
+        return self.project.joinpath(f"config_{i}")
+
+    def run(self, workers: int = None):
+        """
+        Runs every configuration across a process pool and saves a summary of the sweep.
+
+        Args:
+            workers: The number of processes, defaults to the number of cores.
+        """
+        with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+            running = {
+                pool.submit(run_replica, self.config_project(i), config.seed, config): i
+                for i, config in enumerate(self.configs)
+            }
+            for future in tqdm(as_completed(running), total=len(running), leave=True):
+                self.results[running[future]] = future.result()
+        self.save()
+
+    def save(self):
+        """
+        Saves the parameters that differ between configurations and the final statistics of each,
+        taken on the last day run for configurations that stopped early.
+        """
+        varied = [
+            f.name for f in fields(SimulationConfig)
+            if f.name != "seed" and len({getattr(config, f.name) for config in self.configs}) > 1
+        ]
+        with self.project.joinpath("sweep.json").open("wt+") as f:
+            json.dump(
+                {
+                    "seed": self.seed,
+                    "configs": [
+                        {
+                            "project": self.config_project(i).name,
+                            "parameters": {name.upper(): getattr(config, name) for name in varied},
+                            "final": {
+                                metric: float(self.results[i][metric][self.results[i].get("stop_day", -1)])
+                                for metric in METRICS
+                            } if i in self.results else None,
+                            "stopped": {
+                                "day": self.results[i]["stop_day"], "reason": self.results[i]["stop_reason"]
+                            } if "stop_reason" in self.results.get(i, {}) else None,
+                        }
+                        for i, config in enumerate(self.configs)
+                    ],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    args = ArgumentParser("Runs a sweep over configurations of the simulation")
+    args.add_argument("project", help="The name of the project to save this as.")
+    args.add_argument("spec", help="JSON file with the grid or Latin hypercube to sweep.")
+    args.add_argument("--config", help="params.json to use as the base config, defaults to ProjectParameters.")
+    args.add_argument("--workers", type=int, help="Number of processes to run on, defaults to the number of cores.")
+    args = args.parse_args()
+
+    base = DEFAULT_CONFIG
+    if args.config is not None:
+        with open(args.config, "r") as f:
+            base = SimulationConfig.from_json(json.load(f))
+    with open(args.spec, "r") as f:
+        spec = json.load(f)
+    sweep = Sweep.from_spec(Path("../").joinpath(args.project), spec, base)
+
+    print("Starting Time =", datetime.now().strftime("%H:%M:%S"))
+    print(f"Running {len(sweep.configs)} configurations")
+    sweep.run(args.workers)
+    print("Ending Time =", datetime.now().strftime("%H:%M:%S"))
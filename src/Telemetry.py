@@ -0,0 +1,259 @@
+from argparse import ArgumentParser
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from threading import Lock, Thread
+from typing import Dict, List, Union
+import numpy as np
+import json
+import socket
+import time
+
+# Number of recent steps the live counters are taken over
+LATENCY_WINDOW = 1000
+# Step latency percentiles reported by the live counters
+PERCENTILES = (50, 90, 99)
+
+
+def finite_or_none(value: float):
+    """
+    Makes a number safe for JSON, which has no NaN or infinity.
+
+    Args:
+        value: The number.
+
+    Returns:
+        The number as a float, or None if it is not finite.
+    """
+    return float(value) if np.isfinite(value) else None
+
+
+class TelemetryHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /metrics with the live counters and the latest day, and GET /days with every day so far.
+    """
+
+    def do_GET(self):
+        telemetry = self.server.telemetry
+        if self.path in ("/", "/metrics"):
+            body = telemetry.metrics()
+        elif self.path == "/days":
+            body = telemetry.history()
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        # Polled constantly, so requests are not logged
+        pass
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """
+    An HTTP server on a Unix socket.
+    """
+    daemon_threads = True
+
+
+class Telemetry:
+    """
+    Publishes the health of a running world as JSON over a local HTTP endpoint, so that a client can
+    poll many runs while they go. The world hands over the duration of every step and the metrics of
+    every day. Nothing is serialized until a client asks and the server thread sleeps in between, so a
+    run nobody is watching only pays for a clock read and two array writes per step.
+
+    The address to poll is written to telemetry.json in the project and removed when the run closes.
+    """
+
+    def __init__(self, project: Path, address: Union[int, str] = 0, window: int = LATENCY_WINDOW) -> None:
+        """
+        Starts serving the telemetry of a run.
+
+        Args:
+            project: The directory of the run.
+            address: A port to serve on localhost, 0 for any free port, or the path of a Unix socket.
+            window: Number of recent steps the live counters are taken over.
+        """
+        self.project = project
+        self.latencies = np.zeros(window)
+        self.ends = np.zeros(window)
+        self.steps = 0
+        self.days: List[dict] = []
+        self.lock = Lock()
+        if isinstance(address, str):
+            Path(address).unlink(missing_ok=True)
+            self.server = UnixHTTPServer(address, TelemetryHandler)
+            self.endpoint = {"socket": str(Path(address).resolve())}
+        else:
+            self.server = ThreadingHTTPServer(("127.0.0.1", address), TelemetryHandler)
+            self.endpoint = {"url": f"http://127.0.0.1:{self.server.server_address[1]}"}
+        self.server.telemetry = self
+        self.thread = Thread(target=self.server.serve_forever, name="telemetry", daemon=True)
+        self.thread.start()
+        with self.project.joinpath("telemetry.json").open("wt+") as f:
+            json.dump(self.endpoint, f)
+
+    def step(self, seconds: float):
+        """
+        Counts a step.
+
+        Args:
+            seconds: How long the step took.
+        """
+        slot = self.steps % len(self.latencies)
+        self.latencies[slot] = seconds
+        self.ends[slot] = time.perf_counter()
+        self.steps += 1
+
+    def record_day(self, metrics: dict):
+        """
+        Publishes the metrics of a day that ended.
+
+        Args:
+            metrics: The metrics, JSON serializable.
+        """
+        with self.lock:
+            self.days.append(metrics)
+
+    def live(self) -> dict:
+        """
+        Gets the live counters over the recent steps.
+
+        Returns:
+            The number of steps so far, steps per second and step latency percentiles in milliseconds.
+        """
+        steps = self.steps
+        count = min(steps, len(self.latencies))
+        latencies = self.latencies[:count].copy()
+        ends = self.ends[:count]
+        live = {"steps": steps, "steps_per_second": None}
+        live.update({f"latency_p{p}_ms": None for p in PERCENTILES})
+        if count > 1 and ends.max() > ends.min():
+            live["steps_per_second"] = float((count - 1) / (ends.max() - ends.min()))
+        if count > 0:
+            for p, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+                live[f"latency_p{p}_ms"] = float(value * 1000)
+        return live
+
+    def metrics(self) -> dict:
+        """
+        Gets what GET /metrics answers with.
+
+        Returns:
+            The project, the live counters and the metrics of the last day, None before the first day ends.
+        """
+        with self.lock:
+            day = self.days[-1] if self.days else None
+        return {"project": str(self.project), "live": self.live(), "day": day}
+
+    def history(self) -> List[dict]:
+        """
+        Gets what GET /days answers with.
+
+        Returns:
+            The metrics of every day so far.
+        """
+        with self.lock:
+            return list(self.days)
+
+    def close(self):
+        """
+        Stops serving and removes the run's telemetry.json.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        self.project.joinpath("telemetry.json").unlink(missing_ok=True)
+        if "socket" in self.endpoint:
+            Path(self.endpoint["socket"]).unlink(missing_ok=True)
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """
+    An HTTP connection over a Unix socket.
+    """
+
+    def __init__(self, path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def poll(endpoint: Dict[str, str], path: str = "/metrics", timeout: float = 1.0):
+    """
+    Asks a run for its telemetry.
+
+    Args:
+        endpoint: The contents of the run's telemetry.json.
+        path: "/metrics" or "/days".
+        timeout: Seconds to wait for the run to answer.
+
+    Returns:
+        The decoded answer.
+    """
+    if "socket" in endpoint:
+        connection = UnixHTTPConnection(endpoint["socket"], timeout)
+    else:
+        connection = HTTPConnection(endpoint["url"].removeprefix("http://"), timeout=timeout)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        if response.status != 200:
+            raise ConnectionError(f"Telemetry answered {response.status} {response.reason}.")
+        return json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def poll_all(directory: Path, timeout: float = 1.0) -> Dict[str, dict]:
+    """
+    Polls every live run in a directory, such as the replicas of an ensemble or the runs of a sweep.
+
+    Args:
+        directory: The directory to look for telemetry.json files in, at any depth.
+        timeout: Seconds to wait for each run to answer.
+
+    Returns:
+        The metrics of each run that answered, by the directory of the run.
+    """
+    runs = {}
+    for path in sorted(directory.glob("**/telemetry.json")):
+        try:
+            with path.open("r") as f:
+                runs[str(path.parent)] = poll(json.load(f), timeout=timeout)
+        except (OSError, ValueError):
+            # Runs can finish between finding and polling them
+            continue
+    return runs
+
+
+if __name__ == "__main__":
+    args = ArgumentParser("Polls the telemetry of the runs in some projects")
+    args.add_argument("projects", nargs="+", help="The names of the projects to poll, searched at any depth for runs.")
+    args.add_argument("--every", type=float, help="Keep polling with this many seconds in between, polls once by default.")
+    args = args.parse_args()
+    while True:
+        for project in args.projects:
+            for run, metrics in poll_all(Path("../").joinpath(project)).items():
+                live, day = metrics["live"], metrics["day"] or {}
+                rate = live["steps_per_second"] or 0.0
+                p99 = live["latency_p99_ms"] or 0.0
+                print(f"{run}: day {day.get('day', 0)}, population {day.get('population', '-')}, "
+                      f"{rate:.0f} steps/s, p99 {p99:.1f} ms")
+        if args.every is None:
+            break
+        time.sleep(args.every)
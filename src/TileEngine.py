@@ -0,0 +1,437 @@
+from ActionSpace import ActionSpace
+from Agent import Agent
+from BerryBush import BerryBush
+from Cave import Cave
+from Position import Position
+from RandomStreams import RNG
+from SimulationConfig import SimulationConfig
+from SpatialHash import SpatialHash
+from WorldEntity import WorldEntity
+from typing import Dict, List, Set
+import multiprocessing
+import itertools
+import numpy as np
+
+
+def tile_of(x: float, config: SimulationConfig) -> int:
+    """
+    Gets the tile a position is in. Tiles are strips of the map side by side along X.
+
+    Args:
+        x: The X coordinate of the position.
+        config: The config giving the size of the map and the number of tiles.
+    """
+    return min(int(x * config.tiles / config.map_size), config.tiles - 1)
+
+
+def restore(agent: Agent, record: dict, entities: Dict[str, WorldEntity]):
+    """
+    Puts an agent in the state of a record sent between processes.
+
+    Args:
+        agent: The agent to update.
+        record: The agent's to_snapshot and references.
+        entities: Every entity that can be named, by name.
+    """
+    agent.pos = Position(record["x"], record["y"], agent.config)
+    agent.calories = record["calories"]
+    agent.calories_burned_for_exercise = record["calories_burned_for_exercise"]
+    agent.action_state = ActionSpace(record["action_state"])
+    agent.wander_spot = None if record["wander_spot"] is None else Position(*record["wander_spot"], agent.config)
+    agent.restore_references(record, entities)
+
+
+class TileWorker:
+    """
+    The part of a tiled world stepped by one worker process. The worker has a copy of every entity,
+    but only steps the agents it owns, which are those in its tile, and only changes the bushes and
+    caves in its tile. The other agents are mirrors, moved to where their own worker reported them
+    after every step.
+    """
+
+    def __init__(self, tile: int) -> None:
+        """
+        Initializes an empty worker.
+
+        Args:
+            tile: The tile the worker owns.
+        """
+        self.tile = tile
+        self.agents: Dict[int, Agent] = {}
+        self.ghosts: List[Agent] = []
+        self.owned: Set[int] = set()
+
+    def load(self, data: dict):
+        """
+        Takes the state of the world at the start of a day.
+
+        Args:
+            data: The config, caves, bushes, agents and remembered dead agents, with the seed of each worker.
+        """
+        # Yesterday's agents never step again
+        for agent in itertools.chain(self.agents.values(), self.ghosts):
+            agent.memory.release()
+        config = self.config = SimulationConfig.from_json(data["config"])
+        RNG.reseed(data["seeds"][self.tile])
+        self.caves = [Cave.from_snapshot(c, config) for c in data["caves"]]
+        self.bushes = [BerryBush.from_snapshot(b, config) for b in data["bushes"]]
+        agents = [Agent.from_snapshot(a, config) for a in data["agents"]]
+        self.ghosts = [Agent.from_snapshot(a, config) for a in data["ghosts"]]
+        self.entities = {
+            entity.name: entity for entity in itertools.chain(self.caves, self.bushes, agents, self.ghosts)
+        }
+        for agent, a in zip(agents, data["agents"]):
+            agent.restore_references(a, self.entities)
+        for cave, c in zip(self.caves, data["caves"]):
+            cave.occupants = {self.entities[name] for name in c["occupants"]}
+        self.agents = {agent.id: agent for agent in agents}
+        self.owned = {agent.id for agent in agents if tile_of(agent.pos.x, config) == self.tile}
+        self.grid = SpatialHash(config.vision_radius)
+        for agent in agents:
+            self.grid.insert(agent)
+        self.bush_grid = SpatialHash(config.vision_radius)
+        for bush in self.bushes:
+            self.bush_grid.insert(bush)
+        self.cave_grid = SpatialHash(config.vision_radius)
+        for cave in self.caves:
+            self.cave_grid.insert(cave)
+
+    def is_local(self, entity: WorldEntity) -> bool:
+        """
+        Says if this worker is the one that changes an entity.
+
+        Args:
+            entity: The entity.
+        """
+        if type(entity) is Agent:
+            return entity.id in self.owned
+        return tile_of(entity.pos.x, self.config) == self.tile
+
+    def leave(self, agent: Agent, interact: bool) -> dict:
+        """
+        Gives up an agent to another worker.
+
+        Args:
+            agent: The agent leaving.
+            interact: Whether the agent leaves to interact with its goal.
+
+        Returns:
+            The record of the agent to send.
+        """
+        self.owned.discard(agent.id)
+        return {**agent.to_snapshot(), **agent.references(), "interact": interact}
+
+    def arrive(self, arrivals: List[dict]) -> Set[int]:
+        """
+        Takes over agents sent by other workers, then has those that came to interact with a goal of
+        this worker do so in order of ID.
+
+        Args:
+            arrivals: The records of the agents, in order of ID.
+
+        Returns:
+            The IDs of the agents that interacted, they have used up their step.
+        """
+        for record in arrivals:
+            restore(self.agents[record["id"]], record, self.entities)
+            self.owned.add(record["id"])
+        done = set()
+        for record in arrivals:
+            agent = self.agents[record["id"]]
+            goal = agent.goal
+            # The goal may have left or moved out of reach in the meantime
+            if (
+                record["interact"]
+                and goal is not None
+                and self.is_local(goal)
+                and agent.pos.distance_to(goal.pos) < self.config.interaction_radius
+            ):
+                agent.interact_goal()
+                done.add(agent.id)
+        return done
+
+    def view(self, agent: Agent, kinds: tuple) -> dict:
+        """
+        Gets what an agent sees, split by kind.
+
+        Args:
+            agent: The agent looking.
+            kinds: The kinds of entity to look for.
+        """
+        grids = {BerryBush: self.bush_grid, Cave: self.cave_grid, Agent: self.grid}
+        return {
+            kind: [
+                entity for entity in grids[kind].near(agent.pos)
+                if entity is not agent and agent.pos.distance_to(entity.pos) < self.config.vision_radius
+            ]
+            for kind in kinds
+        }
+
+    def step(self, timestep: int, ids: np.ndarray, xs: np.ndarray, ys: np.ndarray, arrivals: List[dict]):
+        """
+        Has every owned agent act in turn for a single step.
+
+        Args:
+            timestep: The timestep for the day
+            ids: The ID of every agent.
+            xs: The X coordinate of every agent after the last step.
+            ys: The Y coordinate of every agent after the last step.
+            arrivals: The records of the agents sent to this worker, in order of ID.
+
+        Returns:
+            The records of the agents leaving, the IDs and coordinates of the owned agents and how many
+            of them are awake.
+        """
+        for i, x, y in zip(ids.tolist(), xs.tolist(), ys.tolist()):
+            agent = self.agents[i]
+            if i not in self.owned and (agent.pos.x != x or agent.pos.y != y):
+                agent.pos = Position(x, y, self.config)
+        done = self.arrive(arrivals)
+        leaving = []
+        kinds = tuple(Agent.goal_kinds(timestep, self.config))
+        for i in sorted(self.owned - done):
+            agent = self.agents[i]
+            interact = set()
+            goal = agent.goal
+            if (
+                goal is not None
+                and (type(goal) != Agent or goal in self.grid)
+                and agent.pos.distance_to(goal.pos) < self.config.interaction_radius
+            ):
+                if not self.is_local(goal):
+                    # The goal's own worker has to make the change
+                    leaving.append(self.leave(agent, interact=True))
+                    continue
+                interact.add(goal)
+            agent.act(self.view(agent, kinds), interact, timestep)
+        # Agents that walked into another tile move to its worker
+        for i in sorted(self.owned):
+            if tile_of(self.agents[i].pos.x, self.config) != self.tile:
+                leaving.append(self.leave(self.agents[i], interact=False))
+        owned = sorted(self.owned)
+        awake = sum(1 for i in owned if self.agents[i].action_state != ActionSpace.Sleep)
+        return (
+            leaving,
+            np.array(owned, dtype=np.int64),
+            np.array([self.agents[i].pos.x for i in owned]),
+            np.array([self.agents[i].pos.y for i in owned]),
+            awake,
+        )
+
+    def finish(self, arrivals: List[dict]):
+        """
+        Ends the day, taking in the last agents sent to this worker.
+
+        Args:
+            arrivals: The records of the agents sent to this worker, in order of ID.
+
+        Returns:
+            The records of the owned agents, and the calories of the bushes and occupants of the caves
+            in this worker's tile, by name.
+        """
+        self.arrive(arrivals)
+        records = [{**self.agents[i].to_snapshot(), **self.agents[i].references()} for i in sorted(self.owned)]
+        bushes = {bush.name: bush.current_calories for bush in self.bushes if self.is_local(bush)}
+        caves = {
+            cave.name: sorted(occupant.name for occupant in cave.occupants)
+            for cave in self.caves if self.is_local(cave)
+        }
+        return records, bushes, caves
+
+
+def work(connection, tile: int):
+    """
+    Runs a worker process, answering the commands of the TileEngine until told to close.
+
+    Args:
+        connection: The worker's end of the pipe to the engine.
+        tile: The tile the worker owns.
+    """
+    worker = TileWorker(tile)
+    while True:
+        command, *args = connection.recv()
+        if command == "close":
+            break
+        connection.send(getattr(worker, command)(*args))
+
+
+class TileEngine:
+    """
+    Steps a world split into tiles, each stepped by its own worker process. Every step, each worker has
+    its own agents act, then sends back where they are, which the other workers see them at on the
+    next step. Agents that cross into another tile move to its worker. An agent that reaches a bush,
+    cave or agent of another tile is sent to that tile's worker, which settles every such interaction
+    at the start of the next step in order of agent ID, so two agents harvesting the same bush or
+    entering the same cave always get the same result. At the end of the day everything is gathered
+    back into the world, so survival, breeding and checkpointing are unchanged.
+
+    Like the array engine this is not the same run as the object engine, and the run also depends on
+    the number of tiles.
+    """
+
+    def __init__(self, world) -> None:
+        """
+        Initializes the engine and starts a worker process for every tile.
+
+        Args:
+            world: The world to step.
+        """
+        self.world = world
+        self.config = world.config
+        if self.config.tiles < 1:
+            raise ValueError("The tiled engine needs at least one tile.")
+        context = multiprocessing.get_context()
+        self.connections = []
+        self.processes = []
+        for tile in range(self.config.tiles):
+            connection, child = context.Pipe()
+            process = context.Process(target=work, args=(child, tile), daemon=True)
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self.reload()
+
+    def reload(self):
+        """
+        Takes the world's agents as they are. Must be called whenever the list of agents changes.
+        The workers are loaded on the next step, so that no random draws are made between a day
+        ending and the next one starting.
+        """
+        self.agents: List[Agent] = list(self.world.agents)
+        self.index = {agent.id: i for i, agent in enumerate(self.agents)}
+        self.ids = np.array([agent.id for agent in self.agents], dtype=np.int64)
+        self.x = np.array([agent.pos.x for agent in self.agents], dtype=float)
+        self.y = np.array([agent.pos.y for agent in self.agents], dtype=float)
+        self.owner = {agent.id: tile_of(agent.pos.x, self.config) for agent in self.agents}
+        self.arrivals: List[List[dict]] = [[] for _ in self.connections]
+        self.awake = sum(1 for agent in self.agents if agent.action_state != ActionSpace.Sleep)
+        self.loaded = False
+
+    def load(self):
+        """
+        Sends the state of the world to every worker, along with a seed for each drawn from the world's streams.
+        """
+        alive = set(self.agents)
+        ghosts = {}
+
+        def name_of(entity):
+            if isinstance(entity, Agent) and entity not in alive:
+                ghosts.setdefault(entity.id, entity)
+            return entity.name
+
+        data = {
+            "config": self.config.to_json(),
+            "seeds": [RNG.integers(0, 2**31 - 1) for _ in self.connections],
+            "caves": [cave.to_snapshot() for cave in self.world.caves],
+            "bushes": [bush.to_snapshot() for bush in self.world.bushes],
+            "agents": [{**agent.to_snapshot(), **agent.references(name_of)} for agent in self.agents],
+        }
+        data["ghosts"] = [ghost.to_snapshot() for ghost in ghosts.values()]
+        self.entities = {
+            entity.name: entity
+            for entity in itertools.chain(self.world.caves, self.world.bushes, self.agents, ghosts.values())
+        }
+        for connection in self.connections:
+            connection.send(("load", data))
+        for connection in self.connections:
+            connection.recv()
+        self.loaded = True
+
+    def positions(self):
+        """
+        Gets the X and Y coordinates of every agent after the last step.
+        """
+        return self.x, self.y
+
+    def active_count(self) -> int:
+        """
+        Gets the number of agents awake after the last step. Agents sleep and wake in the workers,
+        so the world's active set does not follow them.
+        """
+        return self.awake
+
+    def step(self, timestep: int):
+        """
+        Has every worker step its agents once and passes the agents leaving to their new workers.
+
+        Args:
+            timestep: The current timestep for the day
+        """
+        if not self.loaded:
+            self.load()
+        for connection, arrivals in zip(self.connections, self.arrivals):
+            connection.send(("step", timestep, self.ids, self.x, self.y, arrivals))
+        leaving = {}
+        self.awake = 0
+        for tile, connection in enumerate(self.connections):
+            records, ids, xs, ys, awake = connection.recv()
+            rows = [self.index[i] for i in ids.tolist()]
+            self.x[rows], self.y[rows] = xs, ys
+            self.owner.update(dict.fromkeys(ids.tolist(), tile))
+            self.awake += awake
+            for record in records:
+                leaving[record["id"]] = (tile, record)
+        self.route(leaving)
+
+    def route(self, leaving: Dict[int, tuple]):
+        """
+        Decides the worker of every agent leaving its worker and queues it to arrive there on the next step.
+        An agent going to interact goes to the worker of its goal, following the goal if it is leaving
+        too. Agents going to each other meet at the worker of the one with the lowest ID.
+
+        Args:
+            leaving: The worker each leaving agent was at and its record, by ID.
+        """
+        destinations = {}
+
+        def destination(i, path):
+            if i not in destinations:
+                tile, record = leaving[i]
+                goal = self.entities[record["goal"]] if record["interact"] else None
+                if goal is None:
+                    destinations[i] = tile_of(record["x"], self.config)
+                elif type(goal) is not Agent:
+                    destinations[i] = tile_of(goal.pos.x, self.config)
+                elif goal.id not in leaving:
+                    destinations[i] = self.owner[goal.id]
+                elif goal.id in path:
+                    cycle = path[path.index(goal.id):] + (i,)
+                    destinations[i] = leaving[min(cycle)][0]
+                else:
+                    destinations[i] = destination(goal.id, path + (i,))
+            return destinations[i]
+
+        self.arrivals = [[] for _ in self.connections]
+        for i in sorted(leaving):
+            tile = destination(i, ())
+            record = leaving[i][1]
+            self.arrivals[tile].append(record)
+            self.owner[i] = tile
+            self.x[self.index[i]], self.y[self.index[i]] = record["x"], record["y"]
+
+    def sync(self):
+        """
+        Gathers the agents, bushes and caves of every worker back into the world's objects.
+        """
+        for connection, arrivals in zip(self.connections, self.arrivals):
+            connection.send(("finish", arrivals))
+        self.arrivals = [[] for _ in self.connections]
+        for connection in self.connections:
+            records, bushes, caves = connection.recv()
+            for record in records:
+                restore(self.agents[self.index[record["id"]]], record, self.entities)
+            for name, calories in bushes.items():
+                self.entities[name].current_calories = calories
+            for name, occupants in caves.items():
+                self.entities[name].occupants = {self.entities[occupant] for occupant in occupants}
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        for connection in self.connections:
+            connection.send(("close",))
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
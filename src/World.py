@@ -1,109 +1,195 @@
 from datetime import datetime
 import pprint
-from ProjectParameters import (MAP_SIZE, NUM_DAYS, STEPS_PER_DAY, INIT_NUM_AGENTS, INIT_NUM_BUSHES, 
-                               INIT_NUM_CAVES, INIT_CAVE_CAP, INIT_BUSH_CAP,
-                               DAYS_PER_CHECKPOINT, MEMORY_BOUNDS, NUM_BINS,
-                               INTERACTION_RADIUS, VISION_RADIUS, VISUALIZE,
-                               AGGRESSIVE_BOUNDS, HARVEST_BOUNDS, AS_MP4
-                               )
 import json
-from typing import List
-from Cave import Cave
-from BerryBush import BerryBush
-from Agent import Agent
+import os
+from typing import Dict, List, Optional
+from Cave import Cave, CaveCounter
+from BerryBush import BerryBush, BushCounter
+from Agent import Agent, AgentCounter
+from Memory import Memory, MemoryBank
+from ArrayEngine import ArrayEngine
+from EventEngine import EventEngine
+from TileEngine import TileEngine
+from ActiveSet import ActiveSet, PHASES, phase_of
+from SpatialHash import SpatialHash
+from CheckpointStore import CheckpointStore, save_json_checkpoint, json_checkpoint_files
+from CheckpointWriter import CheckpointWriter
+from Summary import Summary, GENES, GENE_PLOTS, CAVE_STATS, ENCOUNTER_STATS
+from Frames import FrameRecorder
+from Telemetry import Telemetry, finite_or_none
+from Profiler import PROFILER
+from RandomStreams import RNG
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
 import itertools
 import matplotlib.pyplot as plt
 from Position import Position
 import numpy as np
 from pathlib import Path
-import random
-import statistics as st
+import time
 
 class World:
     def __init__(self, 
                  project: Path,
                  caves: List[Cave] = list(), 
                  bushes: List[BerryBush] = list(), 
-                 agents: List[Agent] = list()) -> None:
+                 agents: List[Agent] = list(),
+                 engine: str = None,
+                 config: SimulationConfig = DEFAULT_CONFIG,
+                 start_day: int = 0) -> None:
         """
         Initializes a random world if all parameters are none
 
         Args:
+            project: The directory to save the checkpoints, snapshots and plots in.
             caves: The list of caves to initialize with
             bushes: The list of bushes to initialize with
             agents: The list of agents to initialize with
+            engine: "object" to step each agent in turn, "array" to step the population in arrays,
+                    "event" to only wake agents when something can happen to them, "tiled" to split
+                    the map between worker processes.
+                    Defaults to the engine of the config.
+            config: The config of the world, shared with every entity made for it.
+            start_day: The day the world is at. Later than 0 when resuming a run, in which case the
+                       entities are used as they are and the checkpoints after that day are removed.
         """
+        self.config = config
+        engine = engine or config.engine
+        if engine not in ("object", "array", "event", "tiled"):
+            raise ValueError(f"Unknown engine {engine}.")
+        if config.checkpoint_backend not in ("json", "columnar"):
+            raise ValueError(f"Unknown checkpoint backend {config.checkpoint_backend}.")
         self.project = project
         self.project.mkdir(exist_ok=True)
         self.checkpoints = self.project.joinpath("checkpoints/")
         self.checkpoints.mkdir(exist_ok=True)
+        self.store = CheckpointStore(self.checkpoints) if config.checkpoint_backend == "columnar" else None
+        self.start_day = start_day
         self.caves = caves
         self.bushes = bushes
         self.agents = agents
-        # Add caves and bushes and agents if they are empty
-        if len(self.caves) == 0:
-            for _ in range(INIT_NUM_CAVES):
-                self.caves.append(Cave(Position.get_random_pos(), 
-                                       random.randint(INIT_CAVE_CAP[0], INIT_CAVE_CAP[1])))
-        if len(self.bushes) == 0:
-            for _ in range(INIT_NUM_BUSHES):
-                self.bushes.append(BerryBush(Position.get_random_pos(), 
-                                             random.randrange(INIT_BUSH_CAP[0], INIT_BUSH_CAP[1]+1, 50)))
-        if len(self.agents) == 0:
-            for _ in range(INIT_NUM_AGENTS):
+        # The memories of the world's agents, dropped with the world
+        self.bank = MemoryBank(config.memory_bounds[1])
+        # Add caves and bushes and agents if they are empty, a resumed world keeps its entities as they are
+        new = start_day == 0
+        if new and len(self.caves) == 0:
+            for _ in range(config.init_num_caves):
+                self.caves.append(Cave(Position.get_random_pos(config), 
+                                       RNG.integers(config.init_cave_cap[0], config.init_cave_cap[1] + 1), config))
+        if new and len(self.bushes) == 0:
+            for _ in range(config.init_num_bushes):
+                self.bushes.append(BerryBush(Position.get_random_pos(config), 
+                                             RNG.choice(range(config.init_bush_cap[0], config.init_bush_cap[1]+1, 50)),
+                                             config))
+        if new and len(self.agents) == 0:
+            for _ in range(config.init_num_agents):
                 self.agents.append(
                     Agent(
-                        Position.get_random_pos(),
-                        np.random.random(),
-                        np.random.random(),
-                        np.random.randint(MEMORY_BOUNDS[0], MEMORY_BOUNDS[1] + 1),
+                        Position.get_random_pos(config),
+                        RNG.random(),
+                        RNG.random(),
+                        RNG.integers(config.memory_bounds[0], config.memory_bounds[1] + 1),
+                        Memory(bank=self.bank),
+                        config=config,
                     )
                 )
+        for agent in self.agents:
+            if agent.memory.bank is not self.bank:
+                agent.memory = agent.memory.move_to(self.bank)
+                agent.memory.reserve(agent.max_memory)
+        # Agents keep their own place in the grid up to date as they move
+        self.agent_grid = SpatialHash(config.vision_radius)
+        for agent in self.agents:
+            self.agent_grid.insert(agent)
+        # Agents asleep in a cave are left out of each step
+        self.active = ActiveSet(self.agents)
+        # Number of active agents on each step of the day so far, by phase
+        self.active_sizes = {phase: [] for phase in PHASES}
+        # Encounters between agents so far today and their outcomes, by ENCOUNTER_STATS, empty unless the engine counts them
+        self.encounters: Dict[str, int] = {}
+        engines = {"array": ArrayEngine, "event": EventEngine, "tiled": TileEngine}
+        self.engine = engines[engine](self) if engine != "object" else None
         # Initial checkpoint
-        with open(self.checkpoints.joinpath(f"checkpoint_0.json"), "wt+") as f:
-            json.dump(self.to_json(), f, indent=2)
-        if VISUALIZE:
+        # Caves and bushes never change so they are only serialized once
+        self.static_json = {
+            "caves": [cave.to_json() for cave in self.caves],
+            "bushes": [bush.to_json() for bush in self.bushes],
+        }
+        if not new:
+            self.remove_checkpoints_after(start_day)
+        elif self.store is not None:
+            self.store.clear()
+            self.store.write_static(self.static_json["caves"], self.static_json["bushes"])
+        self.writer = CheckpointWriter(self.write_checkpoint, config.checkpoint_queue_size)
+        # Per day statistics for the plots, so they never re-read the checkpoints
+        self.summary = Summary(config)
+        # Animations are rendered from a recording once the run is done
+        self.frames = None
+        if config.record_frames or (config.visualize and config.as_mp4):
+            self.frames = FrameRecorder(self.project.joinpath("frames"))
+            if new:
+                self.frames.clear()
+                self.frames.write_static(self.static_json["caves"], self.static_json["bushes"], self.summary.edges, config)
+            else:
+                self.frames.truncate(start_day)
+        if new:
+            self.save_checkpoint(0)
+            self.summary.record(0, self.agents)
+            self.save_frames(0)
+        if config.visualize and not config.as_mp4:
             self.make_plot()
+        # Live metrics for a client to poll, if asked for
+        self.telemetry = Telemetry(self.project, config.telemetry) if config.telemetry is not None else None
+
+        # create zones, one set for each kind of static entity
+        self.bush_zones = self.make_zones(self.bushes)
+        self.cave_zones = self.make_zones(self.caves)
+
+    def make_zones(self, entities):
+        """
+        Makes a grid of zones, each holding the entities that are in or next to its cell.
+
+        Args:
+            entities: The entities to put in the zones, they must not move.
 
-        # create zones
+        Returns:
+            The zones indexed by cell X and Y.
+        """
         zones = []
-        for i in range((MAP_SIZE // VISION_RADIUS)+1):
+        cells = int(self.config.map_size // self.config.vision_radius) + 1
+        for i in range(cells):
             row = []
-            for i2 in range((MAP_SIZE // VISION_RADIUS)+1):
+            for i2 in range(cells):
                 j_list = []
-                for j in itertools.chain(self.caves, self.bushes):
-                    jx = j.pos.x // VISION_RADIUS
-                    jy = j.pos.y // VISION_RADIUS
+                for j in entities:
+                    jx = j.pos.x // self.config.vision_radius
+                    jy = j.pos.y // self.config.vision_radius
                     if (jx == i or jx == i+1 or jx == i-1) and (jy == i2 or jy == i2+1 or jy == i2-1):
                         j_list.append(j)
                 row.append(j_list)
             zones.append(row)
-        self.zones = zones
+        return zones
 
     def make_plot(self):
         """
         Makes the plot of the map and the histograms of genes.
         """
-        if AS_MP4:
-            self.fig, map = plt.subplots(figsize=(8, 8), tight_layout=True)
-        else:
-            # Make plot
-            self.fig, ((map, self.memory_bar_chart), (self.agg_hist, self.harvest_hist)) = plt.subplots(2, 2, figsize=(8, 8), tight_layout=True)
-            # Set title and axis
-            self.memory_bar_chart.set_title("Max Memory")
-            self.memory_bar_chart.set_ylabel("Num Agents")
-            self.memory_bar_chart.set_xlabel("Max Memory")
-            self.agg_hist.set_title("Aggressiveness")
-            self.agg_hist.set_ylabel("Num Agents")
-            self.agg_hist.set_xlabel("Aggressiveness")
-            self.harvest_hist.set_title("Harvest Percent")
-            self.harvest_hist.set_ylabel("Num Agents")
-            self.harvest_hist.set_xlabel("Harvest Percent")
-            # Add mutable
-            memory, aggression, harvest = self.get_agent_data()
-            self.memory_bar_chart.hist(memory, bins=MEMORY_BOUNDS[1], range=MEMORY_BOUNDS)
-            self.agg_hist.hist(aggression, bins=NUM_BINS, range=AGGRESSIVE_BOUNDS)
-            self.harvest_hist.hist(harvest, bins=NUM_BINS, range=HARVEST_BOUNDS)
+        # Make plot
+        self.fig, ((map, self.memory_bar_chart), (self.agg_hist, self.harvest_hist)) = plt.subplots(2, 2, figsize=(8, 8), tight_layout=True)
+        # Set title and axis
+        self.memory_bar_chart.set_title("Max Memory")
+        self.memory_bar_chart.set_ylabel("Num Agents")
+        self.memory_bar_chart.set_xlabel("Max Memory")
+        self.agg_hist.set_title("Aggressiveness")
+        self.agg_hist.set_ylabel("Num Agents")
+        self.agg_hist.set_xlabel("Aggressiveness")
+        self.harvest_hist.set_title("Harvest Percent")
+        self.harvest_hist.set_ylabel("Num Agents")
+        self.harvest_hist.set_xlabel("Harvest Percent")
+        # Add mutable
+        memory, aggression, harvest = self.get_agent_data()
+        self.memory_bar_chart.hist(memory, bins=self.config.memory_bounds[1], range=self.config.memory_bounds)
+        self.agg_hist.hist(aggression, bins=self.config.num_bins, range=self.config.aggressive_bounds)
+        self.harvest_hist.hist(harvest, bins=self.config.num_bins, range=self.config.harvest_bounds)
 
         # Map stuff
         map.set_title("Map")
@@ -125,6 +211,8 @@ class World:
         """
         Returns the X and Y coordinates of all agents
         """
+        if self.engine is not None:
+            return self.engine.positions()
         agent_x, agent_y = [], []
         for agent in self.agents:
             agent_x.append(agent.pos.x)
@@ -144,16 +232,97 @@ class World:
         return memory, aggression, harvest
 
     @staticmethod
-    def from_json(data: dict):
+    def from_json(project: Path, data: dict, config: SimulationConfig = DEFAULT_CONFIG):
         """
         Creates a world from JSON data. Used to rebuild the world from a saved initial condition.
         Do not use checkpoints that are not initial saves as it does not restore the same memory in 
-        agents.
+        agents. Use from_snapshot to resume a run.
+
+        Args:
+            project: The directory to save the new world's checkpoints in.
+            data: The JSON form of the world.
+            config: The config of the world.
+        """
+        caves = [Cave.from_json(c, config) for c in data["caves"]]
+        bushes = [BerryBush.from_json(c, config) for c in data["bushes"]]
+        agents = [Agent.from_json(c, config) for c in data["agents"]]
+        return World(project, caves, bushes, agents, config=config)
+
+    def snapshot(self, day: int) -> dict:
+        """
+        Takes the full state of the world at the end of a day, enough to carry on the run exactly as
+        if it had not stopped. Entities refer to each other by name, and dead agents that are still
+        remembered are kept as ghosts.
+
+        Args:
+            day: The day that just ended.
+
+        Returns:
+            A JSON serializable snapshot.
+        """
+        alive = set(self.agents)
+        ghosts = {}
+
+        def name_of(entity):
+            if isinstance(entity, Agent) and entity not in alive:
+                ghosts.setdefault(entity.id, entity)
+            return entity.name
+
+        agents = []
+        for agent in self.agents:
+            agents.append({**agent.to_snapshot(), **agent.references(name_of)})
+        return {
+            "day": day,
+            "config": self.config.to_json(),
+            "rng": RNG.state(),
+            "counters": {"cave": CaveCounter.count, "bush": BushCounter.count, "agent": AgentCounter.count},
+            "caves": [cave.to_snapshot() for cave in self.caves],
+            "bushes": [bush.to_snapshot() for bush in self.bushes],
+            "agents": agents,
+            "ghosts": [ghost.to_snapshot() for ghost in ghosts.values()],
+            # Order of the agents in the grid's buckets, which decides the order agents see each other in
+            "grid": [agent.name for bucket in self.agent_grid.buckets.values() for agent in bucket],
+            "summary": self.summary.to_json(),
+        }
+
+    @staticmethod
+    def from_snapshot(project: Path, data: dict, engine: str = None) -> "World":
         """
-        caves = [Cave.from_json(c) for c in data["caves"]]
-        bushes = [BerryBush.from_json(c) for c in data["bushes"]]
-        agents = [Agent.from_json(c) for c in data["agents"]]
-        return World(caves, bushes, agents)
+        Restores a world from a snapshot, along with the random streams and entity counters, so that
+        stepping it on gives the same run as if it had never stopped.
+
+        Args:
+            project: The directory of the run.
+            data: The snapshot taken by snapshot.
+            engine: The engine to step with, defaults to the engine of the snapshot's config.
+
+        Returns:
+            The world at the end of the day of the snapshot.
+        """
+        config = SimulationConfig.from_json(data["config"])
+        caves = [Cave.from_snapshot(c, config) for c in data["caves"]]
+        bushes = [BerryBush.from_snapshot(b, config) for b in data["bushes"]]
+        agents = [Agent.from_snapshot(a, config) for a in data["agents"]]
+        ghosts = [Agent.from_snapshot(a, config) for a in data["ghosts"]]
+        entities = {entity.name: entity for entity in itertools.chain(caves, bushes, agents, ghosts)}
+        for agent, a in zip(agents, data["agents"]):
+            agent.restore_references(a, entities)
+        for cave, c in zip(caves, data["caves"]):
+            cave.occupants = {entities[name] for name in c["occupants"]}
+        # Remembered dead agents never remember again
+        for ghost in ghosts:
+            ghost.memory.release()
+            ghost.memory = None
+        world = World(project, caves, bushes, agents, engine, config, start_day=data["day"])
+        world.agent_grid = SpatialHash(config.vision_radius)
+        for name in data["grid"]:
+            world.agent_grid.insert(entities[name])
+        world.summary = Summary.from_json(data["summary"], config)
+        CaveCounter.count = data["counters"]["cave"]
+        BushCounter.count = data["counters"]["bush"]
+        AgentCounter.count = data["counters"]["agent"]
+        RNG.set_state(data["rng"])
+        return world
 
     def to_json(self):
         """
@@ -168,74 +337,160 @@ class World:
     def step(self, timestep: int):
 
         """
-        Represents a single step in the world.
+        Represents a single step in the world. Does nothing once the world has stopped.
 
         Args:
             timestep: The timestep of this action
         """
-        current_day = (timestep // STEPS_PER_DAY) + 1
-        timestep %= STEPS_PER_DAY
-
-        # create zones of agents
-        agent_zones = []
-        for i in range((MAP_SIZE // VISION_RADIUS) + 1):
-            row = []
-            for i2 in range((MAP_SIZE // VISION_RADIUS) + 1):
-                j_list = []
-                for j in self.agents:
-                    jx = j.pos.x // VISION_RADIUS
-                    jy = j.pos.y // VISION_RADIUS
-                    if (jx == i or jx == i + 1 or jx == i - 1) and (
-                        jy == i2 or jy == i2 + 1 or jy == i2 - 1
-                    ):
-                        j_list.append(j)
-                row.append(j_list)
-            agent_zones.append(row)
-
-        for agent in self.agents:
-            view, interact = set(), set()
-            for entity in itertools.chain(self.zones[int(agent.pos.x / VISION_RADIUS)][int(agent.pos.y / VISION_RADIUS)],agent_zones[int(agent.pos.x / VISION_RADIUS)][int(agent.pos.y / VISION_RADIUS)]):
-            # for entity in itertools.chain(self.caves, self.bushes, self.agents):
-
-                if entity is not agent:
-                    dis = agent.pos.distance_to(entity.pos)
-                    if dis < VISION_RADIUS:
-                        view.add(entity)
-                    if dis < INTERACTION_RADIUS:
-                        interact.add(entity)
-
-            agent.act(view, interact, timestep)
+        if self.stopped:
+            return
+        start = time.perf_counter()
+        current_day = (timestep // self.config.steps_per_day) + 1
+        timestep %= self.config.steps_per_day
+        phase = phase_of(timestep, self.config)
+        self.active_sizes[phase].append(len(self.active) if self.engine is None else self.engine.active_count())
+
+        with PROFILER.section("step"):
+            with PROFILER.section(phase):
+                if self.engine is not None:
+                    encounters = self.engine.step(timestep)
+                    # Only engines that resolve encounters together count them
+                    if encounters is not None:
+                        for stat, count in encounters.items():
+                            self.encounters[stat] = self.encounters.get(stat, 0) + count
+                else:
+                    self.step_objects(timestep)
+
+            with PROFILER.section("record"):
+                if self.frames is not None:
+                    self.frames.record(*self.get_agent_pos())
+                elif self.config.visualize:
+                    # Update map:
+                    agent_x, agent_y = self.get_agent_pos()
+                    self.agent_loc.set_offsets(np.array(list(zip(agent_x, agent_y))))
+
+            if timestep == self.config.steps_per_day - 1:
+                with PROFILER.section("end_day"):
+                    if self.engine is not None:
+                        self.engine.sync()
+                    self.end_day(current_day)
+                    if self.engine is not None:
+                        self.engine.reload()
+        if timestep == self.config.steps_per_day - 1:
+            PROFILER.end_day(current_day)
+        if self.telemetry is not None:
+            self.telemetry.step(time.perf_counter() - start)
+
+    def step_objects(self, timestep: int):
+        """
+        Has every active agent act in turn for a single step, agents asleep do nothing.
 
-        if VISUALIZE:
-            # Update map:
-            agent_x, agent_y = self.get_agent_pos()
-            self.agent_loc.set_offsets(np.array(list(zip(agent_x, agent_y))))
+        Args:
+            timestep: The timestep for the day
+        """
+        # Agents only look for the kinds of goal they want at this time of day
+        kinds = Agent.goal_kinds(timestep, self.config)
+        for agent in self.active:
+            with PROFILER.section("view"):
+                cx, cy = int(agent.pos.x / self.config.vision_radius), int(agent.pos.y / self.config.vision_radius)
+                view = {}
+                for kind in kinds:
+                    if kind == BerryBush:
+                        nearby = self.bush_zones[cx][cy]
+                    elif kind == Cave:
+                        nearby = self.cave_zones[cx][cy]
+                    else:
+                        # Listed so the distance checks can be counted
+                        nearby = list(self.agent_grid.near(agent.pos))
+                    view[kind] = [
+                        entity for entity in nearby
+                        if entity is not agent and agent.pos.distance_to(entity.pos) < self.config.vision_radius
+                    ]
+                    PROFILER.count("distance_checks", len(nearby))
+                # Only the goal is ever interacted with, dead agents can't be reached
+                interact = set()
+                goal = agent.goal
+                if (
+                    goal is not None
+                    and (type(goal) != Agent or goal in self.agent_grid)
+                    and agent.pos.distance_to(goal.pos) < self.config.interaction_radius
+                ):
+                    interact.add(goal)
+
+            with PROFILER.section("act"):
+                agent.act(view, interact, timestep)
+
+    def end_day(self, current_day: int):
+        """
+        Purges agents that did not survive, breeds the survivors, resets the world and checkpoints.
+        Records a stop in the summary if one of the config's stop conditions is met.
 
-        if timestep == STEPS_PER_DAY - 1:
+        Args:
+            current_day: The day that just ended
+        """
+        # Taken before the caves empty and the bushes grow back
+        health = self.day_health() if self.telemetry is not None else None
+        with PROFILER.section("survival"):
             # Purge all who fail to survive
-            self.agents = list(filter(lambda agent: agent.survived, self.agents))
-            # Make new children if there is space available
+            survivors = []
+            for agent, survived in zip(self.agents, Agent.survivals(self.agents, self.config).tolist()):
+                if survived:
+                    survivors.append(agent)
+                else:
+                    self.agent_grid.remove(agent)
+                    # Dead agents never remember again, their row goes to the children
+                    agent.memory.release()
+                    agent.memory = None
+                    agent.active = None
+            living = set(survivors)
+            deaths = len(self.agents) - len(survivors)
+            self.agents = survivors
+            PROFILER.count("deaths", deaths)
+        with PROFILER.section("breeding"):
+            # Make new children if there is space available, with parents for every cave drawn at once
+            pool = []
+            homes = []
+            base = []
+            sizes = []
             for cave in self.caves:
-                cave.occupants = set(filter(lambda agent: agent.survived, cave.occupants))
+                cave.occupants = {agent for agent in cave.occupants if agent in living}
                 if len(cave.occupants) >= 2:
-                    parents = list(itertools.combinations(cave.occupants, 2))
-                    while not cave.is_full:
-                        # Breed
-                        parent1, parent2 = random.choice(parents)
-                        child = Agent.from_parents(parent1, parent2)
-                        cave.append(child)
-                        self.agents.append(child)
+                    children = cave.max_capacity - len(cave.occupants)
+                    homes.extend([cave] * children)
+                    base.extend([len(pool)] * children)
+                    sizes.extend([len(cave.occupants)] * children)
+                    # Sorted so that a seeded run picks the same parents
+                    pool.extend(sorted(cave.occupants, key=lambda agent: agent.id))
+            if homes:
+                # Two different occupants, uniform over the pairs of the cave
+                sizes = np.array(sizes)
+                first = (RNG.uniforms(len(homes)) * sizes).astype(int)
+                second = (RNG.uniforms(len(homes)) * (sizes - 1)).astype(int)
+                second += second >= first
+                base = np.array(base)
+                parents1 = [pool[k] for k in (base + np.minimum(first, second)).tolist()]
+                parents2 = [pool[k] for k in (base + np.maximum(first, second)).tolist()]
+                # Breed
+                for cave, child in zip(homes, Agent.breed(parents1, parents2)):
+                    self.agent_grid.insert(child)
+                    cave.append(child)
+                    self.agents.append(child)
+            PROFILER.count("births", len(homes))
+        with PROFILER.section("reset"):
             # Reset all entities
             for entity in itertools.chain(self.caves, self.bushes, self.agents):
                 entity.reset()
+            self.active = ActiveSet(self.agents)
+        with PROFILER.section("summary"):
+            contention = self.cave_contention()
             # Update graphs
-            if VISUALIZE and not AS_MP4:
+            if self.config.visualize and not self.config.as_mp4:
                 memory, aggression, harvest = self.get_agent_data()
-                for count, rect in zip(np.histogram(memory, MEMORY_BOUNDS[1], range=MEMORY_BOUNDS)[0], self.memory_bar_chart.patches):
+                for count, rect in zip(np.histogram(memory, self.config.memory_bounds[1], range=self.config.memory_bounds)[0], self.memory_bar_chart.patches):
                     rect.set_height(count)
-                for count, rect in zip(np.histogram(aggression, NUM_BINS, range=AGGRESSIVE_BOUNDS)[0], self.agg_hist.patches):
+                for count, rect in zip(np.histogram(aggression, self.config.num_bins, range=self.config.aggressive_bounds)[0], self.agg_hist.patches):
                     rect.set_height(count)
-                for count, rect in zip(np.histogram(harvest, NUM_BINS, range=HARVEST_BOUNDS)[0], self.harvest_hist.patches):
+                for count, rect in zip(np.histogram(harvest, self.config.num_bins, range=self.config.harvest_bounds)[0], self.harvest_hist.patches):
                     rect.set_height(count)
                 # Allow scaling
                 self.memory_bar_chart.relim()
@@ -244,131 +499,220 @@ class World:
                 self.agg_hist.autoscale()
                 self.harvest_hist.relim()
                 self.harvest_hist.autoscale()
-            # If current day is at checkpoint.
-            if current_day % DAYS_PER_CHECKPOINT == 0:
-                with open(self.checkpoints.joinpath(f"checkpoint_{current_day}.json"), "wt+") as f:
-                    json.dump(self.to_json(), f, indent=2)
+            self.summary.record(current_day, self.agents, {
+                phase: float(np.mean(sizes)) if len(sizes) > 0 else 0.0 for phase, sizes in self.active_sizes.items()
+            }, self.encounters or None, contention)
+            self.active_sizes = {phase: [] for phase in PHASES}
+            self.encounters = {}
+            self.save_frames(current_day)
+            if self.telemetry is not None:
+                self.telemetry.record_day({
+                    "day": current_day,
+                    "population": len(self.agents),
+                    "births": len(homes),
+                    "deaths": deaths,
+                    **health,
+                    "encounters": {
+                        stat: finite_or_none(self.summary.encounters[stat][-1]) for stat in ENCOUNTER_STATS
+                    },
+                    # Totals over every cave and the cave fought over the most
+                    "caves": None if contention is None else {
+                        **{stat: int(contention[stat].sum()) for stat in CAVE_STATS[:3]},
+                        "hotspot": self.caves[int(np.argmax(contention["fights"]))].id if contention["fights"].any() else None,
+                    },
+                    "genes": {
+                        gene: {
+                            "mean": finite_or_none(self.summary.stats[gene]["mean"][-1]),
+                            "var": finite_or_none(self.summary.stats[gene]["std"][-1] ** 2),
+                        }
+                        for gene in GENES
+                    },
+                })
+            reason = self.summary.check_stop(self.config)
+        if reason is not None and current_day < self.config.num_days:
+            self.summary.stop(current_day, reason)
+        with PROFILER.section("checkpoint"):
+            # If current day is at checkpoint, the last day of a run that stopped early is always kept
+            if current_day % self.config.days_per_checkpoint == 0 or self.stopped:
+                self.save_checkpoint(current_day)
+            if self.config.days_per_snapshot > 0 and (current_day % self.config.days_per_snapshot == 0 or self.stopped):
+                self.save_snapshot(current_day)
+
+            # print(f"completed day {current_day} of {self.config.num_days} (Population: {len(self.agents)})")
+
+
+    def day_health(self) -> dict:
+        """
+        Gets how full the caves are and how much of the bushes was eaten, at the end of a day.
+
+        Returns:
+            The fraction of cave capacity taken, the number of full caves, the fraction of bush
+            calories eaten and the number of bushes eaten bare.
+        """
+        capacity = sum(cave.max_capacity for cave in self.caves)
+        calories = sum(bush.max_calories for bush in self.bushes)
+        return {
+            "cave_fill": sum(len(cave.occupants) for cave in self.caves) / capacity if capacity > 0 else 0.0,
+            "full_caves": sum(1 for cave in self.caves if cave.is_full),
+            "bush_depletion": 1 - sum(bush.current_calories for bush in self.bushes) / calories if calories > 0 else 0.0,
+            "empty_bushes": sum(1 for bush in self.bushes if bush.current_calories == 0),
+        }
+
+    def cave_contention(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Gets the contention at each cave over the day, for engines that count it.
+
+        Returns:
+            The value at each cave in the order of self.caves, keyed by CAVE_STATS with a NaN fill time
+            for caves that did not fill up, or None if the engine does not count contention.
+        """
+        if not isinstance(self.engine, ArrayEngine):
+            return None
+        contention = {stat: np.zeros(len(self.caves)) for stat in CAVE_STATS}
+        contention["fill_time"][:] = np.nan
+        for k, cave in enumerate(self.caves):
+            for stat, value in self.engine.cave_stats.get(cave.id, {}).items():
+                contention[stat][k] = np.nan if value is None else value
+        return contention
+
+    @property
+    def stopped(self) -> bool:
+        """
+        Tells if a stop condition of the config was met, after which stepping does nothing.
+        """
+        return self.summary.stop_reason is not None
+
+    def save_checkpoint(self, day: int):
+        """
+        Snapshots the world at the end of a day and hands it to the checkpoint writer.
+
+        Args:
+            day: The day that just ended, 0 for the initial world.
+        """
+        if self.store is not None:
+            self.writer.submit(day, lambda: {
+                field: np.array(values) for field, values in CheckpointStore.agent_columns(self.agents).items()
+            })
+        else:
+            self.writer.submit(day, lambda: {
+                **self.static_json, "agents": [agent.to_json() for agent in self.agents]
+            })
+
+    def save_frames(self, day: int):
+        """
+        Hands the frames recorded during a day, with the day's gene histograms, to the checkpoint writer.
+        Does nothing unless frames are being recorded.
+
+        Args:
+            day: The day that just ended, 0 for the initial world.
+        """
+        if self.frames is not None:
+            histograms = {gene: self.summary.histograms[gene][-1] for gene in GENES}
+            self.writer.submit(day, lambda: self.frames.take(histograms), self.frames.write)
 
-                # print(f"completed day {current_day} of {NUM_DAYS} (Population: {len(self.agents)})")
+    def write_checkpoint(self, day: int, snapshot):
+        """
+        Writes a snapshot taken by save_checkpoint with the configured checkpoint backend.
+        Runs on the checkpoint writer's thread.
+
+        Args:
+            day: The day of the snapshot.
+            snapshot: The snapshot.
+        """
+        with PROFILER.section("write_checkpoint"):
+            if self.store is not None:
+                self.store.append(day, snapshot)
+            else:
+                save_json_checkpoint(self.checkpoints, day, snapshot, self.config.checkpoint_compression)
+
+    def remove_checkpoints_after(self, day: int):
+        """
+        Removes the checkpoints after a day, left by a run that got further than the day it is resumed from.
+
+        Args:
+            day: The last day to keep.
+        """
+        if self.store is not None:
+            self.store.truncate(day)
+        else:
+            for checkpoint_day, path in json_checkpoint_files(self.checkpoints).items():
+                if checkpoint_day > day:
+                    path.unlink()
 
+    def save_snapshot(self, day: int):
+        """
+        Snapshots the full state of the world at the end of a day and hands it to the checkpoint
+        writer, which writes it after that day's checkpoint.
+
+        Args:
+            day: The day that just ended.
+        """
+        self.writer.submit(day, lambda: self.snapshot(day), self.write_snapshot)
+
+    def write_snapshot(self, day: int, snapshot: dict):
+        """
+        Writes a snapshot to snapshot.json in the project, replacing the last one only once the new
+        one is complete. Runs on the checkpoint writer's thread.
+
+        Args:
+            day: The day of the snapshot.
+            snapshot: The snapshot.
+        """
+        path = self.project.joinpath("snapshot.json")
+        with PROFILER.section("write_snapshot"):
+            with self.project.joinpath("snapshot.tmp.json").open("wt+") as f:
+                json.dump(snapshot, f)
+            os.replace(self.project.joinpath("snapshot.tmp.json"), path)
+
+    def flush(self):
+        """
+        Waits until every checkpoint taken so far is written.
+        """
+        self.writer.flush()
+
+    def close(self):
+        """
+        Writes every outstanding checkpoint, stops the checkpoint writer and the engine and saves the summary.
+        """
+        self.writer.close()
+        if self.engine is not None:
+            self.engine.close()
+        if self.telemetry is not None:
+            self.telemetry.close()
+        self.summary.save(self.project.joinpath("summary.npz"))
 
     def get_agg_plot(self, file_name):
-        mean_agg = [] # list of mean aggressiveness values per checkpoint
-        std_agg = [] # list of std aggressiveness values per checkpoint 
-        max_agg = [] # list of max aggressiveness values per checkpoint 
-        min_agg = [] # list of min aggressiveness values per checkpoint
-
-        # obtains max aggressiveness, min aggressiveness, mean aggressiveness and std aggressivness for each checkpoint
-        for day in range(NUM_DAYS):
-            aggressive_vals = []
-            with open(self.checkpoints.joinpath(f"checkpoint_{day}.json"), "r") as f:
-                data = json.load(f)
-                for i in range(len(data["agents"])):
-                    aggressive_vals.append(data["agents"][i]["aggressiveness"])
-                mean_agg.append(st.mean(aggressive_vals))
-                std_agg.append(st.stdev(aggressive_vals))
-                max_agg.append(max(aggressive_vals))
-                min_agg.append(min(aggressive_vals))
-            f.close()
-
-        m_agg = np.array(mean_agg)
-        s_agg = np.array(std_agg)
-        mx_agg = np.array(max_agg)
-        mn_agg = np.array(min_agg)
-
-        plt.plot(np.array(range(NUM_DAYS)), m_agg, label="mean aggressiveness", color="yellow")
-        plt.plot(np.array(range(NUM_DAYS)), mx_agg, label="max aggressiveness", color="red")
-        plt.plot(np.array(range(NUM_DAYS)), mn_agg, label="min aggressiveness", color="purple")
-        plt.legend()
-        plt.fill_between(np.array(range(NUM_DAYS)), m_agg - s_agg, m_agg + s_agg, alpha=0.5)
-        plt.xlabel("Checkpoint Day")
-        plt.ylabel("Aggressiveness Value")
-        plt.title("Evolution of Aggressiveness via Mean")
-        plt.savefig(self.project.joinpath(file_name), format="pdf")
-        plt.close()
+        """
+        Plots the mean, max and min aggressiveness of every day.
+
+        Args:
+            file_name: The file in the project to save the plot in.
+        """
+        self.summary.plot_gene("aggressiveness", self.project.joinpath(file_name), *GENE_PLOTS["aggressiveness"])
 
     def get_mem_plot(self, file_name):
-        mean_mem = [] # list of mean memory values per checkpoint
-        std_mem = [] # list of std memory values per checkpoint
-        max_mem = [] # list of maximum max memory values per checkpoint 
-        min_mem = [] # list of minimum max memory values per checkpoint
-
-        # obtains maximum of max memory, minimum of max memory, mean of max memory and std of max memory for each checkpoint
-        for day in range(NUM_DAYS):
-            mem_vals = []
-            with open(self.checkpoints.joinpath(f"checkpoint_{day}.json"), "r") as f:
-                data = json.load(f)
-                for i in range(len(data["agents"])):
-                    mem_vals.append(data["agents"][i]["max_memory"])
-                mean_mem.append(st.mean(mem_vals))
-                std_mem.append(st.stdev(mem_vals))
-                max_mem.append(max(mem_vals))
-                min_mem.append(min(mem_vals))
-            f.close() 
-
-        m_mem = np.array(mean_mem)
-        s_mem = np.array(std_mem)
-        mx_mem = np.array(max_mem)
-        mn_mem = np.array(min_mem)
-
-        plt.plot(np.array(range(NUM_DAYS)), m_mem, label="mean max memory", color="yellow")
-        plt.plot(np.array(range(NUM_DAYS)), mx_mem, label="maximum of max memory", color="red")
-        plt.plot(np.array(range(NUM_DAYS)), mn_mem, label="minumum of max percentage", color="purple")
-        plt.legend()
-        plt.fill_between(np.array(range(NUM_DAYS)), m_mem - s_mem, m_mem + s_mem, alpha=0.5)
-        plt.xlabel("Checkpoint Day")
-        plt.ylabel("Memory Value")
-        plt.title("Evolution of Memory via Mean")
-        plt.savefig(self.project.joinpath(file_name), format="pdf")
-        plt.close()
+        """
+        Plots the mean, maximum and minimum max memory of every day.
+
+        Args:
+            file_name: The file in the project to save the plot in.
+        """
+        self.summary.plot_gene("max_memory", self.project.joinpath(file_name), *GENE_PLOTS["max_memory"])
 
     def get_hvst_plot(self, file_name):
-        mean_hvst = [] # list of mean harvest values per checkpoint
-        std_hvst = [] # list of std harvest values per checkpoint 
-        max_hvst = [] # list of max harvest values per checkpoint 
-        min_hvst = [] # list of min harvest values per checkpoint
-
-         # obtains max hvst, min hvst, mean hvst and std hvst for each checkpoint
-        for day in range(NUM_DAYS):
-            hvst_vals = []
-            with open(self.checkpoints.joinpath(f"checkpoint_{day}.json"), "r") as f:
-                data = json.load(f)
-                for i in range(len(data["agents"])):
-                    hvst_vals.append(data["agents"][i]["harvest_percent"])
-                mean_hvst.append(st.mean(hvst_vals))
-                std_hvst.append(st.stdev(hvst_vals))
-                max_hvst.append(max(hvst_vals))
-                min_hvst.append(min(hvst_vals))
-            f.close() 
-
-        m_hvst = np.array(mean_hvst)
-        s_hvst = np.array(std_hvst)
-        mx_hvst = np.array(max_hvst)
-        mn_hvst = np.array(min_hvst)
-
-        plt.plot(np.array(range(NUM_DAYS)), m_hvst, label="mean harvest percentage", color="yellow")
-        plt.plot(np.array(range(NUM_DAYS)), mx_hvst, label="max harvest percentage", color="red")
-        plt.plot(np.array(range(NUM_DAYS)), mn_hvst, label="min harvest percentage", color="purple")
-        plt.legend()
-        plt.fill_between(np.array(range(NUM_DAYS)), m_hvst - s_hvst, m_hvst + s_hvst, alpha=0.5)
-        plt.xlabel("Checkpoint Day")
-        plt.ylabel("Harvest Percentage")
-        plt.title("Evolution of Harvest Percentage via Mean")
-        plt.savefig(self.project.joinpath(file_name), format="pdf")
-        plt.close()
+        """
+        Plots the mean, max and min harvest percentage of every day.
+
+        Args:
+            file_name: The file in the project to save the plot in.
+        """
+        self.summary.plot_gene("harvest_percent", self.project.joinpath(file_name), *GENE_PLOTS["harvest_percent"])
 
     def plot_population(self, file_name):
-        pop_val = [] # stores populations at each checkpoint 
-        for day in range(NUM_DAYS):
-            with open(self.checkpoints.joinpath(f"checkpoint_{day}.json"), "r") as f:
-                data = json.load(f)
-                pop_val.append(len(data["agents"]))
-            f.close() 
-
-        p_vals = np.array(pop_val)
-        plt.plot(np.array(range(NUM_DAYS)), p_vals)
-        plt.xlabel("Checkpoint Day")
-        plt.ylabel("Total Population")
-        plt.title("Total Population across Checkpoints")
-        plt.savefig(self.project.joinpath(file_name), format="pdf")
-        plt.close()
+        """
+        Plots the population of every day.
+
+        Args:
+            file_name: The file in the project to save the plot in.
+        """
+        self.summary.plot_population(self.project.joinpath(file_name))
@@ -5,6 +5,9 @@ class WorldEntity(ABC):
     """
     Represents an entity in the world with a given position
     """
+    # Subclasses declare their own slots, including the position
+    __slots__ = ("grid",)
+
     def __init__(self, pos: Position) -> None:
         """
         Initializes world entity with a position
@@ -13,6 +16,8 @@ class WorldEntity(ABC):
             pos: The position to start with
         """
         super().__init__()
+        # Spatial index the entity is in, if any
+        self.grid = None
         self.pos: Position = pos
 
     @abstractmethod
@@ -1,38 +1,108 @@
 from datetime import datetime
-import ProjectParameters
-from ProjectParameters import *
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from World import World
+from Render import render
+from ActiveSet import PHASES
+from RandomStreams import RNG
+from Profiler import PROFILER
+from Ensemble import Ensemble, METRICS
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
 from tqdm import tqdm
+import itertools
 from argparse import ArgumentParser
 from pathlib import Path
 import json
 
+
+def run(world: World):
+    """
+    Runs a single world from the day it is at to the last day and makes its plots.
+
+    Args:
+        world: The world to run.
+    """
+    config = world.config
+    steps = range(world.start_day * config.steps_per_day, config.num_days * config.steps_per_day)
+    try:
+        if config.visualize and not config.as_mp4:
+            frames = itertools.takewhile(lambda t: not world.stopped, steps)
+            ani = animation.FuncAnimation(world.fig, world.step, frames, interval=20, repeat=False,
+                                          save_count=len(steps))
+            plt.show()
+        else:
+            progress = tqdm(steps, leave=True)
+            for t in progress:
+                world.step(t)
+                if t % config.steps_per_day == config.steps_per_day - 1:
+                    # Mean number of agents stepped in the morning, midday and evening of the day
+                    active = "/".join(f"{world.summary.active[phase][-1]:.0f}" for phase in PHASES)
+                    progress.set_postfix(checkpoint_queue=world.writer.depth, active=active)
+                    if world.stopped:
+                        break
+    finally:
+        # Also reached on Ctrl-C, so the checkpoints taken so far are not lost
+        world.close()
+        print(world.writer.report())
+        if PROFILER.enabled:
+            # Every day's breakdown is in profile.txt, profile.folded is for flame graph tools
+            PROFILER.write(world.project)
+            print(PROFILER.report())
+    if world.stopped:
+        print(f"Stopped after day {world.summary.stop_day}: {world.summary.stop_reason}")
+    print("Ending Time =", datetime.now().strftime("%H:%M:%S"))
+    world.summary.plot_all(world.project)
+    if config.visualize and config.as_mp4:
+        # Rendered from the frames recorded during the run, which ran at full speed
+        print(f"Saved {render(world.project)}")
+
+
 if __name__ == "__main__":
     args = ArgumentParser("Runs a Genetic Algorithm to Approximate the Iterated Prisoner's Experiment")
     args.add_argument("project", help="The name of the project to save this as.")
+    args.add_argument("--config", help="params.json of an earlier run to take the config from, defaults to ProjectParameters.")
+    args.add_argument("--resume", action="store_true", help="Carry on the run in the project from its last snapshot.")
+    args.add_argument("--seed", type=int, help="The seed to run with, overrides SEED.")
+    args.add_argument("--replicas", type=int, default=1, help="Number of independently seeded replicas to run as an ensemble.")
+    args.add_argument("--workers", type=int, help="Number of processes to run replicas on, defaults to the number of cores.")
+    args.add_argument("--target-width", type=float, help="Keep adding replicas until the 95%% confidence interval of the metrics is narrower than this.")
+    args.add_argument("--metrics", nargs="+", default=["aggressiveness"], choices=METRICS, help="Metrics the target width applies to.")
+    args.add_argument("--max-replicas", type=int, default=100, help="Most replicas to run with a target width.")
+    args.add_argument("--profile", action="store_true", help="Time each phase of a single run and write profile.txt and profile.folded to the project.")
     args = args.parse_args()
+    if args.profile and (args.replicas > 1 or args.target_width is not None):
+        args.error("--profile only applies to a single run")
+    if args.profile:
+        PROFILER.enable()
 
+    config = DEFAULT_CONFIG
+    if args.config is not None:
+        with open(args.config, "r") as f:
+            config = SimulationConfig.from_json(json.load(f))
+    if args.seed is not None:
+        config = config.replace(seed=args.seed)
     project = Path("../").joinpath(args.project)
 
-    world = World(project)
     print("Starting Time =", datetime.now().strftime("%H:%M:%S"))
-    if VISUALIZE:
-        ani = animation.FuncAnimation(world.fig, world.step, NUM_DAYS * STEPS_PER_DAY, interval=20, repeat=False)
-        if AS_MP4:
-            FFwriter = animation.FFMpegWriter(fps=50)
-            ani.save(project.joinpath("animation.mp4"), writer = FFwriter)
-        else:
-            plt.show()
+    if args.resume:
+        with project.joinpath("snapshot.json").open("r") as f:
+            world = World.from_snapshot(project, json.load(f))
+        print(f"Resuming from day {world.start_day}")
+        run(world)
+    elif args.replicas > 1 or args.target_width is not None:
+        ensemble = Ensemble(project, config)
+        # Replicas save their own exact config, this one holds the seed they were spawned from
+        with project.joinpath("params.json").open("wt+") as f:
+            json.dump(ensemble.config.to_json(), f, indent=2)
+        ensemble.run(args.replicas, args.workers, args.target_width, args.metrics, args.max_replicas)
+        print("Ending Time =", datetime.now().strftime("%H:%M:%S"))
+        print(f"Ran {len(ensemble.results)} replicas")
+        ensemble.plot_all()
     else:
-        for t in tqdm(range(NUM_DAYS * STEPS_PER_DAY), leave=True):
-            world.step(t)
-    print("Ending Time =", datetime.now().strftime("%H:%M:%S"))
-    world.get_agg_plot("Aggressiveness_Evolution.pdf")
-    world.get_mem_plot("Memory_Evolution.pdf")
-    world.get_hvst_plot("Harvest_Percentage_Evolution.pdf")
-    world.plot_population("Total Population across Checkpoints.pdf")
-    with project.joinpath("params.json").open("wt+") as f:
-        json.dump({v: eval(v) for v in dir(ProjectParameters) if not v.startswith("__")}, f, indent=2)
-    
+        RNG.reseed(config.seed)
+        # Record the seed actually used so the run can be reproduced
+        config = config.replace(seed=RNG.seed)
+        world = World(project, config=config)
+        with project.joinpath("params.json").open("wt+") as f:
+            json.dump(config.to_json(), f, indent=2)
+        run(world)
@@ -0,0 +1,12 @@
+import test_setup
+import pytest
+from Agent import AgentCounter
+from BerryBush import BushCounter
+from Cave import CaveCounter
+
+
+@pytest.fixture(autouse=True)
+def counters(monkeypatch):
+    # Keep entity numbering unchanged for the other test modules
+    for counter in (AgentCounter, BushCounter, CaveCounter):
+        monkeypatch.setattr(counter, "count", counter.count)
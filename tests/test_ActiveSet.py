@@ -0,0 +1,52 @@
+import pytest
+import test_setup
+
+from ActiveSet import ActiveSet, phase_of
+from Agent import Agent
+from Cave import Cave
+from Position import Position
+from SimulationConfig import DEFAULT_CONFIG
+
+
+@pytest.fixture
+def agents():
+    return [Agent(Position(i, i), 0.5, 0.5, 5) for i in range(5)]
+
+
+def test_sleeping_agents_are_skipped(agents):
+    cave = Cave(Position(0, 0), 2)
+    agents[1].sleep()
+    active = ActiveSet(agents)
+    assert len(active) == 4 and agents[1] not in active, "Agents asleep should not be active."
+    cave.append(agents[3])
+    assert list(active) == [agents[0], agents[2], agents[4]], "Agents entering a cave should leave the set."
+    for agent in agents:
+        agent.reset()
+    assert list(active) == agents, "Every agent should be active at the start of a day."
+
+
+def test_waking_during_a_step(agents):
+    for agent in agents[1:]:
+        agent.sleep()
+    active = ActiveSet(agents)
+    stepped = []
+    for agent in active:
+        stepped.append(agent)
+        if agent is agents[0]:
+            # Kicked out of their caves by the agent stepping now
+            agents[3].wake()
+            agents[2].wake()
+            agents[2].sleep()
+            agents[2].wake()
+        elif agent is agents[3]:
+            agents[0].wake()
+            agents[0].sleep()
+    assert stepped == [agents[0], agents[2], agents[3]], \
+        "Agents woken later in order should still step once, in order."
+    assert list(active) == [agents[2], agents[3]]
+
+
+def test_phase_of():
+    config = DEFAULT_CONFIG.replace(steps_per_day=100, morning_percent=0.2, evening_percent=0.3)
+    assert [phase_of(t, config) for t in (0, 19, 20, 70, 71, 99)] == \
+        ["morning", "morning", "midday", "midday", "evening", "evening"]
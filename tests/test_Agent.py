@@ -2,7 +2,7 @@ import pytest
 from ProjectParameters import FIGHT_CAL_COST, WALK_CAL_COST
 import test_setup
 
-from collections import OrderedDict
+from Memory import Memory
 from Position import Position
 import Agent as _Agent
 from Agent import Agent, AgentCounter
@@ -48,7 +48,7 @@ def test_agent_action_state_transition(basic_agent):
 
 @pytest.mark.parametrize("entity,expected_memory_len", [
     (BerryBush(Position(1, 1), 100), 1),
-    (Cave(Position(2, 2),100), 2)
+    (Cave(Position(2, 2),100), 1)
 ])
 def test_agent_add_memory(basic_agent, entity, expected_memory_len):
     basic_agent.add_memory(entity)
@@ -77,5 +77,50 @@ def test_agent_json_deserialization():
     assert agent.harvest_percent == 0.5, "Deserialized agent should have correct harvest percent."
     assert agent.max_memory == 5, "Deserialized agent should have correct max memory."
 
+def test_memory_kinds_follow_memory():
+    agent = Agent(Position(0, 0), 0.5, 0.5, 5, Memory())
+    bushes = [BerryBush.from_json({"x": i, "y": i, "max_calories": 100}) for i in range(agent.max_memory + 1)]
+    for bush in bushes:
+        agent.add_memory(bush)
+    assert bushes[0] not in agent.memory.of_kind(BerryBush), "Evicted memories should leave the kind index."
+    assert agent.memory.of_kind(BerryBush) == set(bushes[1:]), "Kind index should match memory."
+    assert len(agent.memory.of_kind(Agent)) == 0, "Kinds that were never remembered should be empty."
+
+def test_goal_kinds():
+    assert Agent.goal_kinds(0) == (BerryBush,), "Agents should look for bushes in the morning."
+    assert Agent.goal_kinds(125) == (BerryBush, Agent), "Agents should look for bushes and agents at midday."
+    assert Agent.goal_kinds(249) == (Cave,), "Agents should look for caves in the evening."
+
+def test_choose_goal_by_phase():
+    agent = Agent(Position(0, 0), 0.5, 0.5, 5, Memory())
+    bush = BerryBush.from_json({"x": 1, "y": 1, "max_calories": 100})
+    cave = Cave.from_json({"x": 2, "y": 2, "max_capacity": 3})
+    view = Agent.split_by_kind([bush, cave])
+    agent.choose_goal(view, 249)
+    assert agent.goal is cave and agent.action_state == ActionSpace.GoTo, "Evening goal should be a cave."
+    agent.goal, agent.action_state = None, ActionSpace.Wander
+    agent.seen_today = {bush}
+    agent.choose_goal(view, 0)
+    assert agent.goal is None and agent.action_state == ActionSpace.Wander, "Bushes seen today should not be chosen."
+
+def test_survivals_match_survived():
+    agents = [Agent(Position(i, i), i / 10, 0.5, i, Memory()) for i in range(10)]
+    for i, agent in enumerate(agents):
+        agent.calories = i * 300
+        agent.calories_burned_for_exercise = 100 * (i % 3)
+        if i % 4 != 0:
+            agent.sleep()
+    assert Agent.survivals(agents).tolist() == [agent.survived for agent in agents], "Batched survival should match survived."
+    assert len(Agent.survivals([])) == 0, "No agents should give no survivals."
+
+def test_breed_is_bounded():
+    low = Agent(Position(0, 0), 0.0, 0.0, 0, Memory())
+    high = Agent(Position(1, 1), 1.0, 1.0, 10, Memory())
+    children = Agent.breed([low, high, low], [low, high, high])
+    assert [child.pos for child in children] == [low.pos, high.pos, low.pos], "Children should start at their first parent."
+    for child in children:
+        assert child.is_well_bounded(child.aggressiveness, child.harvest_percent, child.max_memory), "Genes should be clamped."
+    assert abs(children[2].aggressiveness - 0.5) <= 0.1 and 3 <= children[2].max_memory <= 7, "Genes should be averaged then mutated."
+
 if __name__ == "__main__":
     pytest.main()
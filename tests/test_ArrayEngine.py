@@ -0,0 +1,123 @@
+import pytest
+import test_setup
+
+import numpy as np
+from ProjectParameters import STEPS_PER_DAY, MAP_SIZE, WALK_CAL_COST, FIGHT_CAL_COST
+from ActionSpace import ActionSpace
+from Agent import Agent
+from ArrayEngine import ArrayEngine
+from AgentArrays import AgentArrays, GOAL_BUSH, GOAL_AGENT, GOAL_NONE
+from BerryBush import BerryBush
+from Cave import Cave
+from Position import Position
+from World import World
+
+
+@pytest.fixture
+def entities():
+    caves = [Cave(Position(10, 10), 4), Cave(Position(40, 40), 4)]
+    bushes = [BerryBush(Position(12, 12), 1000), BerryBush(Position(38, 38), 1000)]
+    agents = [Agent(Position(i * 5, i * 5), 0.5, 0.5, 5) for i in range(10)]
+    return caves, bushes, agents
+
+
+def test_arrays_round_trip(entities):
+    caves, bushes, agents = entities
+    agents[0].goal = bushes[1]
+    agents[0].action_state = ActionSpace.GoTo
+    agents[1].goal = agents[2]
+    agents[1].action_state = ActionSpace.GoTo
+    agents[2].wander_spot = Position(3, 4)
+    agents[3].calories = 12.5
+    state = AgentArrays(agents, caves, bushes)
+    assert state.goal_kind[0] == GOAL_BUSH and state.goal_index[0] == 1, "Bush goals should be stored by index."
+    assert state.goal_kind[1] == GOAL_AGENT and state.goal_index[1] == 2, "Agent goals should be stored by index."
+    assert state.goal_kind[2] == GOAL_NONE, "Agents without a goal should have no goal kind."
+    state.x[2] = 7
+    exported = state.to_agents()
+    assert exported[0].goal is bushes[1], "Goal should be restored as the same entity."
+    assert exported[1].goal is agents[2], "Agent goal should be restored as the same agent."
+    assert exported[2].wander_spot == Position(3, 4), "Wander spot should survive the round trip."
+    assert exported[2].pos == Position(7, 10), "Array changes should be exported to the objects."
+    assert exported[3].calories == 12.5, "Calories should survive the round trip."
+
+
+def test_goal_positions_follow_agents(entities):
+    caves, bushes, agents = entities
+    agents[0].goal = agents[4]
+    agents[0].action_state = ActionSpace.GoTo
+    state = AgentArrays(agents, caves, bushes)
+    state.x[4] = 33
+    gx, gy = state.goal_positions()
+    assert gx[0] == 33 and gy[0] == 20, "Agent goal positions should track the goal agent."
+    assert np.isnan(gx[1]), "Agents without goals should have no goal position."
+
+
+def test_walk_matches_position(tmp_path, entities):
+    caves, bushes, agents = entities
+    world = World(tmp_path.joinpath("project"), caves, bushes, agents, engine="array")
+    state = world.engine.state
+    target = Position(3, 4)
+    expected = agents[0].pos.step_toward(target)
+    mask = np.zeros(len(state), dtype=bool)
+    mask[0] = True
+    world.engine.walk(mask, np.full(len(state), 3.0), np.full(len(state), 4.0))
+    assert state.x[0] == pytest.approx(expected.x) and state.y[0] == pytest.approx(expected.y), "Batched walk should match Position.step_toward."
+    assert state.calories_burned_for_exercise[0] == WALK_CAL_COST, "Walking should cost calories."
+    assert state.calories_burned_for_exercise[1] == 0, "Unmasked agents should not move."
+
+
+def test_array_world_runs_a_day(tmp_path, entities):
+    caves, bushes, agents = entities
+    agents[0].add_memory(BerryBush(Position(1, 1), 100))
+    world = World(tmp_path.joinpath("project"), caves, bushes, agents, engine="array")
+    for t in range(STEPS_PER_DAY):
+        world.step(t)
+    x, y = world.get_agent_pos()
+    assert len(x) == len(world.agents), "Array state should be rebuilt for the surviving agents."
+    assert np.all((0 <= x) & (x <= MAP_SIZE)) and np.all((0 <= y) & (y <= MAP_SIZE)), "Agents should stay on the map."
+    assert tmp_path.joinpath("project", "checkpoints", "checkpoint_1.json").exists(), "Day end should checkpoint."
+    encounters = {stat: values[-1] for stat, values in world.summary.encounters.items()}
+    assert encounters["encounters"] == encounters["share_share"] + encounters["steal_share"] + encounters["steal_steal"], \
+        "The day's encounters should be recorded with their outcomes."
+    for cave_id, stats in world.engine.cave_stats.items():
+        assert cave_id in {cave.id for cave in caves}, "Cave stats should be kept by cave ID."
+        assert stats["arrivals"] >= stats["evictions"], "Every eviction needs an arrival."
+    arrivals = world.summary.cave_stat("arrivals")
+    assert arrivals.shape == (2, len(caves)) and np.all(np.isnan(arrivals[0])), "Contention should be recorded from the first day."
+    assert arrivals[1].tolist() == [world.engine.cave_stats.get(cave.id, {}).get("arrivals", 0) for cave in caves], \
+        "The day's contention should be recorded cave by cave."
+
+
+def test_match_meets_each_agent_once():
+    matched = ArrayEngine.match([0, 2, 3, 5, 6], [1, 1, 4, 3, 7])
+    assert matched == [0, 2, 4], "Later encounters with an agent already meeting someone should wait."
+
+
+def test_meet_resolves_encounters(tmp_path, entities):
+    caves, bushes, agents = entities
+    # Agent 1 was stolen from by agent 0 so always steals back, agent 0 has never met agent 1
+    agents[1].add_memory(agents[0], "steal")
+    for i, j in ((0, 1), (2, 1), (3, 4)):
+        agents[i].goal = agents[j]
+        agents[i].action_state = ActionSpace.GoTo
+    for agent in agents:
+        agent.aggressiveness = 0.5
+        agent.calories = 10
+    world = World(tmp_path.joinpath("project"), caves, bushes, agents, engine="array")
+    state = world.engine.state
+    stats = world.engine.meet(np.array([0, 2, 3]))
+    assert stats == {"encounters": 2, "share_share": 1, "steal_share": 1, "steal_steal": 0}, "Outcomes should be counted."
+    assert state.calories[1] == 20 and state.calories[0] == 0, "The aggressor should take everything."
+    assert state.calories_burned_for_exercise[1] == FIGHT_CAL_COST, "Stealing should cost a fight."
+    assert state.calories[3] == state.calories[4] == 10, "Sharing should split the calories."
+    assert state.goal_kind[0] == GOAL_NONE and state.action_state[0] == ActionSpace.Wander.value, "Initiators should be done."
+    assert state.goal_kind[2] == GOAL_AGENT, "Agents left out of the matching should keep their goal."
+    assert agents[0].memory[agents[1]] == "steal" and agents[1].memory[agents[0]] == "share", "Encounters should be remembered."
+    assert agents[3] in agents[4].seen_today, "Met agents should be seen."
+
+
+def test_unknown_engine(tmp_path, entities):
+    caves, bushes, agents = entities
+    with pytest.raises(ValueError):
+        World(tmp_path.joinpath("project"), caves, bushes, agents, engine="gpu")
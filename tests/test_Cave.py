@@ -34,7 +34,7 @@ def test_new_cave(new_cave):
     assert new_cave.pos == Position(0,0), "Position should be 0,0."
     assert new_cave.max_capacity == 2, "Max Capacity should match initializations max capacity."
     assert new_cave.occupants == set(), "Occupants set should be empty."
-    assert new_cave.name == "Cave 1", "Cave name should equal 'Cave {#}'"
+    assert new_cave.name == "Cave 0", "The first cave after a reset should be numbered 0."
 
 def test_append_cave_with_aggressive_agent(new_cave, aggressive_agent):
     new_cave.append(aggressive_agent)
@@ -62,4 +62,21 @@ def test_cave_memory_interaction(aggressive_agent, peaceful_agent):
     aggressive_agent.interact_agent(peaceful_agent)
     # Check memory addition based on interaction
     assert peaceful_agent in aggressive_agent.memory, "Peaceful agent should be in aggressive agent's memory after interaction."
-    assert aggressive_agent in peaceful_agent.memory, "Aggressive agent should be in peaceful agent's memory after interaction."
\ No newline at end of file
+    assert aggressive_agent in peaceful_agent.memory, "Aggressive agent should be in peaceful agent's memory after interaction."
+
+
+def test_admit_resolves_arrivals_together(new_cave, peaceful_agent):
+    new_cave.append(peaceful_agent)
+    arrivals = [Agent(Position(i, i), aggressiveness=1.0, harvest_percent=0.5, max_memory=5) for i in range(3)]
+    # Remembering being stolen from makes the arrivals always fight
+    for agent in arrivals:
+        agent.add_memory(peaceful_agent, "steal")
+    new_cave.max_capacity = 1
+    evicted, stats = new_cave.admit(arrivals)
+    assert evicted == [peaceful_agent] and new_cave.occupants == {arrivals[0]}, "The first to beat the rival should kick it out."
+    assert stats == {"arrivals": 3, "fights": 3, "evictions": 1}, "A rival can only be kicked out once."
+    assert arrivals[1].action_state != ActionSpace.Sleep, "Arrivals left out should stay awake."
+    assert peaceful_agent.action_state == ActionSpace.Sleep, "Evicted agents should be left for the caller to wake."
+    new_cave.max_capacity = 3
+    evicted, stats = new_cave.admit(arrivals[1:])
+    assert evicted == [] and len(new_cave.occupants) == 3, "Arrivals should take the free places."
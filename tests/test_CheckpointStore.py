@@ -0,0 +1,78 @@
+import pytest
+import test_setup
+
+import json
+import numpy as np
+from pathlib import Path
+from CheckpointStore import CheckpointStore, load_json_checkpoint
+from SimulationConfig import DEFAULT_CONFIG
+from World import World
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(tmp_path.joinpath("store"))
+    store.write_static([{"x": 1, "y": 2, "max_capacity": 5}], [{"x": 3, "y": 4, "max_calories": 1000}])
+    store.append(0, {"aggressiveness": [0.1, 0.2, 0.3], "harvest_percent": [0.5] * 3, "max_memory": [1, 2, 3],
+                     "x": [0, 1, 2], "y": [0, 1, 2], "calories": [0, 0, 0]})
+    store.append(1, {"aggressiveness": [0.4], "harvest_percent": [0.6], "max_memory": [4],
+                     "x": [5], "y": [5], "calories": [10]})
+    return store
+
+
+def test_field_across_days(store):
+    values = store.field("aggressiveness")
+    assert [v.tolist() for v in values] == [[0.1, 0.2, 0.3], [0.4]], "Each day should get its own agents."
+    assert store.population() == [3, 1], "Population should come from the index."
+
+
+def test_reopen(store):
+    reopened = CheckpointStore(store.directory)
+    assert reopened.days() == [0, 1], "The index should be saved."
+    assert reopened.day(1)["max_memory"].tolist() == [4], "Days should be readable after reopening."
+    with pytest.raises(ValueError):
+        reopened.append(1, {"x": [1]})
+
+
+def test_to_json(store):
+    data = store.to_json(0)
+    assert data["caves"] == [{"x": 1, "y": 2, "max_capacity": 5}], "Caves should come from the static file."
+    assert data["agents"][2] == {"max_memory": 3, "aggressiveness": 0.3, "harvest_percent": 0.5, "x": 2, "y": 2}
+
+
+def test_import_json_checkpoints(tmp_path):
+    checkpoints = Path(__file__).parent.parent.joinpath("experiment1", "checkpoints")
+    store = CheckpointStore.from_json_checkpoints(checkpoints, tmp_path.joinpath("store"))
+    with checkpoints.joinpath("checkpoint_10.json").open("r") as f:
+        data = json.load(f)
+    assert store.days() == list(range(101)), "Every checkpoint should be imported in order of day."
+    assert store.to_json(10) == data, "Imported days should rebuild the same checkpoint."
+    assert np.all(np.isnan(store.field("calories")[10])), "Calories are not in JSON checkpoints."
+
+
+def test_world_columnar_backend(tmp_path):
+    config = DEFAULT_CONFIG.replace(checkpoint_backend="columnar", engine="array", init_num_agents=20)
+    world = World(tmp_path.joinpath("world"), [], [], [], config=config)
+    for t in range(config.steps_per_day):
+        world.step(t)
+    world.close()
+    assert world.store.days() == [0, 1], "The initial world and the end of the day should be stored."
+    assert not list(world.checkpoints.glob("*.json")), "No JSON checkpoints should be written."
+    assert world.store.to_json(1)["agents"] == [agent.to_json() for agent in world.agents]
+
+
+def test_compressed_json_checkpoints(tmp_path):
+    config = DEFAULT_CONFIG.replace(checkpoint_compression=True, init_num_agents=20)
+    world = World(tmp_path.joinpath("world"), [], [], [], config=config)
+    world.close()
+    assert world.checkpoints.joinpath("checkpoint_0.json.gz").exists(), "Checkpoints should be gzipped."
+    assert load_json_checkpoint(world.checkpoints, 0) == world.to_json(), "Gzipped checkpoints should load."
+    store = CheckpointStore.from_json_checkpoints(world.checkpoints, tmp_path.joinpath("store"))
+    assert store.days() == [0], "Gzipped checkpoints should be imported."
+
+
+def test_truncate(store):
+    store.truncate(0)
+    assert store.days() == [0] and store.column("x").tolist() == [0, 1, 2], "Later days should be removed."
+    store.append(1, {"x": [7], "y": [7]})
+    assert CheckpointStore(store.directory).field("x")[1].tolist() == [7], "Days should append after truncating."
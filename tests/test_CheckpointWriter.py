@@ -0,0 +1,47 @@
+import pytest
+import test_setup
+
+import threading
+from CheckpointWriter import CheckpointWriter
+
+
+def test_writes_in_order_after_flush():
+    written = []
+    writer = CheckpointWriter(lambda day, data: written.append((day, data)), 2)
+    for day in range(10):
+        writer.submit(day, lambda: [day])
+    writer.flush()
+    assert written == [(day, [day]) for day in range(10)], "Every snapshot should be written in order."
+    writer.close()
+    assert writer.checkpoints == 10 and writer.max_depth <= 2, "Queue depth should stay within its bound."
+    assert "Checkpoints: 10" in writer.report()
+
+
+def test_full_queue_blocks():
+    release = threading.Event()
+    writer = CheckpointWriter(lambda day, data: release.wait(), 1)
+    writer.submit(0, lambda: None)
+    writer.submit(1, lambda: None)
+    timer = threading.Timer(0.1, release.set)
+    timer.start()
+    writer.submit(2, lambda: None)
+    writer.close()
+    assert writer.blocked_seconds > 0.05, "Time waiting on a full queue should be reported."
+
+
+def test_synchronous():
+    written = []
+    writer = CheckpointWriter(lambda day, data: written.append(day), 0)
+    writer.submit(3, lambda: None)
+    assert written == [3] and writer.thread is None, "A queue size of 0 should write in the step loop."
+
+
+def test_errors_are_raised():
+    def fail(day, data):
+        raise OSError("disk full")
+    writer = CheckpointWriter(fail, 2)
+    writer.submit(0, lambda: None)
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    with pytest.raises(RuntimeError):
+        writer.close()
@@ -0,0 +1,62 @@
+import pytest
+import test_setup
+
+import json
+import os
+import numpy as np
+from Dataset import Dataset, ingest
+
+
+def write_project(project, days):
+    checkpoints = project.joinpath("checkpoints")
+    checkpoints.mkdir(parents=True, exist_ok=True)
+    for day, aggressiveness in days.items():
+        agents = [{"max_memory": 5, "aggressiveness": a, "harvest_percent": 0.5, "x": 0, "y": 0} for a in aggressiveness]
+        with checkpoints.joinpath(f"checkpoint_{day}.json").open("wt+") as f:
+            json.dump({"caves": [], "bushes": [], "agents": agents}, f)
+    with project.joinpath("params.json").open("wt+") as f:
+        json.dump({"FIGHT_CAL_COST": 10}, f)
+
+
+@pytest.fixture
+def projects(tmp_path):
+    write_project(tmp_path.joinpath("control"), {0: [0.2, 0.4], 1: [0.6], 2: []})
+    write_project(tmp_path.joinpath("experiment"), {0: [0.1, 0.3, 0.5], 1: [0.7, 0.9]})
+    return [tmp_path.joinpath("control"), tmp_path.joinpath("experiment")]
+
+
+def test_ingest_and_query(projects, tmp_path):
+    cache = tmp_path.joinpath("cache")
+    assert ingest(projects, cache, workers=2) == {"control": 3, "experiment": 2}
+    dataset = Dataset.load(cache)
+    days, means = dataset.trajectory("control", "aggressiveness")
+    assert days.tolist() == [0, 1, 2] and means[:2] == pytest.approx([0.3, 0.6]), "Means should be per day."
+    assert np.isnan(means[2]), "A day with no agents has no mean."
+    assert dataset.population("control")[1].tolist() == [2, 1, 0], "Extinct days should keep a population of 0."
+    assert dataset.trajectory("experiment", "aggressiveness", "std")[1][0] == pytest.approx(0.2)
+    days, table = dataset.side_by_side("aggressiveness", "max")
+    assert days.tolist() == [0, 1, 2] and table[1].tolist()[:2] == pytest.approx([0.5, 0.9])
+    assert np.isnan(table[1, 2]), "Days an experiment does not have should be NaN."
+    assert dataset.agents("experiment", 1)["aggressiveness"].tolist() == [0.7, 0.9]
+    assert dataset.params["control"] == {"FIGHT_CAL_COST": 10}
+
+
+def test_reingest_reads_only_changes(projects, tmp_path):
+    cache = tmp_path.joinpath("cache")
+    ingest(projects, cache, workers=2)
+    assert ingest(projects, cache, workers=2) == {"control": 0, "experiment": 0}, "Nothing changed."
+    write_project(projects[1], {1: [0.2]})
+    changed = projects[1].joinpath("checkpoints", "checkpoint_1.json")
+    # Make sure the modification time moves even on coarse clocks
+    os.utime(changed, ns=(changed.stat().st_atime_ns, changed.stat().st_mtime_ns + 10**9))
+    assert ingest(projects, cache, workers=2) == {"control": 0, "experiment": 1}, "Only the changed day is read."
+    dataset = Dataset.load(cache)
+    assert dataset.trajectory("experiment", "aggressiveness")[1] == pytest.approx([0.3, 0.2])
+
+
+def test_hash_ignores_touch(projects, tmp_path):
+    cache = tmp_path.joinpath("cache")
+    ingest(projects, cache, workers=2, use_hash=True)
+    touched = projects[0].joinpath("checkpoints", "checkpoint_0.json")
+    os.utime(touched, ns=(touched.stat().st_atime_ns, touched.stat().st_mtime_ns + 10**9))
+    assert ingest(projects, cache, workers=2, use_hash=True)["control"] == 0, "Content did not change."
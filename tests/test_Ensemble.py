@@ -0,0 +1,77 @@
+import pytest
+import test_setup
+
+import numpy as np
+from Ensemble import Ensemble, METRICS, run_replica, t_critical
+from SimulationConfig import SimulationConfig
+
+
+@pytest.fixture
+def ensemble(tmp_path):
+    ensemble = Ensemble(tmp_path.joinpath("ensemble"), SimulationConfig(seed=4100))
+    for replica, (population, aggressiveness) in enumerate([(10, 0.4), (12, 0.6), (0, np.nan)]):
+        ensemble.add(replica, {
+            "population": np.array([10, population]),
+            "aggressiveness": np.array([0.5, aggressiveness]),
+            "harvest_percent": np.array([0.5, 0.5]),
+            "max_memory": np.array([5, 5]),
+        })
+    return ensemble
+
+
+def test_t_critical():
+    assert t_critical(1) == 12.706, "One degree of freedom should use the table."
+    assert t_critical(1000) == 1.96, "Many degrees of freedom should use the normal value."
+
+
+def test_band_skips_extinct_replicas(ensemble):
+    mean, low, high = ensemble.band("aggressiveness")
+    assert mean[1] == pytest.approx(0.5), "Extinct replicas should not count towards gene means."
+    assert high[1] - low[1] == pytest.approx(2 * 12.706 * np.std([0.4, 0.6], ddof=1) / np.sqrt(2)), \
+        "Interval should use the t value for the replicas with data."
+    assert low[0] == high[0] == 0.5, "Identical replicas should have no spread."
+
+
+def test_converged(ensemble):
+    assert ensemble.converged(0.1, ["harvest_percent"]), "Constant metrics should converge."
+    assert not ensemble.converged(0.1, ["aggressiveness"]), "Spread out metrics should not converge."
+
+
+def test_seeds_are_reproducible(tmp_path):
+    first = Ensemble(tmp_path.joinpath("first"), SimulationConfig(seed=4100))
+    second = Ensemble(tmp_path.joinpath("second"), SimulationConfig(seed=4100))
+    seeds = [first.next_seed() for _ in range(3)]
+    assert seeds == [second.next_seed() for _ in range(3)], "The same base seed should spawn the same seeds."
+    assert len(set(seeds)) == 3, "Replica seeds should differ."
+
+
+def test_run_is_reproducible(tmp_path):
+    runs = []
+    for name in ("first", "second"):
+        ensemble = Ensemble(tmp_path.joinpath(name), SimulationConfig(seed=4100, engine="array", num_days=1))
+        ensemble.run(2, workers=2)
+        runs.append(ensemble)
+    assert sorted(runs[0].results) == [0, 1], "Every replica should be aggregated."
+    assert tmp_path.joinpath("first", "ensemble.json").exists(), "The ensemble should be saved."
+    assert tmp_path.joinpath("first", "replica_0", "params.json").exists(), "Each replica should save its config."
+    for replica in range(2):
+        for metric in METRICS:
+            np.testing.assert_array_equal(runs[0].results[replica][metric], runs[1].results[replica][metric])
+
+
+def test_stopped_replica_is_padded(tmp_path):
+    # Without caves nobody can sleep, so every agent dies on the first day
+    config = SimulationConfig(init_num_caves=0, init_num_agents=10, steps_per_day=20, num_days=3)
+    stats = run_replica(tmp_path.joinpath("replica"), 4100, config)
+    assert (stats["stop_day"], stats["stop_reason"]) == (1, "extinction")
+    np.testing.assert_array_equal(stats["population"], [10, 0, 0, 0])
+    assert len(stats["aggressiveness"]) == 4 and np.all(np.isnan(stats["aggressiveness"][1:])), \
+        "Days after an extinction should have no genes."
+
+
+def test_replicas_share_a_process(tmp_path):
+    config = SimulationConfig(init_num_agents=20, steps_per_day=50, num_days=2, stop_on_extinction=False)
+    first = run_replica(tmp_path.joinpath("first"), 4100, config)
+    second = run_replica(tmp_path.joinpath("second"), 4100, config)
+    for metric in METRICS:
+        np.testing.assert_array_equal(first[metric], second[metric], err_msg="Replicas should not depend on the ones run before them.")
@@ -0,0 +1,81 @@
+import pytest
+import test_setup
+
+import numpy as np
+from ProjectParameters import STEPS_PER_DAY, MAP_SIZE, WALK_CAL_COST, HARVEST_CAL_COST
+from ActionSpace import ActionSpace
+from Agent import Agent
+from BerryBush import BerryBush
+from Cave import Cave
+from Position import Position, distance_many
+from SimulationConfig import DEFAULT_CONFIG
+from World import World
+
+
+def lone_agent(tmp_path, engine, config):
+    cave = Cave(Position(40, 40), 4, config)
+    bush = BerryBush(Position(14, 10), 1000, config)
+    agent = Agent(Position(10, 10), 0.5, 0.5, 5, config=config)
+    agent.goal = bush
+    agent.action_state = ActionSpace.GoTo
+    world = World(tmp_path.joinpath(engine), [cave], [bush], [agent], engine=engine, config=config)
+    return world, agent
+
+
+def test_arrival_matches_object_engine(tmp_path):
+    config = DEFAULT_CONFIG.replace(chance_to_get_bored=0)
+    harvests = {}
+    for engine in ("object", "event"):
+        world, agent = lone_agent(tmp_path, engine, config)
+        t = 0
+        while agent.calories == 0:
+            world.step(t)
+            t += 1
+        harvests[engine] = (t - 1, agent.calories_burned_for_exercise)
+    assert harvests["event"] == harvests["object"], "The agent should harvest on the same step at the same cost."
+    assert harvests["event"] == (7, 7 * WALK_CAL_COST + HARVEST_CAL_COST)
+
+
+def test_walking_agents_are_interpolated(tmp_path):
+    world, agent = lone_agent(tmp_path, "event", DEFAULT_CONFIG.replace(chance_to_get_bored=0))
+    for t in range(4):
+        world.step(t)
+    x, y = world.get_agent_pos()
+    assert x[0] == pytest.approx(12) and y[0] == pytest.approx(10), "Positions should follow the straight walk."
+    assert agent.pos == Position(10, 10) and agent.calories_burned_for_exercise == 0, \
+        "Agents should only be moved and charged when they wake."
+
+
+def test_event_world_runs_a_day(tmp_path):
+    caves = [Cave(Position(10, 10), 4), Cave(Position(40, 40), 4)]
+    bushes = [BerryBush(Position(12, 12), 1000), BerryBush(Position(38, 38), 1000)]
+    agents = [Agent(Position(i * 5, i * 5), 0.5, 0.5, 5) for i in range(10)]
+    world = World(tmp_path.joinpath("project"), caves, bushes, agents, engine="event")
+    for t in range(STEPS_PER_DAY - 1):
+        world.step(t)
+    assert world.engine.events < len(agents) * STEPS_PER_DAY / 2, "Most agent steps should be skipped."
+    world.step(STEPS_PER_DAY - 1)
+    x, y = world.get_agent_pos()
+    assert len(x) == len(world.agents), "The engine should be rebuilt for the surviving agents."
+    assert np.all((0 <= x) & (x <= MAP_SIZE)) and np.all((0 <= y) & (y <= MAP_SIZE)), "Agents should stay on the map."
+    assert tmp_path.joinpath("project", "checkpoints", "checkpoint_1.json").exists(), "Day end should checkpoint."
+
+
+def test_steps_must_reach_goals(tmp_path):
+    config = DEFAULT_CONFIG.replace(distance_per_step=2 * DEFAULT_CONFIG.interaction_radius)
+    with pytest.raises(ValueError):
+        lone_agent(tmp_path, "event", config)
+
+
+def test_view_matches_every_agent_checked(tmp_path):
+    config = DEFAULT_CONFIG.replace(engine="event", init_num_agents=60)
+    world = World(tmp_path.joinpath("project"), [], [], [], config=config)
+    engine = world.engine
+    # Well into midday, when agents look for each other
+    for t in range(151):
+        world.step(t)
+    x, y = engine.positions_at(150)
+    for i, agent in enumerate(engine.agents):
+        seen = np.flatnonzero(distance_many(x, y, agent.pos.x, agent.pos.y) < config.vision_radius)
+        assert engine.view(i, 150)[Agent] == [engine.agents[j] for j in seen if j != i], \
+            "Only checking the cells around an agent should see the same agents in the same order."
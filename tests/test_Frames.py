@@ -0,0 +1,37 @@
+import pytest
+import test_setup
+
+import numpy as np
+from Frames import FrameReader
+from RandomStreams import RNG
+from SimulationConfig import DEFAULT_CONFIG
+from World import World
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    config = DEFAULT_CONFIG.replace(
+        seed=2, record_frames=True, init_num_agents=20, steps_per_day=100, stop_on_extinction=False
+    )
+    RNG.reseed(config.seed)
+    world = World(tmp_path.joinpath("project"), [], [], [], config=config)
+    for t in range(2 * config.steps_per_day):
+        world.step(t)
+    world.close()
+    return world
+
+
+def test_frames_are_recorded(recorded):
+    reader = FrameReader(recorded.project.joinpath("frames"))
+    assert reader.day_list == [0, 1, 2], "Every day should be recorded, with the initial histograms as day 0."
+    assert reader.frames(every=1)[:2] == [(1, 0), (1, 1)] and len(reader.frames()) == 200, "Every step should be a frame."
+    assert len(reader.frames(every=3)) == 67, "Frames should be decimated."
+    assert reader.positions(1, 0).shape == (20, 2), "Positions should have a row per agent."
+    counts = reader.histograms(2)["aggressiveness"]
+    assert counts.sum() == len(recorded.agents), "Histograms should count the agents alive at the end of the day."
+    assert len(reader.static["cave_x"]) == len(recorded.caves), "Caves should be recorded once."
+
+
+def test_resume_truncates_frames(recorded):
+    recorded.frames.truncate(1)
+    assert recorded.frames.days() == [0, 1], "Days after the resumed day should be removed."
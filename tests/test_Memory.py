@@ -0,0 +1,112 @@
+import pytest
+import test_setup
+
+from collections import OrderedDict
+import numpy as np
+from BerryBush import BerryBush
+from Cave import Cave
+from Memory import BANK, Memory, MemoryBank, SHARED, STOLE
+from Position import Position
+from RandomStreams import RNG
+from SimulationConfig import DEFAULT_CONFIG
+from World import World
+
+
+@pytest.fixture
+def bushes():
+    return [BerryBush(Position(i, i), 100) for i in range(8)]
+
+
+@pytest.fixture
+def bank():
+    return MemoryBank(width=4, rows=2)
+
+
+def test_ring(bank, bushes):
+    memory = Memory(bank=bank)
+    for bush in bushes[:4]:
+        memory[bush] = ""
+    assert memory.popitem(False) == (bushes[0], ""), "The oldest memory should be forgotten first."
+    memory[bushes[4]] = "share"
+    memory[bushes[1]] = "steal"
+    assert memory.keys() == bushes[1:5], "Remembering again should keep the memory's place."
+    assert memory.code_of(bushes[1]) == STOLE and memory.code_of(bushes[4]) == SHARED
+    assert memory.code_of(bushes[0]) == -1 and bushes[0] not in memory
+    del memory[bushes[2]]
+    assert memory.items() == [(bushes[1], "steal"), (bushes[3], ""), (bushes[4], "share")], \
+        "Forgetting a memory should keep the others in order."
+    with pytest.raises(OverflowError):
+        for bush in bushes[5:]:
+            memory[bush] = ""
+
+
+def test_rows_are_reused_and_grown(bank, bushes):
+    first, second = Memory(bank=bank), Memory(bank=bank)
+    first[bushes[0]] = ""
+    first.release()
+    third = Memory(bank=bank)
+    assert third.row == first.row and len(third) == 0, "Released rows should be reused empty."
+    fourth = Memory(bank=bank)
+    assert len(bank.head) == 4 and fourth.row not in (second.row, third.row), "Rows should grow when used up."
+    for bush in bushes[:4]:
+        second[bush] = ""
+    second.popitem(False)
+    second.reserve(6)
+    second[bushes[4]] = ""
+    second[bushes[5]] = ""
+    assert bank.width == 6 and second.keys() == bushes[1:6], "Widening should keep every memory in order."
+
+
+def test_from_parents_many_matches_dictionary(bank, bushes):
+    mother = Memory([(bushes[0], ""), (bushes[1], "share"), (bushes[2], "steal")], bank)
+    father = Memory([(bushes[1], "steal"), (bushes[3], ""), (bushes[2], "share")], bank)
+    for seed in range(20):
+        RNG.reseed(seed)
+        child, = Memory.from_parents_many([mother], [father], [4])
+        RNG.reseed(seed)
+        pairs = mother.items() + father.items()
+        pairs = [pairs[k] for k in np.argsort(RNG.uniforms(len(pairs)), kind="stable")]
+        assert child.items() == list(OrderedDict(pairs[:4]).items()), \
+            "Sampling should match shuffling both parents' memories into a dictionary."
+        assert list(child.of_kind(BerryBush)) == child.keys(), "Children should be indexed by kind."
+        child.release()
+
+
+def test_of_kind_follows_the_ring(bank, bushes):
+    cave = Cave(Position(0, 0), 2)
+    memory = Memory([(bushes[0], ""), (cave, ""), (bushes[1], "share")], bank)
+    assert list(memory.of_kind(BerryBush)) == bushes[:2] and list(memory.of_kind(Cave)) == [cave]
+    memory[bushes[2]] = ""
+    memory.popitem(False)
+    del memory[cave]
+    assert list(memory.of_kind(BerryBush)) == bushes[1:3], "Forgotten memories should leave the index, oldest first."
+    assert list(memory.of_kind(Cave)) == [] and list(memory.of_kind(type(None))) == []
+    memory.reserve(6)
+    memory[cave] = "steal"
+    assert list(memory.of_kind(BerryBush)) == bushes[1:3] and list(memory.of_kind(Cave)) == [cave], \
+        "Widening should keep the index."
+    memory.release()
+    assert Memory(bank=bank).of_kind(BerryBush) == set(), "Released rows should start with an empty index."
+
+
+def test_from_parents_many_samples_each_child(bank, bushes):
+    mother = Memory([(bushes[0], ""), (bushes[1], "share")], bank)
+    father = Memory([(bushes[2], "steal"), (bushes[3], "share")], bank)
+    lonely = Memory(bank=bank)
+    children = Memory.from_parents_many([mother, mother, lonely], [father, father, lonely], [4, 1, 3])
+    assert dict(children[0].items()) == dict(mother.items() + father.items()), "Sampling every memory should keep them all."
+    assert len(children[1]) == 1 and children[1].items()[0] in mother.items() + father.items(), "Samples should come from the parents."
+    assert len(children[2]) == 0, "Parents without memories should have children without memories."
+    children[1][bushes[4]] = ""
+    assert bushes[4] in children[1] and bushes[4] not in children[0], "Children should be written to their own rows."
+
+
+def test_world_keeps_its_own_bank(tmp_path):
+    used = len(BANK.head) - len(BANK.free)
+    config = DEFAULT_CONFIG.replace(init_num_agents=20, steps_per_day=20, stop_on_extinction=False)
+    world = World(tmp_path, [], [], [], config=config)
+    for t in range(config.steps_per_day):
+        world.step(t)
+    world.close()
+    assert all(agent.memory.bank is world.bank for agent in world.agents), "A world's agents should remember in its bank."
+    assert len(BANK.head) - len(BANK.free) == used, "A world should leave no rows behind in the shared bank."
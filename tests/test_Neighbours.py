@@ -0,0 +1,36 @@
+import pytest
+import test_setup
+
+import numpy as np
+from Neighbours import Neighbours
+from SimulationConfig import DEFAULT_CONFIG
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(4100)
+    return rng.random(200) * 50, rng.random(200) * 50, rng.random(300) * 50, rng.random(300) * 50
+
+
+def test_matches_brute_force(points):
+    sx, sy, tx, ty = points
+    neighbours = Neighbours.compute(sx, sy, tx, ty, config=DEFAULT_CONFIG.replace(vision_radius=6, interaction_radius=1))
+    assert len(neighbours) == len(sx), "There should be a row per source."
+    for i in range(len(sx)):
+        d = np.sqrt((tx - sx[i]) ** 2 + (ty - sy[i]) ** 2)
+        assert set(neighbours.view(i)) == set(np.flatnonzero(d < 6)), "View should hold every target within the vision radius."
+        assert set(neighbours.interact(i)) == set(np.flatnonzero(d < 1)), "Interact should hold every target within the interaction radius."
+
+
+def test_exclude_self(points):
+    sx, sy, _, _ = points
+    neighbours = Neighbours.compute(sx, sy, sx, sy, exclude=np.arange(len(sx)))
+    for i in range(len(sx)):
+        assert i not in neighbours.view(i) and i not in neighbours.interact(i), "A source should not see itself."
+
+
+def test_empty():
+    neighbours = Neighbours.compute(np.array([1.0]), np.array([1.0]), np.zeros(0), np.zeros(0))
+    assert len(neighbours) == 1 and len(neighbours.view(0)) == 0, "No targets should give empty rows."
+    neighbours = Neighbours.compute(np.zeros(0), np.zeros(0), np.array([1.0]), np.array([1.0]))
+    assert len(neighbours) == 0, "No sources should give no rows."
@@ -1,7 +1,10 @@
 import pytest
 import test_setup
 
-from Position import Position, MAP_SIZE, DISTANCE_PER_STEP
+import numpy as np
+from Position import Position, clamp_many, distance_many, step_toward_many, random_points_within_radius
+from RandomStreams import RNG
+from ProjectParameters import MAP_SIZE, DISTANCE_PER_STEP
 
 def test_position_initialization():
     # Test that position is limited within the map bounds
@@ -49,3 +52,47 @@ def test_position_equality():
     pos3 = Position(1, 2)
     assert pos1 == pos2, "Identical positions should be equal"
     assert pos1 != pos3, "Different positions should not be equal"
+
+
+@pytest.fixture
+def points():
+    x = np.array([0.0, 10.0, MAP_SIZE, 25.0])
+    y = np.array([0.0, 5.0, MAP_SIZE, 25.0])
+    tx = np.array([3.0, -10.0, MAP_SIZE + 10, 25.0])
+    ty = np.array([4.0, 5.0, MAP_SIZE, 25.0])
+    return x, y, tx, ty
+
+
+def test_batch_matches_positions(points):
+    x, y, tx, ty = points
+    sx, sy = step_toward_many(x, y, tx, ty)
+    for i in range(len(x)):
+        stepped = Position(x[i], y[i]).step_toward(Position(tx[i], ty[i]))
+        assert (sx[i], sy[i]) == pytest.approx((stepped.x, stepped.y)), "Batch steps should match Position."
+        # Targets off the map are clamped by Position first
+        assert distance_many(x, y, tx, ty)[i] == pytest.approx(np.hypot(x[i] - tx[i], y[i] - ty[i]))
+    assert np.all((0 <= sx) & (sx <= MAP_SIZE)), "Steps should stay on the map."
+
+
+def test_step_in_place(points):
+    x, y, tx, ty = points
+    expected = step_toward_many(x, y, tx, ty)
+    result = step_toward_many(x, y, tx, ty, out=(x, y))
+    assert result[0] is x and result[1] is y, "Stepping with out should write into the given arrays."
+    np.testing.assert_array_equal(x, expected[0])
+    np.testing.assert_array_equal(y, expected[1])
+
+
+def test_clamp_many():
+    x, y = clamp_many(np.array([-1.0, 5.0]), np.array([MAP_SIZE + 1, 5.0]))
+    assert x.tolist() == [0, 5] and y.tolist() == [MAP_SIZE, 5], "Coordinates should be limited to the map."
+
+
+def test_random_points_within_radius():
+    RNG.reseed(4100)
+    x = np.full(1000, MAP_SIZE / 2)
+    px, py = random_points_within_radius(x, x, 10)
+    assert np.all(distance_many(x, x, px, py) <= 10), "New positions should be within the radius."
+    RNG.reseed(4100)
+    again = random_points_within_radius(x, x, 10)
+    np.testing.assert_array_equal(again[0], px, "The same seed should give the same points.")
@@ -0,0 +1,71 @@
+import pytest
+import test_setup
+
+from Profiler import PROFILER, Profiler
+from RandomStreams import RNG
+from SimulationConfig import DEFAULT_CONFIG
+from World import World
+
+
+@pytest.fixture
+def profiler():
+    PROFILER.enable()
+    yield PROFILER
+    PROFILER.disable()
+    PROFILER.reset()
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    with profiler.section("step"):
+        profiler.count("fights")
+    profiler.end_day(1)
+    assert profiler.totals() == ({}, {}) and profiler.days == [], "A profiler that is off should keep nothing."
+
+
+def test_sections_nest():
+    profiler = Profiler()
+    profiler.enable()
+    for day in (1, 2):
+        with profiler.section("step"):
+            with profiler.section("act"):
+                profiler.count("fights", 2)
+            with profiler.section("act"):
+                pass
+        profiler.end_day(day)
+    sections, counts = profiler.totals()
+    assert sections[("step",)][1] == 2 and sections[("step", "act")][1] == 4, "Calls should be kept under their path."
+    assert sections[("step",)][0] >= sections[("step", "act")][0], "A section should take at least as long as what it runs."
+    assert counts == {("step", "act"): {"fights": 4}}, "Counts should go to the innermost open section."
+    assert [day["day"] for day in profiler.days] == [1, 2] and profiler.days[0]["counts"][("step", "act")]["fights"] == 2
+    stacks = dict(line.rsplit(" ", 1) for line in profiler.folded())
+    assert set(stacks) <= {"step", "step;act"} and all(int(us) > 0 for us in stacks.values())
+    lines = profiler.report().splitlines()
+    assert lines[1].startswith("step") and lines[2].startswith("  act") and "fights=4" in lines[2], \
+        "Nested sections should be listed under the section they run in."
+
+
+@pytest.mark.parametrize("engine", [None, "array"])
+def test_world_is_profiled(tmp_path, profiler, engine):
+    config = DEFAULT_CONFIG.replace(seed=4, init_num_agents=30, steps_per_day=60, stop_on_extinction=False)
+    RNG.reseed(config.seed)
+    world = World(tmp_path, [], [], [], config=config, engine=engine)
+    for t in range(2 * config.steps_per_day):
+        world.step(t)
+    world.close()
+    assert [day["day"] for day in profiler.days] == [1, 2], "The profile should be split by day."
+    sections, counts = profiler.totals()
+    assert sections[("step",)][1] == 2 * config.steps_per_day, "Every step should be timed."
+    for phase in ("morning", "midday", "evening"):
+        assert ("step", phase) in sections, f"The {phase} should be timed."
+    for part in ("survival", "breeding", "reset", "summary", "checkpoint"):
+        assert ("step", "end_day", part) in sections, f"The {part} of the day end should be timed."
+    assert ("write_checkpoint",) in sections, "Checkpoint writes should be timed on the writer's thread."
+    totals = {}
+    for named in counts.values():
+        for name, n in named.items():
+            totals[name] = totals.get(name, 0) + n
+    assert totals["distance_checks"] > 0 and totals["goal_selections"] > 0
+    profiler.write(tmp_path)
+    assert tmp_path.joinpath("profile.txt").read_text().startswith("Day 1\n")
+    assert any(line.startswith("step;midday") for line in tmp_path.joinpath("profile.folded").read_text().splitlines())
@@ -0,0 +1,60 @@
+import pytest
+import test_setup
+
+import json
+import numpy as np
+from RandomStreams import RandomStreams
+
+
+@pytest.fixture
+def streams():
+    return RandomStreams(4100, block_size=16)
+
+
+def test_same_seed_same_draws(streams):
+    first = [streams.random() for _ in range(40)] + list(streams.uniforms(5))
+    streams.reseed(4100)
+    second = [streams.random() for _ in range(40)] + list(streams.uniforms(5))
+    assert first == second, "Reseeding should replay the same draws across block refills."
+
+
+def test_fresh_seed_is_recorded():
+    streams = RandomStreams()
+    draws = [streams.random() for _ in range(5)]
+    replay = RandomStreams(streams.seed)
+    assert [replay.random() for _ in range(5)] == draws, "The recorded seed should reproduce the run."
+
+
+def test_integers_in_range(streams):
+    values = {streams.integers(-2, 3) for _ in range(500)}
+    assert values == {-2, -1, 0, 1, 2}, "Integers should cover [low, high)."
+
+
+def test_choice_and_shuffle(streams):
+    items = list(range(10))
+    assert all(streams.choice(items) in items for _ in range(100)), "Choice should pick from the sequence."
+    streams.shuffle(items)
+    assert sorted(items) == list(range(10)), "Shuffle should keep every element."
+
+
+def test_uniforms(streams):
+    values = streams.uniforms(1000)
+    assert values.shape == (1000,) and np.all((0 <= values) & (values < 1)), "Uniforms should be in [0, 1)."
+
+
+def test_geometric(streams):
+    values = np.array([streams.geometric(0.2) for _ in range(5000)])
+    assert values.min() >= 1 and values.mean() == pytest.approx(5, rel=0.1), "Geometric draws should average 1 / p."
+    assert streams.geometric(1) == 1 and streams.geometric(0) == float("inf")
+
+
+def test_state_round_trip(streams):
+    for _ in range(20):
+        streams.random()
+    streams.uniforms(3)
+    state = json.loads(json.dumps(streams.state()))
+    expected = [streams.random() for _ in range(40)] + list(streams.uniforms(5))
+    restored = RandomStreams(1)
+    restored.set_state(state)
+    assert [restored.random() for _ in range(40)] + list(restored.uniforms(5)) == expected, \
+        "A restored state should continue with the same draws."
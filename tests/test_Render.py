@@ -0,0 +1,33 @@
+import pytest
+import test_setup
+
+from PIL import Image
+from RandomStreams import RNG
+from Render import render
+from SimulationConfig import DEFAULT_CONFIG
+from World import World
+
+
+@pytest.fixture
+def project(tmp_path):
+    config = DEFAULT_CONFIG.replace(
+        seed=2, record_frames=True, init_num_agents=20, steps_per_day=10, num_days=2, stop_on_extinction=False
+    )
+    RNG.reseed(config.seed)
+    world = World(tmp_path.joinpath("project"), [], [], [], config=config)
+    for t in range(config.num_days * config.steps_per_day):
+        world.step(t)
+    world.close()
+    return world.project
+
+
+def test_render_gif_in_chunks(project):
+    output = render(project, project.joinpath("animation.gif"), every=3, workers=2, fps=10)
+    with Image.open(output) as image:
+        assert image.n_frames == 7, "Every kept frame of every chunk should be in the animation, in one file."
+    assert [path.name for path in project.iterdir() if path.name.startswith("tmp")] == [], "Segments should be removed."
+
+
+def test_render_unknown_format(project):
+    with pytest.raises(ValueError):
+        render(project, project.joinpath("animation.avi"))
@@ -0,0 +1,46 @@
+import pytest
+import test_setup
+
+import json
+from pathlib import Path
+from ProjectParameters import FIGHT_CAL_COST, INIT_CAVE_CAP
+from Agent import Agent
+from Position import Position
+from SimulationConfig import SimulationConfig, DEFAULT_CONFIG
+
+
+def test_defaults_match_parameters():
+    assert DEFAULT_CONFIG.fight_cal_cost == FIGHT_CAL_COST, "Defaults should come from ProjectParameters."
+
+
+def test_replace_by_parameter_name():
+    config = DEFAULT_CONFIG.replace(FIGHT_CAL_COST=3, init_cave_cap=[1, 2])
+    assert config.fight_cal_cost == 3, "Values should be changed by their ProjectParameters name."
+    assert config.init_cave_cap == (1, 2), "Lists should be taken as tuples."
+    assert DEFAULT_CONFIG.fight_cal_cost == FIGHT_CAL_COST, "The original config should not change."
+    with pytest.raises(ValueError):
+        DEFAULT_CONFIG.replace(NOT_A_PARAMETER=1)
+
+
+def test_json_round_trip():
+    config = DEFAULT_CONFIG.replace(seed=7, harvest_cal_cost=40)
+    assert SimulationConfig.from_json(json.loads(json.dumps(config.to_json()))) == config, \
+        "A saved config should load as the same config."
+
+
+def test_loads_old_params():
+    with open(Path(__file__).parent.parent.joinpath("experiment1", "params.json"), "r") as f:
+        config = SimulationConfig.from_json(json.load(f))
+    assert config.harvest_cal_cost == 40 and config.init_cave_cap == (3, 7), "Old params.json should load."
+    assert config.engine == DEFAULT_CONFIG.engine, "Missing values should keep their defaults."
+
+
+def test_config_is_threaded():
+    config = DEFAULT_CONFIG.replace(map_size=10, walk_cal_cost=2, distance_per_step=1)
+    agent = Agent(Position(5, 5, config), 0.5, 0.5, 5, config=config)
+    agent.walk_to(Position(20, 5, config))
+    assert agent.pos.x == pytest.approx(6, abs=1e-3), "Steps should use the config's distance."
+    assert agent.calories_burned_for_exercise == 2, "Walking should use the config's cost."
+    assert Position(20, 20, config).x == 10, "Positions should be bound to the config's map."
+    child = Agent.from_parents(agent, agent)
+    assert child.config is config and child.pos.config is config, "Children should share the config."
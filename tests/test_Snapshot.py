@@ -0,0 +1,77 @@
+import pytest
+import test_setup
+
+import json
+from Agent import Agent, AgentCounter
+from Position import Position
+from RandomStreams import RNG
+from SimulationConfig import DEFAULT_CONFIG
+from World import World
+
+
+def make_world(project, engine, backend="json"):
+    config = DEFAULT_CONFIG.replace(
+        seed=4100, engine=engine, checkpoint_backend=backend, init_num_agents=30, steps_per_day=150, num_days=4
+    )
+    RNG.reseed(config.seed)
+    agents = [
+        Agent(Position.get_random_pos(config), RNG.random(), RNG.random(), RNG.integers(1, 11), config=config)
+        for _ in range(config.init_num_agents)
+    ]
+    return World(project, [], [], agents, config=config)
+
+
+def run_days(world, first, last):
+    for t in range(first * world.config.steps_per_day, last * world.config.steps_per_day):
+        world.step(t)
+
+
+@pytest.mark.parametrize("engine", ["object", "array", "event", "tiled"])
+def test_resume_is_exact(tmp_path, engine):
+    world = make_world(tmp_path.joinpath("straight"), engine)
+    run_days(world, 0, 2)
+    world.flush()
+    with world.project.joinpath("snapshot.json").open("r") as f:
+        snapshot = json.load(f)
+    assert snapshot["day"] == 2, "The snapshot should be of the last finished day."
+    run_days(world, 2, 4)
+    world.close()
+    expected = (world.to_json(), world.summary.to_json(), [agent.name for agent in world.agents], AgentCounter.count)
+
+    # Whatever happened since the snapshot must not matter
+    RNG.reseed(1)
+    AgentCounter.count += 100
+    resumed = World.from_snapshot(tmp_path.joinpath("resumed"), snapshot)
+    assert resumed.start_day == 2
+    run_days(resumed, 2, 4)
+    resumed.close()
+    assert (resumed.to_json(), resumed.summary.to_json(),
+            [agent.name for agent in resumed.agents], AgentCounter.count) == expected, \
+        "A resumed run should be identical to one that never stopped."
+
+
+def test_memories_and_ghosts(tmp_path):
+    world = make_world(tmp_path.joinpath("world"), "object")
+    run_days(world, 0, 1)
+    world.close()
+    snapshot = json.loads(json.dumps(world.snapshot(1)))
+    restored = World.from_snapshot(tmp_path.joinpath("restored"), snapshot)
+    for before, after in zip(world.agents, restored.agents):
+        assert [(e.name, v) for e, v in before.memory.items()] == [(e.name, v) for e, v in after.memory.items()]
+    alive = {agent.id for agent in restored.agents}
+    ghosts = {e.id for agent in restored.agents for e in agent.memory if isinstance(e, Agent)} - alive
+    assert ghosts == {ghost["id"] for ghost in snapshot["ghosts"]}, "Remembered dead agents should be kept."
+
+
+def test_resume_truncates_checkpoints(tmp_path):
+    world = make_world(tmp_path.joinpath("world"), "array", "columnar")
+    run_days(world, 0, 1)
+    snapshot = json.loads(json.dumps(world.snapshot(1)))
+    run_days(world, 1, 3)
+    world.close()
+    assert world.store.days() == [0, 1, 2, 3]
+    resumed = World.from_snapshot(world.project, snapshot)
+    assert resumed.store.days() == [0, 1], "Checkpoints after the snapshot should be removed."
+    run_days(resumed, 1, 2)
+    resumed.close()
+    assert resumed.store.days() == [0, 1, 2]
@@ -0,0 +1,58 @@
+import pytest
+import test_setup
+
+from Agent import Agent
+from BerryBush import BerryBush
+from Cave import Cave
+from Position import Position
+from SpatialHash import SpatialHash
+
+
+@pytest.fixture
+def grid():
+    return SpatialHash(6)
+
+
+@pytest.fixture
+def agent():
+    return Agent(Position(1, 1), 0.5, 0.5, 5)
+
+
+def test_insert_and_near(grid, agent):
+    grid.insert(agent)
+    assert agent in grid, "Inserted agent should be in the grid."
+    assert agent in set(grid.near(Position(6.5, 6.5))), "Agent should be found from a neighbouring cell."
+    assert agent not in set(grid.near(Position(13, 1))), "Agent should not be found two cells away."
+
+
+def test_walk_moves_bucket(grid, agent):
+    grid.insert(agent)
+    for _ in range(30):
+        agent.walk_to(Position(20, 1))
+    assert grid.cells[agent] == grid.cell_of(agent.pos), "Walking should keep the agent in the right cell."
+    assert grid.crossings == 2, "Agent should only be moved when it crosses a cell boundary."
+    assert agent not in set(grid.near(Position(1, 1))), "Agent should no longer be found near its old cell."
+
+
+def test_cave_append_moves_bucket(grid, agent):
+    cave = Cave(Position(30, 30), 2)
+    grid.insert(agent)
+    cave.append(agent)
+    assert agent in set(grid.near(Position(30, 30))), "Entering a cave should move the agent to the cave's cell."
+
+
+def test_remove(grid, agent):
+    grid.insert(agent)
+    grid.remove(agent)
+    assert agent not in grid and len(grid.buckets) == 0, "Removed agent should leave no buckets behind."
+    agent.walk_to(Position(40, 40))
+    assert len(grid) == 0, "Removed agent should no longer report moves."
+
+
+def test_near_covers_vision(grid):
+    bushes = [BerryBush(Position(x, y), 100) for x in range(0, 50, 3) for y in range(0, 50, 3)]
+    for bush in bushes:
+        grid.insert(bush)
+    center = Position(25, 25)
+    expected = {bush for bush in bushes if center.distance_to(bush.pos) < 6}
+    assert expected <= set(grid.near(center)), "Everything within a cell width should be near."
@@ -0,0 +1,100 @@
+import pytest
+import test_setup
+
+import json
+import numpy as np
+from Agent import Agent
+from Position import Position
+from SimulationConfig import DEFAULT_CONFIG
+from Summary import Summary
+from World import World
+
+
+@pytest.fixture
+def agents():
+    return [Agent(Position(0, 0), aggressiveness, 0.5, memory)
+            for aggressiveness, memory in ((0.1, 2), (0.3, 4), (0.8, 20))]
+
+
+@pytest.fixture
+def summary(agents):
+    summary = Summary(DEFAULT_CONFIG)
+    summary.record(0, agents)
+    summary.record(1, agents[:1], encounters={"encounters": 5, "share_share": 3, "steal_share": 2, "steal_steal": 0})
+    summary.record(2, [], caves={"arrivals": [4, 0], "fights": [2, 0], "evictions": [1, 0], "fill_time": [350, np.nan]})
+    return summary
+
+
+def test_record(summary):
+    assert summary.population == [3, 1, 0], "Population should be kept for each day."
+    assert summary.stat("aggressiveness", "mean")[0] == pytest.approx(0.4)
+    assert summary.stat("aggressiveness", "std")[0] == pytest.approx(np.std([0.1, 0.3, 0.8], ddof=1))
+    assert np.isnan(summary.stat("aggressiveness", "std")[1]), "One agent has no spread."
+    assert np.isnan(summary.stat("max_memory", "max")[2]), "An empty day has no statistics."
+    assert summary.encounters["steal_share"][1] == 2, "Encounters should be kept for each day."
+    assert np.isnan(summary.encounters["encounters"][0]), "Days without counted encounters should be NaN."
+    fights = summary.cave_stat("fights")
+    assert fights.shape == (3, 2) and fights[2].tolist() == [2, 0], "Contention should be kept cave by cave."
+    assert np.all(np.isnan(fights[:2])), "Days without counted contention should be NaN."
+
+
+def test_histogram(summary):
+    counts, edges = summary.histogram("max_memory")
+    assert counts.shape == (3, len(edges) - 1), "There should be a row of counts per day."
+    assert counts[0].sum() == 3 and counts[0][-1] == 1, "The top of the range should be in the last bin."
+    assert counts[2].sum() == 0
+
+
+def test_save_and_load(summary, tmp_path):
+    summary.save(tmp_path.joinpath("summary.npz"))
+    loaded = Summary.load(tmp_path.joinpath("summary.npz"))
+    assert loaded.days == [0, 1, 2] and loaded.population == [3, 1, 0]
+    np.testing.assert_array_equal(loaded.stat("harvest_percent", "mean"), summary.stat("harvest_percent", "mean"))
+    np.testing.assert_array_equal(loaded.histogram("aggressiveness")[0], summary.histogram("aggressiveness")[0])
+    np.testing.assert_array_equal(loaded.encounters["share_share"], summary.encounters["share_share"])
+    np.testing.assert_array_equal(loaded.cave_stat("fill_time"), summary.cave_stat("fill_time"))
+
+
+def test_plot_all(summary, tmp_path):
+    summary.plot_all(tmp_path)
+    assert tmp_path.joinpath("Aggressiveness_Evolution.pdf").exists()
+    assert tmp_path.joinpath("Memory_Heatmap.pdf").exists()
+
+
+def test_to_json_round_trip(summary):
+    loaded = Summary.from_json(json.loads(json.dumps(summary.to_json())), DEFAULT_CONFIG)
+    assert loaded.population == summary.population
+    np.testing.assert_array_equal(loaded.stat("max_memory", "std"), summary.stat("max_memory", "std"))
+    np.testing.assert_array_equal(loaded.histogram("max_memory")[0], summary.histogram("max_memory")[0])
+    np.testing.assert_array_equal(loaded.encounters["encounters"], summary.encounters["encounters"])
+    np.testing.assert_array_equal(loaded.cave_stat("fill_time"), summary.cave_stat("fill_time"))
+
+
+def test_check_stop(summary, agents):
+    assert summary.check_stop(DEFAULT_CONFIG) == "extinction", "An empty population should stop the run."
+    assert summary.check_stop(DEFAULT_CONFIG.replace(stop_on_extinction=False)) is None
+    steady = Summary(DEFAULT_CONFIG)
+    for day in range(3):
+        steady.record(day, agents)
+        assert steady.check_stop(DEFAULT_CONFIG.replace(min_population=4)) == "population floor"
+    config = DEFAULT_CONFIG.replace(convergence_window=3)
+    assert steady.check_stop(config) is None, "A window longer than the run should not converge."
+    steady.record(3, agents)
+    assert steady.check_stop(config) == "converged", "Unchanged genes should converge."
+    steady.record(4, agents[:2])
+    assert steady.check_stop(config) is None, "Changed genes should not converge."
+
+
+def test_world_stops_on_extinction(tmp_path):
+    # Without caves nobody can sleep, so every agent dies on the first day
+    config = DEFAULT_CONFIG.replace(init_num_caves=0, init_num_agents=10, steps_per_day=20, num_days=5)
+    world = World(tmp_path.joinpath("world"), [], [], [], config=config)
+    for t in range(config.num_days * config.steps_per_day):
+        world.step(t)
+    world.close()
+    assert world.stopped and (world.summary.stop_day, world.summary.stop_reason) == (1, "extinction")
+    assert world.summary.days == [0, 1], "No days should be recorded after stopping."
+    loaded = Summary.load(tmp_path.joinpath("world", "summary.npz"))
+    assert (loaded.stop_day, loaded.stop_reason) == (1, "extinction"), "The stop should be saved."
+    loaded.plot_all(tmp_path)
+    assert tmp_path.joinpath("Total Population across Checkpoints.pdf").exists(), "Short runs should plot."
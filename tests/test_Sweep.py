@@ -0,0 +1,45 @@
+import pytest
+import test_setup
+
+import json
+from SimulationConfig import DEFAULT_CONFIG
+from Sweep import Sweep, grid, latin_hypercube
+
+
+def test_grid():
+    configs = grid(DEFAULT_CONFIG, {"FIGHT_CAL_COST": [5, 10], "INIT_NUM_AGENTS": [10, 20, 30]})
+    assert len(configs) == 6, "Every combination should be made."
+    assert {(c.fight_cal_cost, c.init_num_agents) for c in configs} == {
+        (f, n) for f in (5, 10) for n in (10, 20, 30)
+    }, "Every combination should appear once."
+
+
+def test_latin_hypercube():
+    configs = latin_hypercube(DEFAULT_CONFIG, {"FIGHT_CAL_COST": (0, 10), "INIT_NUM_AGENTS": (10, 110)}, 10, 4100)
+    costs = sorted(c.fight_cal_cost for c in configs)
+    assert all(i <= cost < i + 1 for i, cost in enumerate(costs)), "Every stratum should be used once."
+    assert all(isinstance(c.init_num_agents, int) for c in configs), "Integer parameters should be rounded."
+    again = latin_hypercube(DEFAULT_CONFIG, {"FIGHT_CAL_COST": (0, 10), "INIT_NUM_AGENTS": (10, 110)}, 10, 4100)
+    assert configs == again, "The same seed should give the same sample."
+    with pytest.raises(ValueError):
+        latin_hypercube(DEFAULT_CONFIG, {"INIT_CAVE_CAP": (1, 2)}, 2)
+
+
+def test_sweep_run(tmp_path):
+    spec = {
+        "method": "grid",
+        "seed": 4100,
+        "base": {"NUM_DAYS": 1, "ENGINE": "array", "INIT_NUM_AGENTS": 20},
+        "parameters": {"FIGHT_CAL_COST": [5, 20]},
+    }
+    sweep = Sweep.from_spec(tmp_path.joinpath("sweep"), spec)
+    assert len({c.seed for c in sweep.configs}) == 2, "Each configuration should get its own seed."
+    sweep.run(workers=2)
+    with tmp_path.joinpath("sweep", "sweep.json").open("r") as f:
+        summary = json.load(f)
+    assert [c["parameters"] for c in summary["configs"]] == [{"FIGHT_CAL_COST": 5}, {"FIGHT_CAL_COST": 20}], \
+        "The summary should list what changed between configurations."
+    for i, config in enumerate(sweep.configs):
+        with sweep.config_project(i).joinpath("params.json").open("r") as f:
+            assert json.load(f) == json.loads(json.dumps(config.to_json())), \
+                "Each configuration should save its exact config."
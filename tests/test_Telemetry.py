@@ -0,0 +1,56 @@
+import pytest
+import test_setup
+
+import json
+from RandomStreams import RNG
+from SimulationConfig import DEFAULT_CONFIG
+from Telemetry import Telemetry, poll, poll_all
+from World import World
+
+
+def test_live_counters(tmp_path):
+    telemetry = Telemetry(tmp_path, window=4)
+    try:
+        endpoint = json.loads(tmp_path.joinpath("telemetry.json").read_text())
+        assert poll(endpoint)["day"] is None and poll(endpoint)["live"]["steps_per_second"] is None, \
+            "Nothing should be reported before the first step."
+        for seconds in (0.001, 0.002, 0.003, 0.004, 0.005, 0.006):
+            telemetry.step(seconds)
+        live = poll(endpoint)["live"]
+        assert live["steps"] == 6, "Every step should be counted."
+        assert live["latency_p50_ms"] == pytest.approx(4.5), "Latencies should be taken over the recent steps."
+        telemetry.record_day({"day": 1, "population": 3})
+        assert poll(endpoint)["day"]["population"] == 3 and poll(endpoint, "/days") == [{"day": 1, "population": 3}]
+        with pytest.raises(ConnectionError):
+            poll(endpoint, "/missing")
+    finally:
+        telemetry.close()
+    assert not tmp_path.joinpath("telemetry.json").exists(), "Closed runs should not be found by clients."
+
+
+def test_unix_socket(tmp_path):
+    telemetry = Telemetry(tmp_path, str(tmp_path.joinpath("run.sock")))
+    try:
+        telemetry.step(0.01)
+        assert poll_all(tmp_path)[str(tmp_path)]["live"]["steps"] == 1, "Runs on a Unix socket should be polled too."
+    finally:
+        telemetry.close()
+    assert not tmp_path.joinpath("run.sock").exists(), "The socket should be removed."
+
+
+def test_world_publishes_days(tmp_path):
+    config = DEFAULT_CONFIG.replace(seed=5, telemetry=0, init_num_agents=20, steps_per_day=20, stop_on_extinction=False)
+    RNG.reseed(config.seed)
+    world = World(tmp_path.joinpath("project"), [], [], [], config=config)
+    try:
+        for t in range(2 * config.steps_per_day):
+            world.step(t)
+        days = poll(world.telemetry.endpoint, "/days")
+    finally:
+        world.close()
+    assert [day["day"] for day in days] == [1, 2], "Every day should be published."
+    assert days[0]["population"] == 20 - days[0]["deaths"] + days[0]["births"], "Births and deaths should add up."
+    assert 0 <= days[0]["cave_fill"] <= 1 and 0 <= days[0]["bush_depletion"] <= 1
+    assert set(days[0]["genes"]) == {"aggressiveness", "harvest_percent", "max_memory"}
+    assert days[0]["encounters"]["encounters"] is None and days[0]["caves"] is None, \
+        "The object engine does not count encounters or cave contention."
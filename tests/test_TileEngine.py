@@ -0,0 +1,74 @@
+import pytest
+import test_setup
+
+from ActionSpace import ActionSpace
+from ActiveSet import ActiveSet
+from Agent import Agent
+from BerryBush import BerryBush
+from Cave import Cave
+from Position import Position
+from SimulationConfig import DEFAULT_CONFIG
+from TileEngine import tile_of
+from World import World
+
+CONFIG = DEFAULT_CONFIG.replace(engine="tiled", tiles=2, chance_to_get_bored=0)
+
+
+def make_world(tmp_path, agents, bushes):
+    return World(tmp_path.joinpath("project"), [Cave(Position(40, 40), 4, CONFIG)], bushes, agents, config=CONFIG)
+
+
+def test_tile_of():
+    assert [tile_of(x, CONFIG) for x in (0, 24.9, 25, 50)] == [0, 0, 1, 1], "Tiles should split the map in strips."
+
+
+def test_agents_move_between_workers(tmp_path):
+    agent = Agent(Position(24.9, 10, CONFIG), 0.5, 0.5, 5, config=CONFIG)
+    agent.wander_spot = Position(30, 10, CONFIG)
+    world = make_world(tmp_path, [agent], [BerryBush(Position(5, 5, CONFIG), 100, CONFIG)])
+    try:
+        assert world.engine.owner[agent.id] == 0
+        world.step(0)
+        x, y = world.get_agent_pos()
+        assert world.engine.owner[agent.id] == 1, "An agent crossing into another tile should move to its worker."
+        assert x[0] == pytest.approx(25.4, abs=1e-3), "The agent's position should be reported."
+        world.step(1)
+        world.engine.sync()
+        assert agent.pos.x == pytest.approx(25.9, abs=1e-3), "Syncing should gather the agent back."
+    finally:
+        world.close()
+
+
+def test_interactions_across_tiles_in_id_order(tmp_path):
+    bush = BerryBush(Position(25.5, 10, CONFIG), 100, CONFIG)
+    agents = [
+        Agent(Position(24.8, 10, CONFIG), 0.5, 0.3, 5, config=CONFIG),
+        Agent(Position(24.9, 10.2, CONFIG), 0.5, 0.9, 5, config=CONFIG),
+    ]
+    for agent in agents:
+        agent.goal = bush
+        agent.action_state = ActionSpace.GoTo
+    world = make_world(tmp_path, agents, [bush])
+    try:
+        world.step(0)
+        assert all(world.engine.owner[agent.id] == 1 for agent in agents), \
+            "Agents reaching a bush of another tile should be sent to its worker."
+        world.step(1)
+        world.engine.sync()
+    finally:
+        world.close()
+    assert [agent.calories for agent in agents] == [30, 70], "The agent with the lower ID should harvest first."
+    assert bush.current_calories == 0, "The bush's calories should be gathered back from its worker."
+    assert all(bush in agent.seen_today for agent in agents)
+
+
+def test_world_keeps_its_active_set(tmp_path):
+    agents = [Agent(Position(10 + 20 * i, 10, CONFIG), 0.5, 0.5, 5, config=CONFIG) for i in range(2)]
+    world = make_world(tmp_path, agents, [BerryBush(Position(5, 5, CONFIG), 100, CONFIG)])
+    try:
+        world.step(0)
+        world.step(1)
+    finally:
+        world.close()
+    assert isinstance(world.active, ActiveSet), "The world's active set should not be replaced by the engine."
+    assert world.active_sizes["morning"] == [2, 2], "The engine should count the agents awake in its workers."